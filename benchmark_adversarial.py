@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Fuzz and adversarial-input benchmark for requirement extraction. Random
+marker-heavy text checks that the linear-time bullet scanner and page
+chunker produce exactly what the backtracking regex and the original
+rescanning chunker did; adversarial inputs (bullets trailed by long
+whitespace, long lines with no newline, dangling markers on every line)
+then grow in size and the time per character must stay flat.
+"""
+
+import sys
+import time
+import random
+import argparse
+from parse_ventilator_spec import (VentilatorSpecParser, BULLET_PATTERN, DANGLING_MARKER_PATTERN,
+                                   iter_bullet_matches, _page_at)
+
+# Time per character may grow by this factor from the smallest to the
+# largest input before the scan counts as superlinear
+MAX_GROWTH = 3.0
+
+FRAGMENTS = ['•', '▪', ' ', '  ', '\t', '\n', '\n\n', ' \n', 'x', 'abc ', 'ſhall', 'MUST', 'must',
+             'shall', 'should', 'requirement', 'REQ-', 'REQ-AB-', 'REQ-AB-001:', '001:', 'GAP-001 ',
+             'Integrity', 'integrity x', 'encryption', ':', '-', '\u2028', '\x85']
+
+def reference_text_chunks(pages):
+    """iter_text_chunks as it was, rescanning the whole carry on every page"""
+    carry = ''
+    carry_starts = []
+    for page_number, page_text in pages:
+        if not page_text:
+            continue
+        buffer = carry + page_text
+        page_starts = carry_starts + [(len(carry), page_number)]
+        split = buffer.rfind('\n') + 1
+        dangling = DANGLING_MARKER_PATTERN.search(buffer, 0, split)
+        while dangling:
+            split = buffer.rfind('\n', 0, dangling.start()) + 1
+            dangling = DANGLING_MARKER_PATTERN.search(buffer, 0, split)
+        if split:
+            yield buffer[:split], page_starts
+        carry = buffer[split:]
+        carry_starts = [(0, _page_at(page_starts, split))] + [
+            (offset - split, page) for offset, page in page_starts if offset > split]
+    if carry:
+        yield carry, carry_starts
+
+def reference_bullets(text):
+    return [(m.start(), m.group(1)) for m in BULLET_PATTERN.finditer(text)]
+
+def random_text(rng, length):
+    return ''.join(rng.choice(FRAGMENTS) for _ in range(length))
+
+def fuzz(parser, trials, seed):
+    """Compare new and reference scanning on random text; returns the number of mismatches"""
+    rng = random.Random(seed)
+    mismatches = 0
+    for trial in range(trials):
+        pages = [(number, random_text(rng, rng.randrange(0, 30))) for number in range(1, rng.randrange(2, 8))]
+        text = ''.join(page_text for _, page_text in pages)
+        if list(iter_bullet_matches(text)) != reference_bullets(text):
+            mismatches += 1
+            print(f"Bullet mismatch in trial {trial}: {text!r}")
+        if list(parser.iter_text_chunks(pages)) != list(reference_text_chunks(pages)):
+            mismatches += 1
+            print(f"Chunk mismatch in trial {trial}: {pages!r}")
+    return mismatches
+
+# Inputs of about n characters that made the original scanning quadratic
+ADVERSARIAL = {
+    'bullet + whitespace, no keyword': lambda n: [(1, '•' + ' ' * (n // 2) + 'x' * (n // 2))],
+    'square bullets, no newline': lambda n: [(1, '▪ data ' * (n // 7))],
+    'pages without newlines': lambda n: [(page, 'abc def ' * 50) for page in range(1, n // 400 + 1)],
+    'dangling bullet lines': lambda n: [(page, '•\n' * 100) for page in range(1, n // 200 + 1)],
+    'REQ markers and GAP lines': lambda n: [(1, ('REQ-' + 'A' * 50 + ' GAP-001 Integrity ') * (n // 73))],
+}
+
+def scan(parser, pages):
+    return [parser.scan_text(chunk, page_starts) for chunk, page_starts in parser.iter_text_chunks(pages)]
+
+def reference_scan(pages):
+    for chunk, _ in reference_text_chunks(pages):
+        reference_bullets(chunk)
+
+def time_call(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Fuzz and time extraction on adversarial input')
+    arg_parser.add_argument('--trials', type=int, default=3000, help='Random texts to compare')
+    arg_parser.add_argument('--seed', type=int, default=1, help='Fuzzing seed')
+    arg_parser.add_argument('--sizes', type=int, nargs='+', default=[5000, 20000, 80000, 320000, 1280000],
+                            help='Adversarial input sizes in characters')
+    arg_parser.add_argument('--reference-limit', type=int, default=5000,
+                            help='Largest input to time the original scanning on')
+    args = arg_parser.parse_args()
+    parser = VentilatorSpecParser()
+
+    mismatches = fuzz(parser, args.trials, args.seed)
+    print(f"Fuzzing: {args.trials} random page streams, {mismatches} mismatches")
+
+    superlinear = []
+    print(f"\n{'Input':<32} {'Size':>10} {'Linear (s)':>11} {'us/KiB':>8} {'Original (s)':>13}")
+    for name, build in ADVERSARIAL.items():
+        per_char = []
+        for size in args.sizes:
+            pages = build(size)
+            length = sum(len(page_text) for _, page_text in pages)
+            elapsed = time_call(lambda: scan(parser, pages))
+            per_char.append(elapsed / length)
+            original = ''
+            if size <= args.reference_limit:
+                original = f'{time_call(lambda: reference_scan(pages)):.4f}'
+            print(f"{name:<32} {length:>10,} {elapsed:>11.4f} {elapsed / length * 1024 * 1e6:>8.1f} {original:>13}")
+        if per_char[-1] > MAX_GROWTH * per_char[0]:
+            superlinear.append(name)
+
+    if mismatches or superlinear:
+        for name in superlinear:
+            print(f"Superlinear: {name}")
+        sys.exit(1)
+    print(f"\nTime per character stayed within {MAX_GROWTH:.0f}x across a {args.sizes[-1] // args.sizes[0]}x size range")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark single-pass requirement extraction against the original
+per-characteristic extraction on large specification text
+"""
+
+import re
+import sys
+import time
+from parse_ventilator_spec import VentilatorSpecParser
+
+SAMPLE_PDF = 'client/public/pdf/Synthetic_Ventilator_Model_1X_Spec.pdf'
+
+def legacy_extract_requirements(parser, text, characteristic):
+    """Original extraction: a full REQ, bullet and gap scan for one characteristic"""
+    requirements = []
+    gaps = []
+
+    req_matches = re.findall(r'REQ-[A-Z]+-\d{3}:\s*([^\n]+)', text)
+    bullet_matches = re.findall(r'[•▪]\s*([^•\n]+(?:requirement|must|shall|should)[^•\n]+)',
+                                text, re.IGNORECASE)
+    gap_pattern = r'GAP-\d{3}[^\n]*' + characteristic + r'[^\n]*([^\n]+)'
+    gap_matches = re.findall(gap_pattern, text, re.IGNORECASE)
+
+    char_keywords = parser.characteristics[characteristic]['keywords']
+    for req in req_matches + bullet_matches:
+        req_lower = req.lower()
+        if any(keyword in req_lower for keyword in char_keywords):
+            requirements.append({
+                'requirement': req.strip(),
+                'characteristic': characteristic,
+                'info_state': parser._determine_info_state(req),
+                'measure_type': parser._determine_measure_type(req),
+                'source': 'technical_specification'
+            })
+
+    for gap in gap_matches:
+        gaps.append({'gap': gap.strip(), 'characteristic': characteristic, 'identified': True})
+
+    if len(requirements) < 2:
+        gaps.append({
+            'gap': f'Limited requirements found for {characteristic}',
+            'characteristic': characteristic,
+            'identified': False
+        })
+
+    return requirements, gaps
+
+def strip_pages(entries):
+    """Drop page provenance so results compare against the legacy output"""
+    return [{key: value for key, value in entry.items() if key != 'page'} for entry in entries]
+
+def load_sample_text(parser):
+    """Text of the bundled synthetic spec, with gap lines so every pattern is exercised"""
+    text = parser.extract_text_from_pdf(SAMPLE_PDF) or ''
+    gap_lines = ''.join(f'GAP-{n:03d}: {char} coverage missing for remote service\n'
+                        for n, char in enumerate(parser.characteristics, 1))
+    return text + '\n' + gap_lines
+
+def time_call(func, repeats):
+    """Best wall-clock time of several runs"""
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    multipliers = [int(arg) for arg in sys.argv[1:]] or [1, 10, 100, 1000]
+    parser = VentilatorSpecParser()
+    sample = load_sample_text(parser)
+
+    print(f"{'Size':>12} {'Legacy (s)':>12} {'Single-pass (s)':>16} {'Speedup':>9}")
+    for multiplier in multipliers:
+        text = sample * multiplier
+        repeats = 5 if multiplier < 100 else 2
+
+        legacy = {char: legacy_extract_requirements(parser, text, char)
+                  for char in parser.characteristics}
+        single = parser.extract_all_requirements(text)
+        for char, (requirements, gaps) in single.items():
+            if (strip_pages(requirements), strip_pages(gaps)) != legacy[char]:
+                print(f"Output mismatch for {char} at {multiplier}x")
+                sys.exit(1)
+
+        legacy_time = time_call(lambda: [legacy_extract_requirements(parser, text, char)
+                                         for char in parser.characteristics], repeats)
+        single_time = time_call(lambda: parser.extract_all_requirements(text), repeats)
+        size = f'{len(text) / 1024:,.0f} KiB'
+        print(f"{size:>12} {legacy_time:>12.4f} {single_time:>16.4f} {legacy_time / single_time:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Stage-by-stage benchmark of VentilatorSpecParser on small, medium and very
+large synthetic specifications. Each run is appended to a JSON lines history
+file, and the run fails when any stage's throughput drops more than a
+threshold below the median of recent passing runs on the same host.
+"""
+
+import io
+import os
+import sys
+import csv
+import json
+import time
+import socket
+import platform
+import argparse
+import statistics
+from datetime import datetime
+from parse_ventilator_spec import VentilatorSpecParser, PARSER_VERSION
+from generate_synthetic_pdf import generate_spec_document
+
+# Section counts of the generated specs; each section fills one or two pages
+SPEC_SIZES = {
+    'small': 5,
+    'medium': 50,
+    'large': 500
+}
+
+SPEC_SEED = 12
+
+# Unit each stage's throughput is measured in
+STAGE_UNITS = {
+    'pdf_extraction': 'pages',
+    'requirement_extraction': 'bytes',
+    'classification': 'matches',
+    'convert_to_ia_json_schema': 'requirements',
+    'generate_spreadsheet_output': 'requirements',
+    'serialization': 'bytes'
+}
+
+def spec_path(spec_dir, size):
+    """Generate the benchmark spec for a size once and reuse it afterwards"""
+    path = os.path.join(spec_dir, f'benchmark_{size}_{SPEC_SEED}.pdf')
+    if not os.path.exists(path):
+        os.makedirs(spec_dir, exist_ok=True)
+        print(f"Generating {size} benchmark spec ({SPEC_SIZES[size]} sections)...")
+        generate_spec_document(path, SPEC_SEED, {'pages': SPEC_SIZES[size]})
+    return path
+
+def serialize_outputs(results, ia_json, rows):
+    """Serialize all three outputs the way write_outputs does; returns bytes written"""
+    csv_buffer = io.StringIO(newline='')
+    csv.writer(csv_buffer).writerows(rows)
+    return (len(json.dumps(results, indent=2).encode('utf-8'))
+            + len(json.dumps(ia_json, indent=2).encode('utf-8'))
+            + len(csv_buffer.getvalue().encode('utf-8')))
+
+def run_stages(parser, pdf_path):
+    """Run the parse pipeline once; returns ({stage: seconds}, {stage: units})"""
+    timings = {}
+    units = {}
+
+    start = time.perf_counter()
+    pages = list(parser.iter_pdf_pages(pdf_path))
+    timings['pdf_extraction'] = time.perf_counter() - start
+    units['pdf_extraction'] = len(pages)
+
+    start = time.perf_counter()
+    req_matches, gap_matches = [], []
+    text_bytes = 0
+    for chunk, page_starts in parser.iter_text_chunks(pages):
+        text_bytes += len(chunk.encode('utf-8'))
+        chunk_reqs, chunk_bullets, chunk_gaps = parser.scan_text(chunk, page_starts)
+        req_matches.extend(chunk_reqs + chunk_bullets)
+        gap_matches.extend(chunk_gaps)
+    timings['requirement_extraction'] = time.perf_counter() - start
+    units['requirement_extraction'] = text_bytes
+
+    start = time.perf_counter()
+    extracted = parser.build_requirements(req_matches, gap_matches)
+    results = parser.assemble_results(pdf_path, extracted)
+    timings['classification'] = time.perf_counter() - start
+    units['classification'] = len(req_matches) + len(gap_matches)
+
+    requirement_count = results['summary']['total_requirements']
+    start = time.perf_counter()
+    ia_json = parser.convert_to_ia_json_schema(results)
+    timings['convert_to_ia_json_schema'] = time.perf_counter() - start
+    units['convert_to_ia_json_schema'] = requirement_count
+
+    start = time.perf_counter()
+    rows = parser.generate_spreadsheet_output(results)
+    timings['generate_spreadsheet_output'] = time.perf_counter() - start
+    units['generate_spreadsheet_output'] = requirement_count
+
+    start = time.perf_counter()
+    units['serialization'] = serialize_outputs(results, ia_json, rows)
+    timings['serialization'] = time.perf_counter() - start
+
+    return timings, units
+
+def benchmark_size(parser, pdf_path, repeats):
+    """Best time of several runs per stage, with throughput in the stage's unit"""
+    best = {}
+    units = {}
+    for _ in range(repeats):
+        timings, units = run_stages(parser, pdf_path)
+        for stage, seconds in timings.items():
+            best[stage] = min(seconds, best.get(stage, seconds))
+
+    return {
+        stage: {
+            'seconds': round(best[stage], 6),
+            'units': units[stage],
+            'unit': STAGE_UNITS[stage],
+            'throughput': round(units[stage] / best[stage], 2) if best[stage] else None
+        }
+        for stage in STAGE_UNITS
+    }
+
+def load_history(history_path):
+    if not os.path.exists(history_path):
+        return []
+    history = []
+    with open(history_path, 'r') as f:
+        for line in f:
+            if line.strip():
+                history.append(json.loads(line))
+    return history
+
+def find_regressions(run, history, threshold, baseline_runs):
+    """Stages whose throughput fell more than threshold below the recent median
+
+    Only passing runs from the same host count towards the baseline.
+    """
+    previous = [record for record in history
+                if record['host'] == run['host'] and not record.get('regressions')]
+    previous = previous[-baseline_runs:]
+
+    regressions = []
+    for size, stages in run['sizes'].items():
+        for stage, result in stages.items():
+            baseline = [record['sizes'][size][stage]['throughput'] for record in previous
+                        if record['sizes'].get(size, {}).get(stage, {}).get('throughput')]
+            if not baseline or not result['throughput']:
+                continue
+            median = statistics.median(baseline)
+            if result['throughput'] < median * (1 - threshold):
+                regressions.append({
+                    'size': size,
+                    'stage': stage,
+                    'throughput': result['throughput'],
+                    'baseline': round(median, 2),
+                    'change': round(result['throughput'] / median - 1, 4)
+                })
+    return regressions
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Benchmark each stage of the specification parser')
+    arg_parser.add_argument('--sizes', default=','.join(SPEC_SIZES),
+                            help='Comma-separated spec sizes to run (small, medium, large)')
+    arg_parser.add_argument('--repeats', type=int, default=3,
+                            help='Runs per size; the best time of each stage is kept')
+    arg_parser.add_argument('--history', default='benchmark_history.jsonl',
+                            help='JSON lines file the results are appended to')
+    arg_parser.add_argument('--threshold', type=float, default=0.2,
+                            help='Allowed throughput drop below the baseline, as a fraction')
+    arg_parser.add_argument('--baseline-runs', type=int, default=5,
+                            help='Recent passing runs whose median forms the baseline')
+    arg_parser.add_argument('--spec-dir', default='benchmark_specs',
+                            help='Directory the generated benchmark specs are kept in')
+    arg_parser.add_argument('--no-record', action='store_true',
+                            help='Check for regressions without appending to the history')
+    args = arg_parser.parse_args()
+
+    sizes = [size.strip() for size in args.sizes.split(',') if size.strip()]
+    unknown = [size for size in sizes if size not in SPEC_SIZES]
+    if unknown:
+        print(f"Unknown sizes: {', '.join(unknown)} (choose from {', '.join(SPEC_SIZES)})")
+        sys.exit(2)
+
+    parser = VentilatorSpecParser()
+    run = {
+        'timestamp': datetime.now().isoformat(),
+        'host': socket.gethostname(),
+        'python': platform.python_version(),
+        'parser_version': PARSER_VERSION,
+        'repeats': args.repeats,
+        'sizes': {}
+    }
+
+    for size in sizes:
+        pdf_path = spec_path(args.spec_dir, size)
+        run['sizes'][size] = benchmark_size(parser, pdf_path, args.repeats)
+
+        print(f"\n{size} ({run['sizes'][size]['pdf_extraction']['units']} pages)")
+        print(f"  {'Stage':<30} {'Seconds':>10} {'Throughput':>24}")
+        for stage, result in run['sizes'][size].items():
+            throughput = f"{result['throughput']:,.0f} {result['unit']}/s" if result['throughput'] else '-'
+            print(f"  {stage:<30} {result['seconds']:>10.4f} {throughput:>24}")
+
+    history = load_history(args.history)
+    run['regressions'] = find_regressions(run, history, args.threshold, args.baseline_runs)
+
+    if not args.no_record:
+        with open(args.history, 'a') as f:
+            f.write(json.dumps(run) + '\n')
+
+    if run['regressions']:
+        print(f"\nThroughput regressions beyond {args.threshold:.0%}:")
+        for regression in run['regressions']:
+            print(f"  {regression['size']} {regression['stage']}: {regression['throughput']:,.0f} "
+                  f"vs baseline {regression['baseline']:,.0f} ({regression['change']:+.1%})")
+        sys.exit(1)
+    print("\nNo throughput regressions" if history else "\nRecorded first baseline run")
+
+if __name__ == "__main__":
+    main()
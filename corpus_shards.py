@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Sharded corpus parsing. Documents are assigned to one of N shards by their
+content hash, so every node sharing the filesystem agrees on the split
+without coordinating; each shard is parsed as an ordinary batch run into its
+own output directory, and the shards' corpus summaries and IA JSON are then
+merged. Every merge operation is a sum, a maximum, a minimum or a sorted
+concatenation, so shards can be merged in any order and grouping and still
+give the same corpus result.
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import subprocess
+from functools import reduce
+
+CORPUS_SUMMARY_NAME = 'corpus_summary.json'
+CORPUS_IA_NAME = 'corpus_ia_requirements.json'
+
+def parse_shard_spec(value):
+    """argparse type for INDEX/COUNT, e.g. 0/4"""
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected INDEX/COUNT, got {value!r}")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"shard index must be in 0..{count - 1}")
+    return index, count
+
+def shard_of(digest, count):
+    """Shard of a document with the given SHA-256 hex digest"""
+    return int(digest, 16) % count
+
+def document_shard(pdf_path, digest, count):
+    """Shard of a document; one that cannot be read is placed by its path instead"""
+    if digest is None:
+        digest = hashlib.sha256(pdf_path.encode('utf-8')).hexdigest()
+    return shard_of(digest, count)
+
+def _merge_counts(a, b):
+    return {key: a.get(key, 0) + b.get(key, 0) for key in sorted(set(a) | set(b))}
+
+def merge_corpora(a, b):
+    """Merge two corpus summaries (from run_batch or earlier merges)"""
+    meta_a, meta_b = a['metadata'], b['metadata']
+    if meta_a['parser_version'] != meta_b['parser_version']:
+        raise ValueError(f"Cannot merge corpora parsed by versions {meta_a['parser_version']} "
+                         f"and {meta_b['parser_version']}")
+    if meta_a.get('shard_count') != meta_b.get('shard_count'):
+        raise ValueError("Cannot merge corpora split into different shard counts")
+    if set(meta_a.get('shards', [])) & set(meta_b.get('shards', [])):
+        raise ValueError("A shard appears in both corpora being merged")
+
+    metadata = {
+        'parsed_date': max(meta_a['parsed_date'], meta_b['parsed_date']),
+        'parser_version': meta_a['parser_version'],
+        'documents': meta_a['documents'] + meta_b['documents'],
+        'parsed': meta_a['parsed'] + meta_b['parsed'],
+        'failed': sorted(meta_a['failed'] + meta_b['failed'])
+    }
+    if 'skipped' in meta_a or 'skipped' in meta_b:
+        metadata['skipped'] = sorted(meta_a.get('skipped', []) + meta_b.get('skipped', []))
+    if 'timed_out' in meta_a or 'timed_out' in meta_b:
+        metadata['timed_out'] = sorted(meta_a.get('timed_out', []) + meta_b.get('timed_out', []),
+                                       key=lambda entry: entry['document'])
+    if 'cache' in meta_a or 'cache' in meta_b:
+        metadata['cache'] = _merge_counts(meta_a.get('cache', {}), meta_b.get('cache', {}))
+    for key in ('workers_recycled', 'resumed'):
+        if key in meta_a or key in meta_b:
+            metadata[key] = meta_a.get(key, 0) + meta_b.get(key, 0)
+    if 'elapsed_seconds' in meta_a and 'elapsed_seconds' in meta_b:
+        # Shards run side by side, so the corpus took as long as the slowest
+        metadata['elapsed_seconds'] = max(meta_a['elapsed_seconds'], meta_b['elapsed_seconds'])
+        elapsed = metadata['elapsed_seconds']
+        metadata['documents_per_second'] = round(metadata['documents'] / elapsed, 2) if elapsed else None
+    if 'shard_count' in meta_a:
+        metadata['shards'] = sorted(meta_a['shards'] + meta_b['shards'])
+        metadata['shard_count'] = meta_a['shard_count']
+
+    coverage_a, coverage_b = a['summary']['coverage'], b['summary']['coverage']
+    return {
+        'metadata': metadata,
+        'summary': {
+            'total_requirements': a['summary']['total_requirements'] + b['summary']['total_requirements'],
+            'total_gaps': a['summary']['total_gaps'] + b['summary']['total_gaps'],
+            'coverage': {char: _merge_counts(coverage_a.get(char, {}), coverage_b.get(char, {}))
+                         for char in sorted(set(coverage_a) | set(coverage_b))}
+        },
+        'documents': sorted(a['documents'] + b['documents'], key=lambda doc: doc['document'])
+    }
+
+def document_ia(ia_json):
+    """A document's IA JSON in corpus form, where value counts the documents at a coordinate"""
+    return {coord: dict(entry, sources=[entry['source']]) for coord, entry in ia_json.items()}
+
+def merge_ia(a, b):
+    """Merge two corpus IA JSON objects
+
+    Each coordinate keeps the requirement of its first source in sorted
+    order, lists every source and counts them in value.
+    """
+    merged = {}
+    for coord in sorted(set(a) | set(b)):
+        if coord not in b or coord not in a:
+            merged[coord] = a.get(coord) or b[coord]
+            continue
+        entry_a, entry_b = a[coord], b[coord]
+        first = min(entry_a, entry_b, key=lambda entry: (entry['source'], entry['requirement']))
+        merged[coord] = dict(first, value=entry_a['value'] + entry_b['value'],
+                             sources=sorted(entry_a['sources'] + entry_b['sources']))
+    return merged
+
+def corpus_ia_json(document_results):
+    """Corpus IA JSON of a batch run, folded from its parsed documents' IA files"""
+    corpus_ia = {}
+    for doc in document_results:
+        if doc['status'] != 'parsed':
+            continue
+        with open(doc['outputs']['ia_requirements'], 'r') as f:
+            corpus_ia = merge_ia(corpus_ia, document_ia(json.load(f)))
+    return corpus_ia
+
+def load_shard(shard_dir):
+    """(corpus summary, corpus IA JSON) written by a batch run into shard_dir"""
+    with open(os.path.join(shard_dir, CORPUS_SUMMARY_NAME), 'r') as f:
+        corpus = json.load(f)
+    with open(os.path.join(shard_dir, CORPUS_IA_NAME), 'r') as f:
+        corpus_ia = json.load(f)
+    return corpus, corpus_ia
+
+def merge_shards(shards):
+    """Fold (corpus summary, corpus IA JSON) pairs into one"""
+    return reduce(lambda a, b: (merge_corpora(a[0], b[0]), merge_ia(a[1], b[1])), shards)
+
+def write_merged(output_dir, corpus, corpus_ia):
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, CORPUS_SUMMARY_NAME), 'w') as f:
+        json.dump(corpus, f, indent=2)
+    with open(os.path.join(output_dir, CORPUS_IA_NAME), 'w') as f:
+        json.dump(corpus_ia, f, indent=2)
+
+def missing_shards(corpus):
+    """Shard indices not yet merged into a corpus"""
+    metadata = corpus['metadata']
+    if 'shard_count' not in metadata:
+        return []
+    return sorted(set(range(metadata['shard_count'])) - set(metadata['shards']))
+
+def report(corpus, output_dir):
+    print(f"Merged corpus: {corpus['metadata']['parsed']}/{corpus['metadata']['documents']} documents parsed")
+    print(f"Total requirements found: {corpus['summary']['total_requirements']}")
+    print(f"Total gaps identified: {corpus['summary']['total_gaps']}")
+    missing = missing_shards(corpus)
+    if missing:
+        print(f"Missing shards: {', '.join(str(index) for index in missing)}")
+    print(f"Results written to {os.path.join(output_dir, CORPUS_SUMMARY_NAME)} and {CORPUS_IA_NAME}")
+
+def run_local(target, shards, output_dir, parser_args):
+    """Parse target as shards parallel processes and merge each shard as it finishes"""
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'parse_ventilator_spec.py')
+    processes = {}
+    for index in range(shards):
+        shard_dir = os.path.join(output_dir, f'shard-{index}')
+        command = [sys.executable, script, '--batch', target, '--shard', f'{index}/{shards}',
+                   '--output-dir', shard_dir] + parser_args
+        processes[index] = (subprocess.Popen(command, stdout=subprocess.DEVNULL), shard_dir)
+
+    merged = None
+    failed = []
+    while processes:
+        for index, (process, shard_dir) in list(processes.items()):
+            if process.poll() is None:
+                continue
+            del processes[index]
+            if process.returncode != 0:
+                failed.append(index)
+                print(f"Shard {index} exited with code {process.returncode}")
+                continue
+            shard = load_shard(shard_dir)
+            merged = shard if merged is None else merge_shards([merged, shard])
+            print(f"Shard {index} finished: {shard[0]['metadata']['documents']} documents")
+        time.sleep(0.1)
+    return merged, failed
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Parse a corpus in content-hash shards and merge the results')
+    subcommands = arg_parser.add_subparsers(dest='command', required=True)
+    merge_parser = subcommands.add_parser('merge', help='Merge the outputs of finished shard runs')
+    merge_parser.add_argument('shard_dirs', nargs='+', help='Output directories of shard batch runs')
+    merge_parser.add_argument('--output-dir', required=True, help='Directory for the merged corpus results')
+    run_parser = subcommands.add_parser('run', help='Parse every shard in a local process, then merge')
+    run_parser.add_argument('target', help='Directory or glob of specification documents')
+    run_parser.add_argument('--shards', type=int, required=True, help='Number of shards')
+    run_parser.add_argument('--output-dir', required=True,
+                            help='Directory for the merged results; shard N goes to its shard-N subdirectory')
+    args, parser_args = arg_parser.parse_known_args()
+
+    if args.command == 'merge':
+        if parser_args:
+            arg_parser.error(f"unrecognized arguments: {' '.join(parser_args)}")
+        corpus, corpus_ia = merge_shards(load_shard(shard_dir) for shard_dir in args.shard_dirs)
+    else:
+        # Anything else is passed on to each shard's parse_ventilator_spec.py run
+        merged, failed = run_local(args.target, args.shards, args.output_dir, parser_args)
+        if merged is None:
+            sys.exit(1)
+        corpus, corpus_ia = merged
+    write_merged(args.output_dir, corpus, corpus_ia)
+    report(corpus, args.output_dir)
+    if missing_shards(corpus):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Compact NumPy-backed model of the assessment cube JSON files
+(philipsVentilatorData.json, dragerVentilatorData.json, cubeData.json,
+ventilator_ia_requirements.json).
+
+Cell values live in one dense int8 array indexed by coordinate; every other
+per-cell attribute is a categorical side array of small unsigned codes into
+a vocabulary. Cubes round-trip losslessly to the JSON layout and can be
+saved as a memory-mappable .npy file with a small JSON sidecar.
+"""
+
+import os
+import sys
+import json
+import numpy as np
+
+CUBE_FORMAT_VERSION = 1
+
+def parse_coordinate(key):
+    """Turn an 'x,y,z' key into a tuple of ints, or None for other keys"""
+    parts = key.split(',')
+    if len(parts) != 3:
+        return None
+    try:
+        return tuple(int(part) for part in parts)
+    except ValueError:
+        return None
+
+def _code_dtype(vocabulary_size):
+    """Smallest unsigned dtype that fits the codes plus the 'absent' sentinel"""
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if vocabulary_size < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    raise ValueError('Attribute vocabulary too large')
+
+def _absent(codes):
+    return np.iinfo(codes.dtype).max
+
+class CubeModel:
+    def __init__(self, origin, values, present, order, attributes, value_present=None,
+                 field_order=None, extras=None):
+        """Build a cube from its arrays; use from_dict or the loaders instead"""
+        self.origin = tuple(int(axis) for axis in origin)
+        self.values = values
+        self.present = present
+        self.order = order
+        # attributes: {name: (codes array, vocabulary list)}, in first-seen order
+        self.attributes = attributes
+        self.value_present = present if value_present is None else value_present
+        # Field order within a cell ('value' included), used when writing JSON
+        self.field_order = field_order or ['value'] + list(attributes)
+        self.extras = extras or {}
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    def index_of(self, x, y, z):
+        """Array index of a coordinate"""
+        return (x - self.origin[0], y - self.origin[1], z - self.origin[2])
+
+    def coordinate_of(self, index):
+        """Coordinate of an array index"""
+        return tuple(int(i) + offset for i, offset in zip(index, self.origin))
+
+    def value(self, x, y, z):
+        return int(self.values[self.index_of(x, y, z)])
+
+    def attribute(self, name, x, y, z, default=None):
+        """Value of a per-cell attribute, or default if the cell does not have it"""
+        if name not in self.attributes:
+            return default
+        codes, vocabulary = self.attributes[name]
+        code = codes[self.index_of(x, y, z)]
+        return default if code == _absent(codes) else vocabulary[code]
+
+    def attribute_mask(self, name, value):
+        """Boolean array of cells whose attribute equals value"""
+        codes, vocabulary = self.attributes.get(name, (None, []))
+        if codes is None or value not in vocabulary:
+            return np.zeros(self.shape, dtype=bool)
+        return codes == vocabulary.index(value)
+
+    def coordinates(self, mask=None):
+        """Coordinates of present cells, optionally restricted by a boolean mask"""
+        selected = self.present if mask is None else self.present & mask
+        return [self.coordinate_of(index) for index in np.argwhere(selected)]
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a cube from the {'x,y,z': {...}} JSON layout"""
+        cells = []
+        extras = {}
+        for key, cell in data.items():
+            coordinate = parse_coordinate(key)
+            if coordinate is None or not isinstance(cell, dict):
+                extras[key] = cell
+            else:
+                cells.append((coordinate, cell))
+
+        if cells:
+            coordinates = np.array([coordinate for coordinate, _ in cells])
+            origin = coordinates.min(axis=0)
+            shape = tuple(coordinates.max(axis=0) - origin + 1)
+        else:
+            origin = (0, 0, 0)
+            shape = (0, 0, 0)
+
+        values = np.zeros(shape, dtype=np.int8)
+        present = np.zeros(shape, dtype=bool)
+        value_present = np.zeros(shape, dtype=bool)
+        order = np.full(shape, -1, dtype=np.int32)
+
+        # Collect attribute values per cell before choosing code widths
+        attribute_cells = {}
+        field_order = []
+        for rank, (coordinate, cell) in enumerate(cells):
+            index = tuple(c - o for c, o in zip(coordinate, origin))
+            present[index] = True
+            order[index] = rank
+            for name, item in cell.items():
+                if name not in field_order:
+                    field_order.append(name)
+                if name == 'value' and _fits_int8(item):
+                    values[index] = item
+                    value_present[index] = True
+                else:
+                    attribute_cells.setdefault(name, []).append((index, item))
+
+        attributes = {}
+        for name, items in attribute_cells.items():
+            vocabulary = []
+            lookup = {}
+            for _, item in items:
+                token = json.dumps(item, sort_keys=True)
+                if token not in lookup:
+                    lookup[token] = len(vocabulary)
+                    vocabulary.append(item)
+            dtype = _code_dtype(len(vocabulary))
+            codes = np.full(shape, np.iinfo(dtype).max, dtype=dtype)
+            for index, item in items:
+                codes[index] = lookup[json.dumps(item, sort_keys=True)]
+            attributes[name] = (codes, vocabulary)
+
+        return cls(origin, values, present, order, attributes, value_present, field_order, extras)
+
+    def to_dict(self):
+        """Rebuild the {'x,y,z': {...}} JSON layout in the original key order"""
+        data = {}
+        ranked = sorted((int(self.order[tuple(index)]), tuple(index))
+                        for index in np.argwhere(self.present))
+        for _, index in ranked:
+            x, y, z = self.coordinate_of(index)
+            cell = {}
+            for name in self.field_order:
+                if name == 'value' and self.value_present[index]:
+                    cell['value'] = int(self.values[index])
+                elif name in self.attributes:
+                    codes, vocabulary = self.attributes[name]
+                    if codes[index] != _absent(codes):
+                        cell[name] = vocabulary[codes[index]]
+            data[f'{x},{y},{z}'] = cell
+        data.update(self.extras)
+        return data
+
+    @classmethod
+    def load_json(cls, path):
+        with open(path, 'r') as f:
+            return cls.from_dict(json.load(f))
+
+    def save_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def to_records(self):
+        """Pack every per-cell array into one structured array"""
+        fields = [('value', np.int8), ('present', bool), ('value_present', bool), ('order', np.int32)]
+        attribute_names = list(self.attributes)
+        fields += [(f'attr{i}', codes.dtype)
+                   for i, (codes, _) in enumerate(self.attributes.values())]
+        records = np.zeros(self.shape, dtype=fields)
+        records['value'] = self.values
+        records['present'] = self.present
+        records['value_present'] = self.value_present
+        records['order'] = self.order
+        for i, name in enumerate(attribute_names):
+            records[f'attr{i}'] = self.attributes[name][0]
+        return records
+
+    def save_npy(self, path):
+        """Save cell arrays as one .npy file plus a .meta.json sidecar"""
+        np.save(path, self.to_records())
+        meta = {
+            'format_version': CUBE_FORMAT_VERSION,
+            'origin': list(self.origin),
+            'field_order': self.field_order,
+            'attributes': [
+                {'name': name, 'vocabulary': vocabulary}
+                for name, (_, vocabulary) in self.attributes.items()
+            ],
+            'extras': self.extras
+        }
+        with open(_meta_path(path), 'w') as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load_npy(cls, path, mmap=True):
+        """Load a cube saved with save_npy, memory-mapping the cell arrays by default"""
+        with open(_meta_path(path), 'r') as f:
+            meta = json.load(f)
+        if meta.get('format_version') != CUBE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported cube format in {path}")
+
+        records = np.load(path, mmap_mode='r' if mmap else None)
+        attributes = {
+            entry['name']: (records[f'attr{i}'], entry['vocabulary'])
+            for i, entry in enumerate(meta['attributes'])
+        }
+        return cls(meta['origin'], records['value'], records['present'], records['order'],
+                   attributes, records['value_present'], meta['field_order'], meta['extras'])
+
+def _fits_int8(item):
+    return type(item) is int and -128 <= item <= 127
+
+def _meta_path(npy_path):
+    base, _ = os.path.splitext(npy_path)
+    return f'{base}.meta.json'
+
+def main():
+    """Convert a cube JSON file to .npy (or back) and report sizes"""
+    if len(sys.argv) < 3:
+        print("Usage: cube_model.py <input.json|input.npy> <output.npy|output.json>")
+        sys.exit(1)
+
+    source, target = sys.argv[1], sys.argv[2]
+    if source.endswith('.npy'):
+        cube = CubeModel.load_npy(source)
+    else:
+        cube = CubeModel.load_json(source)
+
+    if target.endswith('.npy'):
+        cube.save_npy(target)
+    else:
+        cube.save_json(target)
+
+    print(f"Converted {source} -> {target}")
+    print(f"Cube shape: {cube.shape}, origin: {cube.origin}, cells: {int(cube.present.sum())}")
+    print(f"Size: {os.path.getsize(source):,} bytes -> {os.path.getsize(target):,} bytes")
+
+if __name__ == "__main__":
+    main()
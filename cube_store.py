@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Indexed in-memory store of ventilator cube data across many devices.
+Secondary indexes on subsystem, property and (level, value) are built once
+at load time and updated incrementally when cells change, so lookups no
+longer scan every coordinate of every cube.
+"""
+
+import os
+import sys
+import glob
+import json
+from collections import defaultdict
+from cube_model import parse_coordinate
+from fleet_scoring import SUBSYSTEMS, SUBSYSTEM_PROPERTIES, AXIS_MIN, device_id
+from update_realistic_security import LEVEL_TO_Z, write_json_atomic
+
+# Levels from lowest to highest, and the z coordinate that encodes each one
+LEVELS = sorted(LEVEL_TO_Z, key=LEVEL_TO_Z.get)
+Z_TO_LEVEL = {z: level for level, z in LEVEL_TO_Z.items()}
+
+def cell_labels(key, cell):
+    """(subsystem, property, level) of a cell, falling back to its coordinate"""
+    coordinate = parse_coordinate(key)
+    subsystem = cell.get('subsystem')
+    prop = cell.get('property')
+    level = cell.get('level')
+    if coordinate is not None:
+        x, y, z = coordinate
+        subsystem = subsystem or SUBSYSTEMS.get(y)
+        properties = SUBSYSTEM_PROPERTIES.get(subsystem, [])
+        if prop is None and 0 <= x - AXIS_MIN < len(properties):
+            prop = properties[x - AXIS_MIN]
+        level = level or Z_TO_LEVEL.get(z)
+    return subsystem, prop, level
+
+class CubeStore:
+    def __init__(self):
+        self.devices = {}
+        self._by_device = defaultdict(set)
+        self._by_subsystem = defaultdict(set)
+        self._by_property = defaultdict(set)
+        self._by_level_value = defaultdict(set)
+        # Composite index answering property + level + value queries directly
+        self._by_property_level_value = defaultdict(set)
+
+    @classmethod
+    def from_files(cls, paths):
+        """Load device cube files, naming each device after its file"""
+        store = cls()
+        for path in paths:
+            with open(path, 'r') as f:
+                store.add_device(device_id(path), json.load(f))
+        return store
+
+    def _index_keys(self, key, cell):
+        subsystem, prop, level = cell_labels(key, cell)
+        value = cell.get('value', 0)
+        return [
+            (self._by_subsystem, subsystem),
+            (self._by_property, prop),
+            (self._by_level_value, (level, value)),
+            (self._by_property_level_value, (prop, level, value))
+        ]
+
+    def _index(self, device, key, cell):
+        entry = (device, key)
+        self._by_device[device].add(entry)
+        for index, index_key in self._index_keys(key, cell):
+            index[index_key].add(entry)
+
+    def _unindex(self, device, key, cell):
+        entry = (device, key)
+        self._by_device[device].discard(entry)
+        for index, index_key in self._index_keys(key, cell):
+            entries = index.get(index_key)
+            if entries is not None:
+                entries.discard(entry)
+                if not entries:
+                    del index[index_key]
+
+    def add_device(self, device, data):
+        """Add or replace a device's cube data and index every coordinate cell"""
+        if device in self.devices:
+            self.remove_device(device)
+        self.devices[device] = data
+        for key, cell in data.items():
+            if isinstance(cell, dict) and parse_coordinate(key) is not None:
+                self._index(device, key, cell)
+
+    def remove_device(self, device):
+        data = self.devices.pop(device)
+        for key, cell in data.items():
+            if isinstance(cell, dict) and parse_coordinate(key) is not None:
+                self._unindex(device, key, cell)
+        self._by_device.pop(device, None)
+
+    def get(self, device, key):
+        return self.devices[device].get(key)
+
+    def update_cell(self, device, key, **fields):
+        """Change fields of one cell and move it between index entries"""
+        data = self.devices[device]
+        cell = data.get(key)
+        if cell is None:
+            cell = data[key] = {}
+        else:
+            self._unindex(device, key, cell)
+        cell.update(fields)
+        self._index(device, key, cell)
+
+    def query(self, device=None, subsystem=None, property=None, level=None,
+              min_level=None, value=None):
+        """Return sorted (device, key) pairs of cells matching every given filter
+
+        level takes one level name; min_level selects that level and above.
+        Requires value with either level filter.
+        """
+        levels = None
+        if level is not None:
+            levels = [level]
+        elif min_level is not None:
+            levels = LEVELS[LEVELS.index(min_level):]
+
+        candidates = []
+        if levels is not None:
+            if value is None:
+                raise ValueError('Level queries need a value, e.g. value=1 for active cells')
+            if property is not None:
+                sets = [self._by_property_level_value.get((property, lvl, value), set()) for lvl in levels]
+                property = None
+            else:
+                sets = [self._by_level_value.get((lvl, value), set()) for lvl in levels]
+            candidates.append(set().union(*sets))
+        if property is not None:
+            candidates.append(self._by_property.get(property, set()))
+        if subsystem is not None:
+            candidates.append(self._by_subsystem.get(subsystem, set()))
+        if device is not None:
+            candidates.append(self._by_device.get(device, set()))
+        if not candidates:
+            candidates.append(set().union(*self._by_device.values()))
+
+        # Walk the smallest candidate set and check membership in the others
+        candidates.sort(key=len)
+        smallest, others = candidates[0], candidates[1:]
+        matches = [entry for entry in smallest if all(entry in other for other in others)]
+        if value is not None and levels is None:
+            matches = [entry for entry in matches
+                       if self.devices[entry[0]][entry[1]].get('value', 0) == value]
+        return sorted(matches)
+
+    def highest_level(self, device, property):
+        """Highest level among a device's active cells for a property, or None"""
+        device_cells = self._by_device.get(device, set())
+        for level in reversed(LEVELS):
+            if self._by_property_level_value.get((property, level, 1), set()) & device_cells:
+                return level
+        return None
+
+    def save_device(self, device, path):
+        write_json_atomic(path, self.devices[device])
+
+def main():
+    """Load device files and list active cells at or above a level for a property"""
+    if len(sys.argv) < 3:
+        print("Usage: cube_store.py <property> <min level> [cube files or globs...]")
+        sys.exit(1)
+
+    prop, min_level = sys.argv[1], sys.argv[2]
+    patterns = sys.argv[3:] or ['*VentilatorData.json']
+    paths = sorted({path for pattern in patterns for path in glob.glob(pattern) if os.path.isfile(path)})
+
+    store = CubeStore.from_files(paths)
+    matches = store.query(property=prop, min_level=min_level, value=1)
+    print(f"{len(matches)} active {prop} cells at {min_level} or above across {len(store.devices)} devices")
+    for device, key in matches:
+        print(f"  {device}: {key} ({cell_labels(key, store.get(device, key))[2]})")
+
+if __name__ == "__main__":
+    main()
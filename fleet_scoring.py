@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Vectorized fleet-wide security scoring. Stacks any number of device cubes
+into one (devices, x, y, z) array and computes per-characteristic and
+per-subsystem scores, coverage percentages and rankings in one pass,
+using the same level scale as /api/security-comparison and
+/api/energy-comparison.
+"""
+
+import os
+import sys
+import glob
+import json
+import argparse
+import numpy as np
+from cube_model import CubeModel
+from update_realistic_security import LEVEL_TO_Z, SECURITY_COORDS
+
+# Subsystems along the y axis and their properties along x (see RubiksCube.js)
+SUBSYSTEMS = {
+    -2: 'Energy',
+    -1: 'Control',
+    0: 'Monitoring',
+    1: 'Security and Human Trust',
+    2: 'Maintenance'
+}
+
+SUBSYSTEM_PROPERTIES = {
+    'Energy': ['Power Efficiency', 'Energy Storage', 'Power Stability', 'Backup Systems', 'Grid Integration'],
+    'Control': ['Response Time', 'Accuracy', 'Redundancy', 'Error Handling', 'Calibration'],
+    'Monitoring': ['Data Collection', 'Real-time Analysis', 'Alert Systems', 'Data Storage', 'Remote Access'],
+    'Security and Human Trust': list(SECURITY_COORDS),
+    'Maintenance': ['Predictive Maintenance', 'Self-diagnostics', 'Component Lifecycle',
+                    'Service Scheduling', 'Spare Parts']
+}
+
+# Every axis spans -2..2 in the cube files
+AXIS_MIN = min(SUBSYSTEMS)
+AXIS_SIZE = len(SUBSYSTEMS)
+
+# Level ranks 1 (Very Low) to 5 (Very High) by z coordinate; percentages are rank * 20
+Z_TO_RANK = {z: rank for rank, z in enumerate(sorted(LEVEL_TO_Z.values()), 1)}
+MAX_RANK = len(Z_TO_RANK)
+
+def device_id(path):
+    """'philipsVentilatorData.json' -> 'philips'"""
+    name = os.path.splitext(os.path.basename(path))[0]
+    return name[:-len('VentilatorData')] if name.endswith('VentilatorData') else name
+
+def load_cube(path):
+    if path.endswith('.npy'):
+        return CubeModel.load_npy(path)
+    return CubeModel.load_json(path)
+
+def stack_cubes(cubes):
+    """Stack cube values into (devices, x, y, z) over the x/y/z range -2..2
+
+    Cells outside the scoring range are ignored; missing cells count as 0.
+    """
+    low = AXIS_MIN
+    size = AXIS_SIZE
+    fleet = np.zeros((len(cubes), size, size, size), dtype=np.int8)
+    for device, cube in enumerate(cubes):
+        # Overlap of this cube's box with the scoring box, per axis
+        source = []
+        target = []
+        for axis, origin in enumerate(cube.origin):
+            start = max(origin, low)
+            stop = min(origin + cube.shape[axis], low + size)
+            if start >= stop:
+                break
+            source.append(slice(start - origin, stop - origin))
+            target.append(slice(start - low, stop - low))
+        else:
+            fleet[(device, *target)] = cube.values[tuple(source)]
+    return fleet
+
+def score_fleet(fleet):
+    """Score a stacked fleet; every result is an array with devices first"""
+    low = AXIS_MIN
+    active = fleet > 0
+
+    # Highest active level rank per (device, property x, subsystem y); 0 when unassessed
+    ranks = np.array([Z_TO_RANK[z] for z in range(low, low + AXIS_SIZE)], dtype=np.uint8)
+    level_rank = np.where(active, ranks, 0).max(axis=3)
+
+    assessed = level_rank > 0
+    subsystem_scores = level_rank.mean(axis=1) * (100 / MAX_RANK)
+    coverage = assessed.mean(axis=1) * 100
+
+    security_x = [int(coord.split(',')[0]) - low for coord in SECURITY_COORDS.values()]
+    security_y = int(next(iter(SECURITY_COORDS.values())).split(',')[1]) - low
+    characteristic_scores = level_rank[:, security_x, security_y].astype(np.float64) * (100 / MAX_RANK)
+
+    overall = characteristic_scores.mean(axis=1)
+    order = np.argsort(-overall, kind='stable')
+    rank = np.empty(len(overall), dtype=np.int64)
+    rank[order] = np.arange(1, len(overall) + 1)
+
+    return {
+        'level_rank': level_rank,
+        'characteristic_scores': characteristic_scores,
+        'subsystem_scores': subsystem_scores,
+        'coverage': coverage,
+        'overall_coverage': assessed.mean(axis=(1, 2)) * 100,
+        'overall_score': overall,
+        'rank': rank,
+        'ranking': order
+    }
+
+def fleet_report(device_ids, scores):
+    """JSON-friendly per-device report, best overall score first"""
+    characteristics = list(SECURITY_COORDS)
+    subsystems = [SUBSYSTEMS[y] for y in range(AXIS_MIN, AXIS_MIN + AXIS_SIZE)]
+    devices = []
+    for device in scores['ranking']:
+        devices.append({
+            'device': device_ids[device],
+            'rank': int(scores['rank'][device]),
+            'overall_score': round(float(scores['overall_score'][device]), 2),
+            'overall_coverage': round(float(scores['overall_coverage'][device]), 2),
+            'characteristics': {
+                char: round(float(score), 2)
+                for char, score in zip(characteristics, scores['characteristic_scores'][device])
+            },
+            'subsystems': {
+                name: {
+                    'score': round(float(scores['subsystem_scores'][device][i]), 2),
+                    'coverage': round(float(scores['coverage'][device][i]), 2)
+                }
+                for i, name in enumerate(subsystems)
+            }
+        })
+    return {
+        'devices': devices,
+        'fleet': {
+            'device_count': len(device_ids),
+            'characteristic_means': {
+                char: round(float(score), 2)
+                for char, score in zip(characteristics, scores['characteristic_scores'].mean(axis=0))
+            } if device_ids else {}
+        }
+    }
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Score a fleet of ventilator cubes')
+    arg_parser.add_argument('inputs', nargs='*', default=['*VentilatorData.json'],
+                            help='Cube JSON/.npy files or glob patterns')
+    arg_parser.add_argument('--output', help='Write the full report as JSON to this file')
+    args = arg_parser.parse_args()
+
+    paths = sorted({path for pattern in args.inputs for path in glob.glob(pattern)})
+    if not paths:
+        print("No cube files found")
+        sys.exit(1)
+
+    device_ids = [device_id(path) for path in paths]
+    scores = score_fleet(stack_cubes([load_cube(path) for path in paths]))
+    report = fleet_report(device_ids, scores)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    print(f"Scored {len(paths)} devices")
+    for device in report['devices'][:20]:
+        scores_text = ', '.join(f"{char}: {score:.0f}" for char, score in device['characteristics'].items())
+        print(f"  #{device['rank']} {device['device']}: {device['overall_score']:.1f} ({scores_text})")
+
+if __name__ == "__main__":
+    main()
@@ -10,7 +10,15 @@ from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, Table, TableStyle
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from concurrent.futures import ProcessPoolExecutor
 import os
+import sys
+import json
+import time
+import random
+import argparse
 
 def create_synthetic_ventilator_pdf():
     """Create a synthetic ventilator technical specification PDF"""
@@ -312,5 +320,270 @@ def create_synthetic_ventilator_pdf():
     doc.build(elements)
     print(f"PDF created successfully at: {pdf_path}")
 
+# Requirement building blocks for the synthetic corpus; every phrase carries
+# keywords the parser classifies on
+CORPUS_CHARACTERISTICS = {
+    'Confidentiality': ('CONF', [
+        'AES-256 encryption for patient records', 'access control for clinical data',
+        'privacy protection for exported reports', 'data protection for service logs',
+        'secure key storage for encryption keys', 'confidential handling of ventilation history'
+    ]),
+    'Integrity': ('INTG', [
+        'checksum validation for therapy settings', 'firmware signature verification',
+        'tamper detection on sensor inputs', 'calibration accuracy checks',
+        'integrity verification of alarm limits', 'corruption detection for trend data'
+    ]),
+    'Availability': ('AVAIL', [
+        'redundancy for blower control', 'automatic failover of the main processor',
+        'battery backup for power loss', 'fault tolerance for flow sensors',
+        'continuous availability of emergency ventilation', 'reliability monitoring of valves'
+    ]),
+    'Human/Trust': ('TRUST', [
+        'alarm prioritisation on the user interface', 'usability testing of the touchscreen workflow',
+        'intuitive guided workflow for setup', 'human factors review of alarm tones',
+        'trust indicators for measurement confidence', 'ergonomic layout of operator controls'
+    ]),
+    'Authentication': ('AUTH', [
+        'multi-factor authentication for clinicians', 'password policy for service login',
+        'biometric identity checks for overrides', 'credential rotation for remote access',
+        'authorization checks for parameter changes', 'login lockout after failed attempts'
+    ])
+}
+
+CORPUS_MEASURES = {
+    'technology': ['Implement', 'Deploy', 'Configure', 'Install', 'Use'],
+    'policy': ['Define a policy for', 'Document a procedure for', 'Publish a guideline for',
+               'Enforce a compliance standard for'],
+    'training': ['Train operators on', 'Educate clinicians on', 'Require certification for']
+}
+
+CORPUS_STATES = {
+    'processing': ['during real-time processing', 'when the controller computes settings'],
+    'storage': ['for data stored in the device database', 'for records saved to memory'],
+    'transmission': ['when data is sent over the network', 'for every transfer to the EMR']
+}
+
+CORPUS_FILLER = [
+    "The ventilator operates in invasive and non-invasive modes for adult and pediatric patients.",
+    "Each subsystem reports its status to the central controller at a fixed interval.",
+    "Clinical staff interact with the device through a touchscreen and a rotary encoder.",
+    "Service engineers access diagnostic functions through a dedicated maintenance port.",
+    "The device integrates with hospital information systems through a gateway module.",
+    "Sensor readings are filtered and averaged before they are displayed to the operator.",
+    "The enclosure is rated for cleaning with standard hospital disinfectants.",
+    "Design verification follows the manufacturer's quality management system."
+]
+
+CORPUS_STANDARDS = ['HIPAA', 'GDPR', 'FDA 21 CFR Part 11', 'IEC 60601-1', 'IEC 62366',
+                    'IEC 62443', 'ISO 27001', 'NIST SP 800-53', 'IEC 80001-1']
+
+# Bullet styles; only the dot is recognised by the parser's bullet pattern
+BULLET_STYLES = {
+    'dot': '\u2022 ',
+    'dash': '- ',
+    'number': None,
+    'none': ''
+}
+
+CORPUS_DEFAULTS = {
+    'pages': (4, 12),
+    'density': 6,
+    'gap_ratio': 0.2,
+    'bullet_styles': ['dot'],
+    'table_rows': 4,
+    'filler_paragraphs': 2
+}
+
+# Vera ships with reportlab and, unlike the built-in Helvetica, extracts bullets as text
+CORPUS_FONT = 'Vera'
+
+def _corpus_styles():
+    if CORPUS_FONT not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont(CORPUS_FONT, 'Vera.ttf'))
+    styles = getSampleStyleSheet()
+    return {
+        'title': ParagraphStyle('CorpusTitle', parent=styles['Heading1'], fontName=CORPUS_FONT,
+                                fontSize=22, alignment=TA_CENTER, spaceAfter=24),
+        'heading': ParagraphStyle('CorpusHeading', parent=styles['Heading2'], fontName=CORPUS_FONT,
+                                  fontSize=15, textColor=colors.HexColor('#2c5282'), spaceAfter=10),
+        'normal': ParagraphStyle('CorpusNormal', parent=styles['Normal'], fontName=CORPUS_FONT,
+                                 fontSize=10, alignment=TA_JUSTIFY, spaceAfter=8)
+    }
+
+def _requirement_text(rng, characteristic, max_length=72):
+    """Random requirement sentence for a characteristic, short enough for one line"""
+    _, objects = CORPUS_CHARACTERISTICS[characteristic]
+    measure = rng.choice(list(CORPUS_MEASURES))
+    state = rng.choice(list(CORPUS_STATES))
+    text = f"{rng.choice(CORPUS_MEASURES[measure])} {rng.choice(objects)}"
+    qualified = f"{text} {rng.choice(CORPUS_STATES[state])}"
+    return qualified if len(qualified) <= max_length else text
+
+def _sample_range(rng, value):
+    if isinstance(value, (tuple, list)):
+        return rng.randint(value[0], value[1])
+    return value
+
+def generate_spec_document(pdf_path, seed, params=None):
+    """Write one seeded synthetic specification PDF; returns its manifest entry"""
+    params = dict(CORPUS_DEFAULTS, **(params or {}))
+    rng = random.Random(seed)
+    styles = _corpus_styles()
+    characteristics = list(CORPUS_CHARACTERISTICS)
+
+    model = f"SVM-{rng.randint(100, 999)}{rng.choice('ABCDEFGHJKX')}"
+    pages = _sample_range(rng, params['pages'])
+    counters = {char: 0 for char in characteristics}
+    gap_rows = []
+    req_count = 0
+
+    elements = [
+        Paragraph(f"SYNTHETIC VENTILATOR {model}", styles['title']),
+        Paragraph("Technical Specification Document (generated)", styles['normal'])
+    ]
+
+    for page in range(1, pages + 1):
+        characteristic = characteristics[(page - 1) % len(characteristics)]
+        prefix, _ = CORPUS_CHARACTERISTICS[characteristic]
+        elements.append(Paragraph(f"{page}. {characteristic.upper()}", styles['heading']))
+        for _ in range(params['filler_paragraphs']):
+            elements.append(Paragraph(' '.join(rng.sample(CORPUS_FILLER, 3)), styles['normal']))
+
+        entries = max(0, _sample_range(rng, params['density']) + rng.randint(-2, 2))
+        for number in range(1, entries + 1):
+            if rng.random() < params['gap_ratio']:
+                gap_char = rng.choice(characteristics)
+                gap_rows.append(f"GAP-{len(gap_rows) + 1:03d} {gap_char}: "
+                                f"{_requirement_text(rng, gap_char, 60)} is not addressed")
+                continue
+
+            style = rng.choice(params['bullet_styles'])
+            marker = BULLET_STYLES[style]
+            if marker is None:
+                marker = f"{number}. "
+            if rng.random() < 0.75:
+                counters[characteristic] += 1
+                line = f"REQ-{prefix}-{counters[characteristic]:03d}: {_requirement_text(rng, characteristic)}"
+            else:
+                line = f"The device shall {_requirement_text(rng, characteristic, 60).lower()}"
+            req_count += 1
+            elements.append(Paragraph(f"{marker}{line}", styles['normal']))
+
+        if params['table_rows']:
+            rows = [['Characteristic', 'Implementation', 'Compliance']]
+            for _ in range(params['table_rows']):
+                row_char = rng.choice(characteristics)
+                rows.append([row_char, rng.choice(CORPUS_CHARACTERISTICS[row_char][1])[:34],
+                             rng.choice(CORPUS_STANDARDS)])
+            table = Table(rows, colWidths=[1.6 * inch, 3.2 * inch, 1.7 * inch])
+            table.setStyle(TableStyle([
+                ('FONTNAME', (0, 0), (-1, -1), CORPUS_FONT),
+                ('FONTSIZE', (0, 0), (-1, -1), 9),
+                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4299e1')),
+                ('GRID', (0, 0), (-1, -1), 0.5, colors.black)
+            ]))
+            elements.append(table)
+        elements.append(PageBreak())
+
+    # Gaps are listed one per line so each GAP ID shares a line with its characteristic
+    if gap_rows:
+        elements.append(Paragraph("IDENTIFIED SECURITY GAPS", styles['heading']))
+        for row in gap_rows:
+            elements.append(Paragraph(row, styles['normal']))
+
+    doc = SimpleDocTemplate(pdf_path, pagesize=letter, rightMargin=72, leftMargin=72,
+                            topMargin=72, bottomMargin=36, title=f"Synthetic Ventilator {model}",
+                            invariant=1)
+    doc.build(elements)
+
+    return {
+        'document': os.path.basename(pdf_path),
+        'seed': seed,
+        'model': model,
+        'sections': pages,
+        'requirements': req_count,
+        'gaps': len(gap_rows),
+        'bytes': os.path.getsize(pdf_path)
+    }
+
+def _generate_corpus_document(job):
+    pdf_path, seed, params = job
+    return generate_spec_document(pdf_path, seed, params)
+
+def generate_corpus(output_dir, count, seed=0, workers=None, params=None):
+    """Generate count seeded specification PDFs across a process pool
+
+    Document i always gets the same content for a given seed and params,
+    whatever the worker count.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = [(os.path.join(output_dir, f"synthetic_spec_{index:05d}.pdf"),
+             seed * 1000003 + index, params)
+            for index in range(count)]
+
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        documents = list(pool.map(_generate_corpus_document, jobs,
+                                  chunksize=max(1, count // (workers * 4))))
+    elapsed = time.perf_counter() - start
+
+    manifest = {
+        'seed': seed,
+        'params': dict(CORPUS_DEFAULTS, **(params or {})),
+        'documents': documents
+    }
+    with open(os.path.join(output_dir, 'corpus_manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    print(f"Generated {count} specifications in {output_dir} with {workers} workers "
+          f"({elapsed:.2f}s, {count / elapsed if elapsed else 0:.1f} documents/second)")
+    return manifest
+
+def _parse_range(text):
+    """'4-12' -> (4, 12); '8' -> 8"""
+    if '-' in text:
+        low, high = text.split('-', 1)
+        return (int(low), int(high))
+    return int(text)
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Generate synthetic ventilator specification PDFs')
+    arg_parser.add_argument('--corpus', metavar='DIR',
+                            help='Generate a seeded corpus into DIR instead of the SVM-1X spec')
+    arg_parser.add_argument('--count', type=int, default=100, help='Number of corpus documents')
+    arg_parser.add_argument('--seed', type=int, default=0, help='Corpus seed')
+    arg_parser.add_argument('--workers', type=int, default=None,
+                            help='Worker processes (defaults to CPU count)')
+    arg_parser.add_argument('--pages', type=_parse_range, default=CORPUS_DEFAULTS['pages'],
+                            help='Sections per document, each starting a new page (N or MIN-MAX)')
+    arg_parser.add_argument('--density', type=_parse_range, default=CORPUS_DEFAULTS['density'],
+                            help='Requirement and gap entries per section (N or MIN-MAX)')
+    arg_parser.add_argument('--gap-ratio', type=float, default=CORPUS_DEFAULTS['gap_ratio'],
+                            help='Fraction of entries that become GAP rows instead of requirements')
+    arg_parser.add_argument('--bullets', default=','.join(CORPUS_DEFAULTS['bullet_styles']),
+                            help=f"Comma-separated bullet styles from {', '.join(BULLET_STYLES)}")
+    arg_parser.add_argument('--table-rows', type=int, default=CORPUS_DEFAULTS['table_rows'],
+                            help='Rows in the per-section compliance table (0 disables tables)')
+    args = arg_parser.parse_args()
+
+    if not args.corpus:
+        create_synthetic_ventilator_pdf()
+        return
+
+    bullet_styles = [style.strip() for style in args.bullets.split(',') if style.strip()]
+    unknown = [style for style in bullet_styles if style not in BULLET_STYLES]
+    if unknown or not bullet_styles:
+        print(f"Unknown bullet styles: {', '.join(unknown) or '(none given)'}")
+        sys.exit(1)
+
+    generate_corpus(args.corpus, args.count, args.seed, args.workers, {
+        'pages': args.pages,
+        'density': args.density,
+        'gap_ratio': args.gap_ratio,
+        'bullet_styles': bullet_styles,
+        'table_rows': args.table_rows
+    })
+
 if __name__ == "__main__":
-    create_synthetic_ventilator_pdf()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Incremental re-parsing of revised specification PDFs. A per-page
+fingerprint index stored next to the parsed output lets a re-parse skip
+text extraction for unchanged pages and reuse the matches of unchanged
+text, then reports which requirements were added, removed or changed.
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+import PyPDF2
+from PyPDF2.generic import ArrayObject, DictionaryObject, IndirectObject, StreamObject
+from parse_ventilator_spec import PARSER_VERSION
+from parse_cache import parser_fingerprint
+
+INDEX_VERSION = 2
+
+def index_path_for(json_path):
+    """Location of the page index stored next to a parsed output file"""
+    base, _ = os.path.splitext(json_path)
+    return f'{base}.pages.json'
+
+def _object_digest(obj, memo):
+    """Hash of a PDF object with every reference resolved and every stream's data included
+    
+    Indirect objects are hashed once per memo, so resources shared by many
+    pages (fonts, ToUnicode CMaps, form XObjects) cost one pass per document.
+    """
+    if isinstance(obj, IndirectObject):
+        key = (obj.idnum, obj.generation)
+        if key not in memo:
+            # A reference back to an object still being hashed
+            memo[key] = f'cycle:{key}'
+            memo[key] = _object_digest(obj.get_object(), memo)
+        return memo[key]
+    digest = hashlib.sha256()
+    if isinstance(obj, DictionaryObject):
+        digest.update(b'<<')
+        for name in sorted(obj):
+            # The page tree is not part of a resource
+            if name == '/Parent':
+                continue
+            digest.update(f'{name}={_object_digest(obj.raw_get(name), memo)};'.encode('utf-8'))
+        digest.update(b'>>')
+        if isinstance(obj, StreamObject):
+            digest.update(obj.get_data())
+    elif isinstance(obj, ArrayObject):
+        digest.update(b'[')
+        for item in obj:
+            digest.update(f'{_object_digest(item, memo)};'.encode('utf-8'))
+        digest.update(b']')
+    else:
+        digest.update(f'{type(obj).__name__}:{obj!r}'.encode('utf-8'))
+    return digest.hexdigest()
+
+def page_fingerprint(page, memo=None):
+    """Hash of a page's content stream and resolved resources, computed without text extraction
+    
+    Resources include form XObjects and each font's encoding and ToUnicode
+    CMap, all of which change the extracted text. Pass one memo dict for
+    every page of a document so shared resources are hashed once.
+    """
+    memo = {} if memo is None else memo
+    digest = hashlib.sha256()
+    contents = page.get_contents()
+    if contents is not None:
+        digest.update(contents.get_data())
+    resources = page.raw_get('/Resources') if '/Resources' in page else None
+    if resources is not None:
+        digest.update(_object_digest(resources, memo).encode('utf-8'))
+    return digest.hexdigest()
+
+def _chunk_key(chunk, page_starts):
+    offsets = ','.join(str(offset) for offset, _ in page_starts)
+    return hashlib.sha256(f'{offsets}|{chunk}'.encode('utf-8')).hexdigest()
+
+def load_index(index_path):
+    """Load a page index, or None if it is missing, unreadable or outdated"""
+    try:
+        with open(index_path, 'r') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if index.get('index_version') != INDEX_VERSION:
+        return None
+    return index
+
+def save_index(index, index_path):
+    """Write the page index atomically"""
+    directory = os.path.dirname(os.path.abspath(index_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(index, f, separators=(',', ':'))
+        os.replace(tmp_path, index_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def diff_requirements(previous, current):
+    """Compare two parse results requirement by requirement
+
+    Requirements are identified by characteristic and text. One whose info
+    state or measure type differs is reported as changed; one found on
+    another page, as happens to every later requirement when a page is
+    inserted, is reported as moved instead, with its old and new page.
+    """
+    def by_key(results):
+        entries = {}
+        if results:
+            for char, data in results['characteristics'].items():
+                for req in data['requirements']:
+                    entries.setdefault((char, req['requirement']), []).append(req)
+        return entries
+
+    def attributes(req):
+        return {
+            'info_state': req['info_state'],
+            'measure_type': req['measure_type']
+        }
+
+    before = by_key(previous)
+    after = by_key(current)
+    changes = {'added': [], 'removed': [], 'changed': [], 'moved': []}
+
+    for key in list(before) + [key for key in after if key not in before]:
+        old_reqs = before.get(key, [])
+        new_reqs = after.get(key, [])
+        for old, new in zip(old_reqs, new_reqs):
+            if attributes(old) != attributes(new):
+                changes['changed'].append({
+                    'characteristic': key[0],
+                    'requirement': key[1],
+                    'before': attributes(old),
+                    'after': attributes(new)
+                })
+            if old.get('page') != new.get('page'):
+                changes['moved'].append({
+                    'characteristic': key[0],
+                    'requirement': key[1],
+                    'before': old.get('page'),
+                    'after': new.get('page')
+                })
+        changes['added'].extend(new_reqs[len(old_reqs):])
+        changes['removed'].extend(old_reqs[len(new_reqs):])
+
+    return changes
+
+def incremental_parse(parser, pdf_path, index_path, previous_results=None):
+    """Re-parse a document, extracting and re-matching only changed pages
+
+    Returns (results, report); results matches parse_specification output.
+    The report lists requirement changes only when previous_results, an
+    earlier parse of the same document, is given.
+    """
+    index = load_index(index_path) or {}
+    fingerprint = parser_fingerprint(parser, PARSER_VERSION)
+
+    # Page text is reusable whenever the page content is; chunk matches only
+    # while the keyword configuration is unchanged
+    known_pages = {entry['fingerprint']: entry['text'] for entry in index.get('pages', [])}
+    known_chunks = index.get('chunks', {}) if index.get('parser_fingerprint') == fingerprint else {}
+
+    pages = []
+    reextracted = []
+
+    def iter_pages():
+        with open(pdf_path, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            memo = {}
+            for page_number, page in enumerate(pdf_reader.pages, 1):
+                page_hash = page_fingerprint(page, memo)
+                text = known_pages.get(page_hash)
+                if text is None:
+                    text = page.extract_text() or ''
+                    reextracted.append(page_number)
+                pages.append({'page': page_number, 'fingerprint': page_hash, 'text': text})
+                yield page_number, text
+
+    req_matches, bullet_matches, gap_matches = [], [], []
+    chunks = {}
+    rematched = 0
+    try:
+        for chunk, page_starts in parser.iter_text_chunks(iter_pages()):
+            # Matches are stored against page positions within the chunk so
+            # they stay valid when pages are inserted or removed before it
+            key = _chunk_key(chunk, page_starts)
+            matches = known_chunks.get(key) or chunks.get(key)
+            if matches is None:
+                rematched += 1
+                local_starts = [(offset, position) for position, (offset, _) in enumerate(page_starts)]
+                chunk_reqs, chunk_bullets, chunk_gaps = parser.scan_text(chunk, local_starts)
+                matches = {'requirements': chunk_reqs, 'bullets': chunk_bullets, 'gaps': chunk_gaps}
+            chunks[key] = matches
+
+            page_numbers = [page for _, page in page_starts]
+            req_matches.extend((text, page_numbers[position])
+                               for text, position in matches['requirements'])
+            bullet_matches.extend((text, page_numbers[position])
+                                  for text, position in matches['bullets'])
+            gap_matches.extend((text, page_numbers[position], chars)
+                               for text, position, chars in matches['gaps'])
+    except Exception as e:
+        print(f"Error reading PDF: {e}")
+        return None, None
+    if not chunks:
+        return None, None
+
+    extracted = parser.build_requirements(req_matches + bullet_matches, gap_matches)
+    results = parser.assemble_results(pdf_path, extracted)
+
+    save_index({
+        'index_version': INDEX_VERSION,
+        'parser_fingerprint': fingerprint,
+        'document': results['metadata']['document'],
+        'pages': pages,
+        'chunks': chunks
+    }, index_path)
+
+    report = {
+        'pages_total': len(pages),
+        'pages_reextracted': reextracted,
+        'chunks_total': len(chunks),
+        'chunks_rematched': rematched
+    }
+    if previous_results is not None:
+        report.update(diff_requirements(previous_results, results))
+    return results, report
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Prioritised ingestion queue for specification parsing. Jobs wait in a
+bounded priority queue and are dispatched to a process pool no faster than
+it has free workers, so an interactive parse submitted behind a large bulk
+backlog starts on the next free worker. One worker is kept back for
+interactive jobs, and the depth bound applies to interactive and other jobs
+separately so a full bulk backlog never rejects an interactive request.
+Jobs report page progress and can be cancelled while queued or running.
+Finished jobs keep their result, however often it is retrieved, until
+max_finished later jobs have finished and pushed them out.
+"""
+
+import time
+import uuid
+import heapq
+import asyncio
+import multiprocessing
+from collections import deque
+
+# Lower values are dispatched first
+PRIORITIES = {
+    'interactive': 0,
+    'normal': 1,
+    'bulk': 2
+}
+
+DEFAULT_MAX_DEPTH = 1000
+DEFAULT_MAX_FINISHED = 1000
+
+class QueueFull(Exception):
+    pass
+
+class JobCancelled(BaseException):
+    """Raised inside a worker to abandon a cancelled job
+
+    A BaseException, like asyncio.CancelledError, so the parser's
+    error handling cannot mistake it for a bad PDF or cache a partial result.
+    """
+
+def tracked_pages(pages, job_id, progress, cancelled, total=None):
+    """Pass a page stream through, publishing progress and stopping on cancellation"""
+    done = 0
+    progress[job_id] = (done, total)
+    for page in pages:
+        if job_id in cancelled:
+            raise JobCancelled(job_id)
+        yield page
+        done += 1
+        progress[job_id] = (done, total)
+
+class IngestJob:
+    def __init__(self, pdf_path, priority):
+        self.id = uuid.uuid4().hex
+        self.pdf_path = pdf_path
+        self.priority = priority
+        self.state = 'queued'
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.result = None
+        self.error = None
+        # Last (pages done, pages total) seen while the job ran
+        self.final_progress = None
+        self.done = asyncio.Event()
+
+    def status(self, progress=None):
+        pages_done, pages_total = progress or (0, None)
+        return {
+            'job_id': self.id,
+            'pdf_path': self.pdf_path,
+            'priority': self.priority,
+            'state': self.state,
+            'pages_done': pages_done,
+            'pages_total': pages_total,
+            'submitted': self.submitted,
+            'started': self.started,
+            'finished': self.finished,
+            'error': self.error
+        }
+
+class IngestQueue:
+    def __init__(self, pool, workers, job_function, max_depth=DEFAULT_MAX_DEPTH,
+                 reserved_interactive=1, max_finished=DEFAULT_MAX_FINISHED):
+        """Queue jobs for a process pool of the given size
+
+        job_function(pdf_path, job_id, progress, cancelled) runs in the pool
+        and returns the job result, or None if the document failed to parse.
+        """
+        self.pool = pool
+        self.workers = workers
+        self.job_function = job_function
+        self.max_depth = max_depth
+        # Workers non-interactive jobs may not occupy (never all of them)
+        self.reserved_interactive = min(reserved_interactive, workers - 1)
+        self.max_finished = max_finished
+
+        # Shared with the pool workers for progress reports and cancellation
+        self._manager = multiprocessing.Manager()
+        self.progress = self._manager.dict()
+        self.cancelled = self._manager.dict()
+
+        self.jobs = {}
+        self._heap = []
+        self._sequence = 0
+        # Queued jobs per depth class: interactive, and everything else
+        self._queued = {True: 0, False: 0}
+        self._running = 0
+        self._finished = deque()
+        self._wakeup = asyncio.Event()
+        self._space = asyncio.Condition()
+        self._dispatcher = None
+        self._tasks = set()
+
+    def start(self):
+        self._dispatcher = asyncio.get_running_loop().create_task(self._dispatch())
+
+    async def stop(self):
+        """Stop dispatching and cancel running jobs; queued jobs are dropped"""
+        if self._dispatcher:
+            self._dispatcher.cancel()
+        for job_id, job in self.jobs.items():
+            if job.state == 'running':
+                self.cancelled[job_id] = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def close(self):
+        """Shut down the shared state; call once the pool has stopped"""
+        self._manager.shutdown()
+
+    @property
+    def depth(self):
+        return sum(self._queued.values())
+
+    def submit(self, pdf_path, priority='normal'):
+        """Queue a job, raising QueueFull when the queue is at its maximum depth"""
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority {priority!r} (choose from {', '.join(PRIORITIES)})")
+        interactive = priority == 'interactive'
+        if self._queued[interactive] >= self.max_depth:
+            raise QueueFull(f'Queue is full ({self.max_depth} {priority} jobs waiting)')
+        job = IngestJob(pdf_path, priority)
+        self.jobs[job.id] = job
+        heapq.heappush(self._heap, (PRIORITIES[priority], self._sequence, job.id))
+        self._sequence += 1
+        self._queued[interactive] += 1
+        self._wakeup.set()
+        return job
+
+    async def submit_wait(self, pdf_path, priority='normal'):
+        """Queue a job, waiting for space instead of failing when the queue is full"""
+        async with self._space:
+            interactive = priority == 'interactive'
+            await self._space.wait_for(lambda: self._queued[interactive] < self.max_depth)
+            return self.submit(pdf_path, priority)
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def status(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        if job.state == 'running':
+            return job.status(self.progress.get(job_id))
+        return job.status(job.final_progress)
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job; returns False if it already finished"""
+        job = self.jobs.get(job_id)
+        if job is None or job.state not in ('queued', 'running'):
+            return False
+        if job.state == 'queued':
+            # Left in the heap and skipped by the dispatcher
+            self._queued[job.priority == 'interactive'] -= 1
+            self._finish(job, 'cancelled')
+            self._notify_space()
+        else:
+            self.cancelled[job_id] = True
+        return True
+
+    def stats(self):
+        states = {}
+        for job in self.jobs.values():
+            states[job.state] = states.get(job.state, 0) + 1
+        return {
+            'depth': self.depth,
+            'max_depth': self.max_depth,
+            'running': self._running,
+            'workers': self.workers,
+            'jobs': states
+        }
+
+    def _can_start(self, priority):
+        if priority == 'interactive':
+            return self._running < self.workers
+        return self._running < self.workers - self.reserved_interactive
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self._heap:
+                _, _, job_id = self._heap[0]
+                job = self.jobs.get(job_id)
+                if job is None or job.state != 'queued':
+                    heapq.heappop(self._heap)
+                    continue
+                # The heap top is the most urgent job; if it cannot start, none can
+                if not self._can_start(job.priority):
+                    break
+                heapq.heappop(self._heap)
+                self._queued[job.priority == 'interactive'] -= 1
+                self._running += 1
+                job.state = 'running'
+                job.started = time.time()
+                task = loop.create_task(self._execute(job))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+                self._notify_space()
+
+    async def _execute(self, job):
+        loop = asyncio.get_running_loop()
+        try:
+            result = await loop.run_in_executor(self.pool, self.job_function, job.pdf_path,
+                                                job.id, self.progress, self.cancelled)
+            if job.id in self.cancelled:
+                self._finish(job, 'cancelled')
+            elif result is None:
+                self._finish(job, 'failed', error=f'Failed to parse {job.pdf_path}')
+            else:
+                self._finish(job, 'done', result)
+        except JobCancelled:
+            self._finish(job, 'cancelled')
+        except Exception as e:
+            self._finish(job, 'failed', error=str(e))
+        finally:
+            self._running -= 1
+            self.progress.pop(job.id, None)
+            self.cancelled.pop(job.id, None)
+            self._wakeup.set()
+
+    def _finish(self, job, state, result=None, error=None):
+        if job.state == 'running':
+            job.final_progress = self.progress.get(job.id)
+        job.state = state
+        job.result = result
+        job.error = error
+        job.finished = time.time()
+        job.done.set()
+
+        # Keep results of recent jobs only
+        self._finished.append(job.id)
+        while len(self._finished) > self.max_finished:
+            self.jobs.pop(self._finished.popleft(), None)
+
+    def _notify_space(self):
+        async def notify():
+            async with self._space:
+                self._space.notify_all()
+        asyncio.get_running_loop().create_task(notify())
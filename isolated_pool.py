@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Process pool that bounds the time of every task. Each worker is a process of
+its own fed one task at a time over a pipe; a task past its wall-clock
+budget has its worker killed, a task past its CPU budget is stopped by the
+kernel (RLIMIT_CPU), and either way the worker is replaced and the pool
+carries on, so one pathological document cannot stall a batch.
+"""
+
+import time
+import signal
+import resource
+import multiprocessing
+from collections import deque
+from multiprocessing.connection import wait
+
+# Sent by a worker once its initializer has run
+READY = 'ready'
+
+class BudgetExceeded(Exception):
+    """Result of a task stopped for running past its budget"""
+    def __init__(self, reason, elapsed):
+        super().__init__(f'{reason} budget exceeded after {elapsed:.1f}s')
+        self.reason = reason
+        self.elapsed = elapsed
+
+class WorkerCrashed(Exception):
+    """Result of a task whose worker died without answering"""
+    def __init__(self, exitcode, elapsed):
+        super().__init__(f'worker exited with code {exitcode} after {elapsed:.1f}s')
+        self.exitcode = exitcode
+        self.elapsed = elapsed
+
+def _cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+def _limit_cpu(seconds):
+    """Let this process use seconds more CPU time before SIGXCPU ends it; None lifts the limit"""
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = hard if seconds is None else int(_cpu_seconds() + seconds) + 1
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+def _worker_main(connection, initializer, initargs, cpu_seconds):
+    # SIGINT goes to the parent, which decides what to do with workers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if initializer:
+        initializer(*initargs)
+    # Task budgets start from here, not from process startup
+    connection.send(READY)
+    while True:
+        task = connection.recv()
+        if task is None:
+            break
+        function, args = task
+        if cpu_seconds:
+            _limit_cpu(cpu_seconds)
+        try:
+            result = (True, function(*args))
+        except Exception as e:
+            result = (False, e)
+        if cpu_seconds:
+            _limit_cpu(None)
+        connection.send(result)
+
+class _Worker:
+    def __init__(self, context, initializer, initargs, cpu_seconds):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=_worker_main, daemon=True,
+                                       args=(child_connection, initializer, initargs, cpu_seconds))
+        self.process.start()
+        child_connection.close()
+        self.task = None
+        self.ready = False
+        self.started = None
+        self.tasks_done = 0
+
+    def assign(self, index, function, args):
+        self.task = index
+        # The task waits in the pipe until the worker is ready
+        self.started = time.monotonic() if self.ready else None
+        self.connection.send((function, args))
+
+    def elapsed(self):
+        return time.monotonic() - self.started if self.started is not None else 0.0
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+    def stop(self):
+        try:
+            self.connection.send(None)
+        except OSError:
+            pass
+        self.process.join(5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.connection.close()
+
+class IsolatedPool:
+    def __init__(self, workers, initializer=None, initargs=(), wall_seconds=None, cpu_seconds=None,
+                 max_tasks_per_child=None):
+        """Run tasks on workers processes, each started with initializer(*initargs)
+
+        wall_seconds and cpu_seconds bound each task; max_tasks_per_child
+        recycles a worker after that many tasks, capping slow leaks.
+        """
+        self.workers = workers
+        self.initializer = initializer
+        self.initargs = initargs
+        self.wall_seconds = wall_seconds
+        self.cpu_seconds = cpu_seconds
+        self.max_tasks_per_child = max_tasks_per_child
+        self.context = multiprocessing.get_context()
+        # Workers killed or lost and replaced so far
+        self.recycled = 0
+
+    def _start_worker(self):
+        return _Worker(self.context, self.initializer, self.initargs, self.cpu_seconds)
+
+    @staticmethod
+    def _finish(results, index, result, callback):
+        results[index] = result
+        if callback:
+            callback(index, result)
+
+    def map(self, function, *iterables, callback=None):
+        """Results of function over the zipped iterables, in order
+
+        A task stopped by its budget or by its worker dying gives a
+        BudgetExceeded or WorkerCrashed instance in place of its result; an
+        exception raised by the task itself is returned the same way.
+        callback(index, result) is called as each task finishes.
+        """
+        tasks = list(zip(*iterables))
+        results = [None] * len(tasks)
+        pending = deque(range(len(tasks)))
+        workers = [self._start_worker() for _ in range(min(self.workers, len(tasks)))]
+        try:
+            while pending or any(worker.task is not None for worker in workers):
+                for worker in workers:
+                    if worker.task is None and pending:
+                        index = pending.popleft()
+                        worker.assign(index, function, tasks[index])
+                busy = [worker for worker in workers if worker.task is not None]
+
+                timeout = None
+                running = [worker for worker in busy if worker.started is not None]
+                if self.wall_seconds and running:
+                    now = time.monotonic()
+                    timeout = max(0, min(worker.started + self.wall_seconds for worker in running) - now)
+                ready = set(wait([worker.connection for worker in busy] +
+                                 [worker.process.sentinel for worker in busy], timeout))
+
+                for position, worker in enumerate(workers):
+                    if worker.task is None:
+                        continue
+                    if worker.connection in ready:
+                        try:
+                            message = worker.connection.recv()
+                        except (EOFError, OSError):
+                            # Died mid-task: see below
+                            pass
+                        else:
+                            if message == READY:
+                                worker.ready = True
+                                worker.started = time.monotonic()
+                                continue
+                            ok, result = message
+                            self._finish(results, worker.task, result, callback)
+                            worker.task = None
+                            worker.tasks_done += 1
+                            if self.max_tasks_per_child and worker.tasks_done >= self.max_tasks_per_child:
+                                worker.stop()
+                                workers[position] = None
+                            continue
+                    elapsed = worker.elapsed()
+                    if worker.process.sentinel in ready or worker.connection in ready:
+                        worker.process.join()
+                        exitcode = worker.process.exitcode
+                        if exitcode == -signal.SIGXCPU:
+                            self._finish(results, worker.task, BudgetExceeded('cpu', elapsed), callback)
+                        else:
+                            self._finish(results, worker.task, WorkerCrashed(exitcode, elapsed), callback)
+                    elif self.wall_seconds and elapsed >= self.wall_seconds:
+                        self._finish(results, worker.task, BudgetExceeded('wall', elapsed), callback)
+                    else:
+                        continue
+                    worker.kill()
+                    self.recycled += 1
+                    workers[position] = None
+
+                # Replace retired workers while tasks remain for them
+                workers = [worker for worker in workers if worker is not None]
+                while len(workers) < min(self.workers, len(workers) + len(pending)):
+                    workers.append(self._start_worker())
+        finally:
+            for worker in workers:
+                if worker.task is None:
+                    worker.stop()
+                else:
+                    worker.kill()
+        return results
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Aho-Corasick keyword automaton for labelling requirement text against
+several keyword vocabularies (characteristics, information states,
+measure types) in a single linear pass
+"""
+
+from collections import deque
+
+class KeywordAutomaton:
+    def __init__(self, vocabularies, word_boundaries=False):
+        """Compile {vocabulary: {label: [keywords]}} into one automaton
+
+        Keywords are matched verbatim as substrings. With word_boundaries a
+        keyword only counts when it is not embedded in a longer word.
+        """
+        self.word_boundaries = word_boundaries
+
+        # Label order per vocabulary, used to rank labels found in a text
+        self.label_order = {
+            vocabulary: list(labels) for vocabulary, labels in vocabularies.items()
+        }
+
+        # Trie of all keywords; outputs[state] holds (keyword length, vocabulary, label)
+        self.transitions = [{}]
+        self.outputs = [[]]
+        for vocabulary, labels in vocabularies.items():
+            for label, keywords in labels.items():
+                for keyword in keywords:
+                    if keyword:
+                        self._add_keyword(keyword, (len(keyword), vocabulary, label))
+
+        self._build_links()
+
+    def _add_keyword(self, keyword, output):
+        state = 0
+        for char in keyword:
+            next_state = self.transitions[state].get(char)
+            if next_state is None:
+                next_state = len(self.transitions)
+                self.transitions[state][char] = next_state
+                self.transitions.append({})
+                self.outputs.append([])
+            state = next_state
+        if output not in self.outputs[state]:
+            self.outputs[state].append(output)
+
+    def _build_links(self):
+        """Compute failure links breadth-first and merge outputs along them"""
+        self.fail = [0] * len(self.transitions)
+        queue = deque(self.transitions[0].values())
+
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.transitions[state].items():
+                queue.append(next_state)
+
+                # Longest proper suffix of the new path that is also in the trie
+                fallback = self.fail[state]
+                while fallback and char not in self.transitions[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.transitions[fallback].get(char, 0)
+
+                self.outputs[next_state] = self.outputs[next_state] + [
+                    output for output in self.outputs[self.fail[next_state]]
+                    if output not in self.outputs[next_state]]
+
+    def iter_matches(self, text):
+        """Yield (start, end, vocabulary, label) for every keyword occurrence"""
+        transitions = self.transitions
+        fail = self.fail
+        outputs = self.outputs
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in transitions[state]:
+                state = fail[state]
+            state = transitions[state].get(char, 0)
+            for length, vocabulary, label in outputs[state]:
+                start = index - length + 1
+                if self.word_boundaries and not self._on_boundaries(text, start, index + 1):
+                    continue
+                yield start, index + 1, vocabulary, label
+
+    def _on_boundaries(self, text, start, end):
+        before = text[start - 1] if start > 0 else ''
+        after = text[end] if end < len(text) else ''
+        return not _is_word_char(before) and not _is_word_char(after)
+
+    def classify(self, text):
+        """Return {vocabulary: [labels found in text, in vocabulary order]}"""
+        found = {vocabulary: set() for vocabulary in self.label_order}
+        for _, _, vocabulary, label in self.iter_matches(text):
+            found[vocabulary].add(label)
+        return {
+            vocabulary: [label for label in order if label in found[vocabulary]]
+            for vocabulary, order in self.label_order.items()
+        }
+
+def _is_word_char(char):
+    return char.isalnum() or char == '_'
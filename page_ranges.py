@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Intra-document parallelism for very long specification PDFs. The pages of
+one document are split into ranges that worker processes extract and match
+separately; the text around each range boundary comes back unmatched and is
+matched in the parent, so the merged matches, in page order, are identical
+to a serial parse.
+"""
+
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from parse_ventilator_spec import VentilatorSpecParser, DANGLING_MARKER_PATTERN, _page_at
+
+# Documents shorter than two ranges are parsed in one process. Each worker
+# costs a process start (about 0.2s when spawned) and an open of the whole
+# PDF, which a range must outweigh; at 50 pages a 158-page document ran
+# slower split four ways than serially
+MIN_RANGE_PAGES = 100
+
+def usable_cpus():
+    """CPUs this process may run on"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def page_ranges(page_count, workers, min_range_pages=MIN_RANGE_PAGES):
+    """(first, last) 1-based inclusive page ranges covering a document
+
+    One range per worker, since every range opens the PDF again.
+    """
+    size = max(min_range_pages, -(-page_count // workers))
+    return [(first, min(first + size - 1, page_count)) for first in range(1, page_count + 1, size)]
+
+def _split_after(text, newline):
+    """Whether a chunk may end just past this newline whatever text precedes the range
+
+    The line ending here must lie wholly inside the range and hold visible
+    text, and must not end in a dangling REQ or bullet marker (see
+    iter_text_chunks), so no match can continue across the split.
+    """
+    line_start = text.rfind('\n', 0, newline) + 1
+    if line_start == 0 or not text[line_start:newline].strip():
+        return False
+    return not DANGLING_MARKER_PATTERN.search(text, line_start, newline + 1)
+
+def _first_split(text):
+    newline = text.find('\n')
+    while newline != -1:
+        if _split_after(text, newline):
+            return newline + 1
+        newline = text.find('\n', newline + 1)
+    return None
+
+def _last_split(text):
+    newline = text.rfind('\n')
+    while newline != -1:
+        if _split_after(text, newline):
+            return newline + 1
+        newline = text.rfind('\n', 0, newline)
+    return None
+
+def _segment(text, page_starts, start, end):
+    """(text[start:end], page starts rebased to the segment)"""
+    if start >= end:
+        return '', []
+    starts = [(0, _page_at(page_starts, start))] + [
+        (offset - start, page) for offset, page in page_starts if start < offset < end]
+    return text[start:end], starts
+
+def _join(first, second):
+    text, starts = first
+    second_text, second_starts = second
+    return text + second_text, starts + [(offset + len(text), page) for offset, page in second_starts]
+
+# Each pool worker builds one parser with the parent's configuration
+_worker_parser = None
+
+def _init_range_worker(parser_class, characteristics, word_boundaries, backend_routes=None):
+    global _worker_parser
+    _worker_parser = parser_class(word_boundaries=word_boundaries, backend_routes=backend_routes)
+    _worker_parser.characteristics = characteristics
+    _worker_parser.compile_vocabularies()
+
+def _scan_range(pdf_path, first, last):
+    """Extract and match one page range in a worker
+
+    Returns (head, middle, tail): head and tail are the (text, page_starts)
+    segments before the range's first and after its last safe split, left
+    for the parent to match with the neighbouring ranges, and middle holds
+    the (req, bullet, gap) matches in between. With no safe split, middle is
+    None and head holds the whole range.
+    """
+    parts = []
+    page_starts = []
+    offset = 0
+    for page_number, page_text in _worker_parser.iter_pdf_pages(pdf_path, first, last):
+        if page_text:
+            page_starts.append((offset, page_number))
+            parts.append(page_text)
+            offset += len(page_text)
+    text = ''.join(parts)
+
+    first_split = _first_split(text)
+    if first_split is None:
+        return (text, page_starts), None, ('', [])
+    last_split = _last_split(text)
+    middle = _worker_parser.scan_text(*_segment(text, page_starts, first_split, last_split))
+    return (_segment(text, page_starts, 0, first_split), middle,
+            _segment(text, page_starts, last_split, len(text)))
+
+def scan_page_ranges(parser, pdf_path, workers, min_range_pages=MIN_RANGE_PAGES):
+    """Match a document's pages across worker processes, merged in page order
+
+    Returns (req_matches, bullet_matches, gap_matches, has_text) exactly as
+    parser.scan_pages would, or None when the document is too short, or
+    the machine too small, for splitting to pay off.
+    """
+    workers = min(workers, usable_cpus())
+    if workers < 2:
+        return None
+    page_count = parser.page_count(pdf_path)
+    if page_count < 2 * min_range_pages:
+        return None
+
+    ranges = page_ranges(page_count, workers, min_range_pages)
+    characteristics = {char: {'keywords': list(data['keywords']), 'requirements': [], 'gaps': []}
+                       for char, data in parser.characteristics.items()}
+    metrics = parser.metrics
+    with metrics.stage('page_ranges') if metrics else nullcontext():
+        with ProcessPoolExecutor(max_workers=len(ranges), initializer=_init_range_worker,
+                                 initargs=(type(parser), characteristics, parser.word_boundaries,
+                                           parser.backend_routes)) as pool:
+            # map keeps range order, so the merge is deterministic
+            scanned = list(pool.map(_scan_range, [pdf_path] * len(ranges),
+                                    [first for first, _ in ranges], [last for _, last in ranges]))
+    if metrics:
+        metrics.count('pages', page_count)
+
+    matches = ([], [], [])
+
+    def add(found):
+        for merged, new in zip(matches, found):
+            merged.extend(new)
+
+    # Text since the last safe split, carried across ranges without one
+    pending = ('', [])
+    for head, middle, tail in scanned:
+        pending = _join(pending, head)
+        if middle is None:
+            continue
+        if pending[0]:
+            add(parser.scan_text(*pending))
+        add(middle)
+        pending = tail
+    if pending[0]:
+        add(parser.scan_text(*pending))
+
+    has_text = any(head[0] or middle is not None for head, middle, _ in scanned)
+    return matches + (has_text,)
+
+def main():
+    arg_parser = argparse.ArgumentParser(
+        description='Compare serial and page-range parallel parsing of a long specification PDF')
+    arg_parser.add_argument('pdf_path', help='Specification PDF')
+    arg_parser.add_argument('--workers', type=int, default=None,
+                            help='Worker processes (defaults to CPU count)')
+    args = arg_parser.parse_args()
+    workers = args.workers or os.cpu_count() or 1
+
+    timings = {}
+    outputs = {}
+    for mode, page_workers in (('serial', 1), ('parallel', workers)):
+        parser = VentilatorSpecParser(page_workers=page_workers)
+        start = time.perf_counter()
+        results = parser.parse_specification(args.pdf_path)
+        timings[mode] = time.perf_counter() - start
+        if not results:
+            print(f"Failed to parse {args.pdf_path}")
+            sys.exit(1)
+        results['metadata'].pop('parsed_date')
+        outputs[mode] = results
+
+    print(f"Serial: {timings['serial']:.2f}s, parallel ({workers} workers): {timings['parallel']:.2f}s "
+          f"({timings['serial'] / timings['parallel']:.2f}x)")
+    if outputs['serial'] != outputs['parallel']:
+        print("Outputs differ")
+        sys.exit(1)
+    print(f"Outputs identical ({outputs['serial']['summary']['total_requirements']} requirements)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Content-addressed on-disk cache for parsed specification results, keyed on
+the PDF bytes, the parser version and the keyword configuration, with a
+size-bounded least-recently-used eviction policy
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Eviction frees space down to this share of max_bytes, so a full cache is
+# scanned once per many puts rather than on every one
+EVICT_TO = 0.9
+
+def file_digest(path, block_size=1024 * 1024):
+    """SHA-256 of a file's bytes, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def parser_fingerprint(parser, parser_version):
+    """Stable hash of everything besides the PDF bytes that affects parse output"""
+    config = {
+        'parser_version': parser_version,
+        'characteristics': {char: data['keywords'] for char, data in parser.characteristics.items()},
+        'info_states': parser.info_states,
+        'measure_types': parser.measure_types,
+        'word_boundaries': parser.word_boundaries
+    }
+    if parser.dedup:
+        # Only when enabled, so existing cache entries stay valid
+        config['dedup'] = True
+    if parser.backend_routes:
+        # Backends extract slightly different text; likewise only when routed
+        config['backend_routes'] = parser.backend_routes
+    encoded = json.dumps(config, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+class ParseCache:
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # Running size of the cache's entries, from one directory scan and
+        # then this instance's writes; None until the first put
+        self._total = None
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, pdf_path, fingerprint):
+        """Cache key for a document under a given parser fingerprint"""
+        return hashlib.sha256(f'{file_digest(pdf_path)}:{fingerprint}'.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.json')
+
+    def get(self, key):
+        """Return cached results for a key, or None on a miss"""
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r') as f:
+                results = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        # Touch the entry so eviction sees it as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return results
+
+    def put(self, key, results):
+        """Store results atomically, then evict old entries past the size bound
+
+        The directory is only scanned when the running total goes over
+        max_bytes, so filling the cache stays linear in its entries. Entries
+        other processes write into a shared cache are counted at that scan.
+        """
+        if self._total is None:
+            self._total = self._scan()[1]
+        path = self._entry_path(key)
+        try:
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(results, f, separators=(',', ':'))
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._total += size - replaced
+        if self._total > self.max_bytes:
+            self.evict()
+
+    def _scan(self):
+        """(mtime, size, path) of every entry, and their total size"""
+        entries = []
+        total = 0
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if not entry.name.endswith('.json'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        return entries, total
+
+    def evict(self):
+        """Remove least recently used entries once the cache is over max_bytes"""
+        entries, total = self._scan()
+        if total <= self.max_bytes:
+            self._total = total
+            return
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes * EVICT_TO:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._total = total
+
+    def stats(self):
+        """Hit and miss counts for this cache instance"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else None
+        }
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Resident parse service. Keeps warm VentilatorSpecParser instances in a pool
+of worker processes and serves parse requests over local HTTP (TCP or a Unix
+socket), so callers no longer pay interpreter startup, the PyPDF2 import and
+parser construction on every parse.
+
+    POST   /parse             {"pdf_path": "..."}  -> {"parsed": ..., "ia_requirements": ..., "spreadsheet": [...]}
+    POST   /jobs              {"pdf_path": "...", "priority": "bulk"}  -> 202 job status
+    GET    /jobs              queue statistics and every retained job's status
+    GET    /jobs/<id>         job status and page progress
+    GET    /jobs/<id>/result  the job's output, once done
+    DELETE /jobs/<id>         cancel a queued or running job
+    GET    /health            -> {"status": "ok", ...}
+
+The three output fields hold the same data main() writes to
+parsed_ventilator_spec.json, ventilator_ia_requirements.json and
+ventilator_security_analysis.csv. /parse runs as an interactive job, so it
+is served ahead of any queued bulk ingestion.
+"""
+
+import os
+import json
+import signal
+import asyncio
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from parse_ventilator_spec import VentilatorSpecParser, PARSER_VERSION
+from parse_cache import ParseCache, DEFAULT_MAX_BYTES
+from text_backends import load_routes
+from ingest_queue import IngestQueue, QueueFull, PRIORITIES, DEFAULT_MAX_DEPTH, tracked_pages
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+MAX_BODY_BYTES = 64 * 1024
+
+HTTP_REASONS = {
+    200: 'OK',
+    202: 'Accepted',
+    400: 'Bad Request',
+    403: 'Forbidden',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    409: 'Conflict',
+    422: 'Unprocessable Entity',
+    429: 'Too Many Requests',
+    500: 'Internal Server Error'
+}
+
+# Each pool worker keeps one parser, with its compiled patterns, for its lifetime
+_worker_parser = None
+
+def _init_worker(cache_dir=None, cache_max_bytes=DEFAULT_MAX_BYTES, backend_routes=None):
+    global _worker_parser
+    cache = ParseCache(cache_dir, cache_max_bytes) if cache_dir else None
+    _worker_parser = VentilatorSpecParser(cache=cache, backend_routes=backend_routes)
+
+def _worker_ready():
+    return _worker_parser is not None
+
+def _parse_job(pdf_path, job_id=None, progress=None, cancelled=None):
+    """Parse one document in a pool worker; None if the PDF could not be parsed
+    
+    Queued jobs pass their id and the shared progress/cancelled dicts.
+    """
+    pages = None
+    if job_id is not None:
+        total = _worker_parser.page_count(pdf_path)
+        pages = tracked_pages(_worker_parser.iter_pdf_pages(pdf_path), job_id,
+                              progress, cancelled, total)
+    results = _worker_parser.parse_specification(pdf_path, pages)
+    if not results:
+        return None
+    return {
+        'parsed': results,
+        'ia_requirements': _worker_parser.convert_to_ia_json_schema(results),
+        'spreadsheet': _worker_parser.generate_spreadsheet_output(results)
+    }
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def job_output(job):
+    """A job's result, or the HTTPError its state calls for"""
+    if job.state == 'done':
+        return job.result
+    if job.state == 'failed':
+        raise HTTPError(422, job.error)
+    raise HTTPError(409, f'Job {job.id} is {job.state}')
+
+class ParseDaemon:
+    def __init__(self, workers=None, root='.', cache_dir=None, cache_max_bytes=DEFAULT_MAX_BYTES,
+                 max_depth=DEFAULT_MAX_DEPTH, backend_routes=None):
+        self.workers = workers or os.cpu_count() or 1
+        # Only PDFs under this directory may be parsed
+        self.root = os.path.realpath(root)
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                        initargs=(cache_dir, cache_max_bytes, backend_routes))
+        self.max_depth = max_depth
+        self.queue = None
+
+    async def start(self):
+        """Start the workers and the job queue dispatcher"""
+        await self.warm_up()
+        self.queue = IngestQueue(self.pool, self.workers, _parse_job, self.max_depth)
+        self.queue.start()
+
+    def resolve(self, pdf_path):
+        """Absolute path of a requested PDF, relative paths being taken from root"""
+        if not isinstance(pdf_path, str) or not pdf_path:
+            raise HTTPError(400, 'pdf_path must be a non-empty string')
+        path = os.path.realpath(os.path.join(self.root, pdf_path))
+        if os.path.commonpath([path, self.root]) != self.root:
+            raise HTTPError(403, f'{pdf_path} is outside the service root')
+        if not os.path.isfile(path):
+            raise HTTPError(404, f'{pdf_path} not found')
+        return path
+
+    async def warm_up(self):
+        """Start every worker process up front so the first requests find warm parsers"""
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.pool, _worker_ready)
+                               for _ in range(self.workers)))
+
+    def submit(self, pdf_path, priority):
+        path = self.resolve(pdf_path)
+        if priority not in PRIORITIES:
+            raise HTTPError(400, f"priority must be one of {', '.join(PRIORITIES)}")
+        try:
+            return self.queue.submit(path, priority)
+        except QueueFull as e:
+            raise HTTPError(429, str(e))
+
+    async def parse(self, pdf_path):
+        """Parse synchronously as an interactive job"""
+        job = self.submit(pdf_path, 'interactive')
+        await job.done.wait()
+        # From the job itself, which may already have been evicted from the queue
+        return job_output(job)
+
+    def job_status(self, job_id):
+        status = self.queue.status(job_id)
+        if status is None:
+            raise HTTPError(404, f'No job {job_id}')
+        return status
+
+    def job_result(self, job_id):
+        job = self.queue.get(job_id)
+        if job is None:
+            raise HTTPError(404, f'No job {job_id}')
+        return job_output(job)
+
+    def health(self):
+        return {
+            'status': 'ok',
+            'parser_version': PARSER_VERSION,
+            'workers': self.workers,
+            'queue': self.queue.stats()
+        }
+
+    async def route(self, method, path, body):
+        """Dispatch a request; returns (status, payload)"""
+        parts = [part for part in path.split('/') if part]
+        if parts == ['health'] and method == 'GET':
+            return 200, self.health()
+        if parts == ['parse'] and method == 'POST':
+            request = parse_body(body)
+            return 200, await self.parse(request.get('pdf_path'))
+        if parts == ['jobs'] and method == 'POST':
+            request = parse_body(body)
+            job = self.submit(request.get('pdf_path'), request.get('priority', 'normal'))
+            return 202, self.queue.status(job.id)
+        if parts == ['jobs'] and method == 'GET':
+            return 200, {
+                'queue': self.queue.stats(),
+                'jobs': [self.queue.status(job_id) for job_id in list(self.queue.jobs)]
+            }
+        if len(parts) == 2 and parts[0] == 'jobs' and method == 'GET':
+            return 200, self.job_status(parts[1])
+        if len(parts) == 2 and parts[0] == 'jobs' and method == 'DELETE':
+            self.job_status(parts[1])
+            if not self.queue.cancel(parts[1]):
+                raise HTTPError(409, f'Job {parts[1]} has already finished')
+            return 200, self.queue.status(parts[1])
+        if len(parts) == 3 and parts[0] == 'jobs' and parts[2] == 'result' and method == 'GET':
+            return 200, self.job_result(parts[1])
+        raise HTTPError(404, f'No route for {method} {path}')
+
+    async def handle(self, reader, writer):
+        """Serve one HTTP request per connection"""
+        try:
+            try:
+                method, path, body = await read_request(reader)
+                status, payload = await self.route(method, path, body)
+            except HTTPError as e:
+                status, payload = e.status, {'error': str(e)}
+            except Exception as e:
+                status, payload = 500, {'error': str(e)}
+            await write_response(writer, status, payload)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def stop(self):
+        if self.queue:
+            await self.queue.stop()
+
+    def close(self):
+        # Running jobs see their cancellation at the next page, so this is quick
+        self.pool.shutdown(cancel_futures=True)
+        if self.queue:
+            self.queue.close()
+
+def parse_body(body):
+    try:
+        request = json.loads(body or b'{}')
+    except ValueError:
+        raise HTTPError(400, 'Request body must be JSON')
+    if not isinstance(request, dict):
+        raise HTTPError(400, 'Request body must be a JSON object')
+    return request
+
+async def read_request(reader):
+    """Read a request line, headers and Content-Length body"""
+    request_line = (await reader.readline()).decode('latin-1').strip()
+    parts = request_line.split()
+    if len(parts) != 3:
+        raise HTTPError(400, 'Malformed request line')
+    method, target, _ = parts
+
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode('latin-1')
+        if line in ('\r\n', '\n', ''):
+            break
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        raise HTTPError(400, 'Invalid Content-Length')
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(413, f'Request body over {MAX_BODY_BYTES} bytes')
+    body = await reader.readexactly(length) if length else b''
+    return method.upper(), target.split('?', 1)[0], body
+
+async def write_response(writer, status, payload):
+    body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    head = (f'HTTP/1.1 {status} {HTTP_REASONS.get(status, "Error")}\r\n'
+            f'Content-Type: application/json\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            f'Connection: close\r\n\r\n')
+    writer.write(head.encode('latin-1') + body)
+    await writer.drain()
+
+async def serve(daemon, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_socket=None):
+    """Serve until SIGINT or SIGTERM"""
+    # Warm up and start the queue before accepting the first connection
+    await daemon.start()
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket)
+        server = await asyncio.start_unix_server(daemon.handle, path=unix_socket)
+        address = unix_socket
+    else:
+        server = await asyncio.start_server(daemon.handle, host, port)
+        address = f'http://{host}:{port}'
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    print(f"Parse daemon listening on {address} with {daemon.workers} workers (root {daemon.root})")
+    async with server:
+        await stop.wait()
+    await daemon.stop()
+    if unix_socket and os.path.exists(unix_socket):
+        os.remove(unix_socket)
+    print("Parse daemon stopped")
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Serve specification parsing from warm worker processes')
+    arg_parser.add_argument('--host', default=DEFAULT_HOST, help='Address to listen on')
+    arg_parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='TCP port to listen on')
+    arg_parser.add_argument('--unix-socket', metavar='PATH',
+                            help='Listen on a Unix socket instead of TCP')
+    arg_parser.add_argument('--workers', type=int, default=None,
+                            help='Parser worker processes (defaults to CPU count)')
+    arg_parser.add_argument('--root', default='.',
+                            help='Directory requested PDFs must live under; relative paths resolve here')
+    arg_parser.add_argument('--cache-dir', default=None,
+                            help='Directory of the content-addressed parse cache (disabled if omitted)')
+    arg_parser.add_argument('--cache-max-mb', type=float, default=DEFAULT_MAX_BYTES / (1024 * 1024),
+                            help='Size bound of the parse cache before LRU eviction, in MiB')
+    arg_parser.add_argument('--max-queue', type=int, default=DEFAULT_MAX_DEPTH,
+                            help='Jobs that may wait in the queue before submissions get 429')
+    arg_parser.add_argument('--backends', metavar='PATH',
+                            help='Text backend routes from a text_backends.py calibration file')
+    args = arg_parser.parse_args()
+
+    daemon = ParseDaemon(args.workers, args.root, args.cache_dir, int(args.cache_max_mb * 1024 * 1024),
+                         args.max_queue, load_routes(args.backends) if args.backends else None)
+    try:
+        asyncio.run(serve(daemon, args.host, args.port, args.unix_socket))
+    finally:
+        daemon.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Memory profiling and per-document memory budgets for specification parsing.
+Documents are parsed under tracemalloc, first holding the whole text as
+extract_text_from_pdf does; one that goes over its budget is retried in
+streaming mode, and skipped if it still does not fit, so a single oversized
+manual cannot take down a batch.
+"""
+
+import os
+import sys
+import json
+import tracemalloc
+import argparse
+from contextlib import nullcontext
+from parse_ventilator_spec import VentilatorSpecParser
+
+DEFAULT_TOP_SITES = 10
+
+def top_allocation_sites(snapshot, limit=DEFAULT_TOP_SITES):
+    """Largest live allocations in a snapshot, grouped by source line"""
+    snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+    sites = []
+    for stat in snapshot.statistics('lineno')[:limit]:
+        frame = stat.traceback[0]
+        sites.append({
+            'site': f'{os.path.basename(frame.filename)}:{frame.lineno}',
+            'size_bytes': stat.size,
+            'allocations': stat.count
+        })
+    return sites
+
+def _over_budget(limit):
+    return limit is not None and tracemalloc.get_traced_memory()[1] > limit
+
+def _start_phase(budget_bytes):
+    """Reset the peak; returns (baseline, absolute traced-memory limit or None)"""
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    return baseline, (baseline + budget_bytes if budget_bytes is not None else None)
+
+def _budgeted_pages(pages, limit, state):
+    """Pass pages through, stopping early once peak traced memory exceeds the limit"""
+    for page in pages:
+        yield page
+        if _over_budget(limit):
+            state['exceeded'] = True
+            return
+
+def _held_pages(pages, limit, state, top, report):
+    """Extract every page before passing any on, holding the whole document's text
+    as extract_text_from_pdf does"""
+    held = list(_budgeted_pages(pages, limit, state))
+    report['phases']['extract_text_from_pdf'] = top_allocation_sites(tracemalloc.take_snapshot(), top)
+    if state['exceeded'] or _over_budget(limit):
+        state['exceeded'] = True
+        return
+    yield from held
+
+def _parse_in_memory(parser, pdf_path, limit, top, report):
+    """Parse holding the full document text; returns (results, exceeded)"""
+    state = {'exceeded': False}
+    pages = _held_pages(parser.iter_pdf_pages(pdf_path), limit, state, top, report)
+    results = parser.parse_document(pdf_path, pages)
+    report['phases']['extract_requirements'] = top_allocation_sites(tracemalloc.take_snapshot(), top)
+    if state['exceeded'] or _over_budget(limit):
+        return None, True
+    return results, False
+
+def _parse_streaming(parser, pdf_path, limit, top, report):
+    """Parse one page chunk at a time; returns (results, exceeded)"""
+    state = {'exceeded': False}
+    pages = _budgeted_pages(parser.iter_pdf_pages(pdf_path), limit, state)
+    results = parser.parse_document(pdf_path, pages)
+    report['phases']['streaming'] = top_allocation_sites(tracemalloc.take_snapshot(), top)
+    if state['exceeded'] or _over_budget(limit):
+        return None, True
+    return results, False
+
+def profile_document(parser, pdf_path, budget_bytes=None, top=DEFAULT_TOP_SITES, streaming=False):
+    """Parse a document under tracemalloc, enforcing an optional memory budget
+
+    Returns (results, report). report['status'] is 'parsed', 'degraded' (went
+    over budget holding the full text and was re-parsed in streaming mode),
+    'skipped' (over budget even when streaming) or 'failed'; results is None
+    unless the document was parsed.
+    """
+    report = {
+        'document': os.path.basename(pdf_path),
+        'budget_bytes': budget_bytes,
+        'mode': 'streaming' if streaming else 'in_memory',
+        'status': None,
+        'peak_bytes': {},
+        'phases': {}
+    }
+
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    metrics = parser.metrics
+    try:
+        with metrics.stage('parse') if metrics else nullcontext():
+            results, exceeded = None, False
+            if not streaming:
+                baseline, limit = _start_phase(budget_bytes)
+                results, exceeded = _parse_in_memory(parser, pdf_path, limit, top, report)
+                report['peak_bytes']['in_memory'] = tracemalloc.get_traced_memory()[1] - baseline
+                if exceeded:
+                    # Drop what the aborted attempt was holding before retrying
+                    results = None
+                    report['mode'] = 'streaming'
+
+            if streaming or exceeded:
+                baseline, limit = _start_phase(budget_bytes)
+                results, exceeded = _parse_streaming(parser, pdf_path, limit, top, report)
+                report['peak_bytes']['streaming'] = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+    if exceeded:
+        report['status'] = 'skipped'
+    elif results is None:
+        report['status'] = 'failed'
+    else:
+        report['status'] = 'degraded' if report['mode'] == 'streaming' and not streaming else 'parsed'
+    report['peak_bytes']['max'] = max(report['peak_bytes'].values(), default=0)
+    return results, report
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Profile parser memory use for specification PDFs')
+    arg_parser.add_argument('pdf_paths', nargs='+', help='Specification PDFs to profile')
+    arg_parser.add_argument('--budget-mb', type=float, default=None,
+                            help='Per-document memory budget in MiB')
+    arg_parser.add_argument('--streaming', action='store_true',
+                            help='Profile streaming mode instead of holding the full text')
+    arg_parser.add_argument('--top', type=int, default=DEFAULT_TOP_SITES,
+                            help='Allocation sites to report per phase')
+    arg_parser.add_argument('--output', help='Write the reports as JSON to this file')
+    args = arg_parser.parse_args()
+
+    budget_bytes = int(args.budget_mb * 1024 * 1024) if args.budget_mb else None
+    parser = VentilatorSpecParser()
+    reports = []
+    for pdf_path in args.pdf_paths:
+        _, report = profile_document(parser, pdf_path, budget_bytes, args.top, args.streaming)
+        reports.append(report)
+
+        print(f"{report['document']}: {report['status']} ({report['mode']}), "
+              f"peak {report['peak_bytes']['max'] / (1024 * 1024):.2f} MiB")
+        for phase, sites in report['phases'].items():
+            print(f"  {phase}:")
+            for site in sites:
+                print(f"    {site['size_bytes'] / 1024:>10.1f} KiB {site['allocations']:>8} "
+                      f"allocations  {site['site']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(reports, f, indent=2)
+    if any(report['status'] in ('failed', 'skipped') for report in reports):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
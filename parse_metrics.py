@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Opt-in instrumentation for the specification parse pipeline. Records wall
+and CPU time per stage, pages per document, matches per pattern and bytes
+written, and emits them as JSON lines (one record per document) and as a
+Prometheus text exposition file for a local scraper.
+"""
+
+import os
+import json
+import time
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+
+METRIC_PREFIX = 'spec_parser'
+
+class ParseMetrics:
+    def __init__(self):
+        # One record per document, in parse order
+        self.records = []
+        self._current = None
+
+    def begin_document(self, document):
+        """Start a record; later stages and counters are attributed to it"""
+        self._current = {
+            'document': document,
+            'timestamp': datetime.now().isoformat(),
+            'status': None,
+            'stages': {},
+            'counters': {}
+        }
+        self.records.append(self._current)
+        return self._current
+
+    def set_status(self, status):
+        self._current['status'] = status
+
+    def add_stage_time(self, name, wall, cpu):
+        stage = self._current['stages'].setdefault(name, {'wall_seconds': 0.0, 'cpu_seconds': 0.0})
+        stage['wall_seconds'] += wall
+        stage['cpu_seconds'] += cpu
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block; repeated blocks of one stage accumulate"""
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            self.add_stage_time(name, time.perf_counter() - wall_start,
+                                time.process_time() - cpu_start)
+
+    def timed_pages(self, pages, name='pdf_extraction'):
+        """Wrap a page iterator, timing the work done producing each page"""
+        pages = iter(pages)
+        while True:
+            wall_start = time.perf_counter()
+            cpu_start = time.process_time()
+            try:
+                page = next(pages)
+            except StopIteration:
+                return
+            finally:
+                self.add_stage_time(name, time.perf_counter() - wall_start,
+                                    time.process_time() - cpu_start)
+            self.count('pages')
+            yield page
+
+    def count(self, name, value=1):
+        counters = self._current['counters']
+        counters[name] = counters.get(name, 0) + value
+
+    def write_jsonl(self, path):
+        """Append one JSON line per document record"""
+        with open(path, 'a') as f:
+            for record in self.records:
+                f.write(json.dumps(record, separators=(',', ':')) + '\n')
+
+    def totals(self):
+        """Sum stage times and counters over all documents"""
+        statuses = {}
+        stages = {}
+        counters = {}
+        for record in self.records:
+            status = record['status'] or 'unknown'
+            statuses[status] = statuses.get(status, 0) + 1
+            for name, stage in record['stages'].items():
+                total = stages.setdefault(name, {'wall_seconds': 0.0, 'cpu_seconds': 0.0})
+                total['wall_seconds'] += stage['wall_seconds']
+                total['cpu_seconds'] += stage['cpu_seconds']
+            for name, value in record['counters'].items():
+                counters[name] = counters.get(name, 0) + value
+        return statuses, stages, counters
+
+    def prometheus_text(self):
+        """Counters in the Prometheus text exposition format"""
+        statuses, stages, counters = self.totals()
+        lines = []
+
+        def metric(name, help_text, samples):
+            lines.append(f'# HELP {METRIC_PREFIX}_{name} {help_text}')
+            lines.append(f'# TYPE {METRIC_PREFIX}_{name} counter')
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{label}"' for key, label in labels.items())
+                label_text = f'{{{label_text}}}' if label_text else ''
+                lines.append(f'{METRIC_PREFIX}_{name}{label_text} {value}')
+
+        metric('documents_total', 'Documents processed, by status',
+               [({'status': status}, count) for status, count in sorted(statuses.items())])
+        metric('stage_wall_seconds_total', 'Wall-clock time spent per parse stage',
+               [({'stage': name}, round(stage['wall_seconds'], 6)) for name, stage in sorted(stages.items())])
+        metric('stage_cpu_seconds_total', 'CPU time spent per parse stage',
+               [({'stage': name}, round(stage['cpu_seconds'], 6)) for name, stage in sorted(stages.items())])
+        metric('pages_total', 'PDF pages read', [({}, counters.get('pages', 0))])
+        metric('pattern_matches_total', 'Matches per extraction pattern',
+               [({'pattern': name[len('matches_'):]}, value) for name, value in sorted(counters.items())
+                if name.startswith('matches_')])
+        metric('bytes_written_total', 'Bytes written per output file',
+               [({'output': name[len('bytes_'):]}, value) for name, value in sorted(counters.items())
+                if name.startswith('bytes_')])
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path):
+        """Write the exposition file atomically so a scraper never reads half of it"""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(self.prometheus_text())
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
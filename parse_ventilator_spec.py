@@ -4,14 +4,107 @@ Parse ventilator technical specification PDFs to extract security characteristic
 and generate JSON output compatible with the IA framework
 """
 
-import PyPDF2
 import re
+import os
+import csv
+import glob
 import json
-import sys
+import hashlib
+import time
+import bisect
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
 from datetime import datetime
+from keyword_automaton import KeywordAutomaton
+from parse_cache import ParseCache, DEFAULT_MAX_BYTES, parser_fingerprint, file_digest
+from parse_metrics import ParseMetrics
+from requirement_dedup import RequirementDeduplicator
+from text_backends import backend_for, supported_extensions, load_routes, prepare_backends
+from isolated_pool import IsolatedPool, BudgetExceeded
+from run_manifest import RunManifest, MANIFEST_NAME, run_key
+from corpus_shards import (document_shard, corpus_ia_json, parse_shard_spec, CORPUS_SUMMARY_NAME,
+                           CORPUS_IA_NAME)
+
+PARSER_VERSION = '1.0'
+
+# Documents stopped by their time budget in batch mode, kept in the output directory
+RETRY_QUEUE_NAME = 'retry_queue.json'
+
+# Requirement patterns (REQ-XXX-NNN) and bullet points with requirements
+REQ_PATTERN = re.compile(r'REQ-[A-Z]+-\d{3}:\s*([^\n]+)')
+BULLET_PATTERN = re.compile(r'[•▪]\s*([^•\n]+(?:requirement|must|shall|should)[^•\n]+)', re.IGNORECASE)
+
+# Gap lines; a characteristic counts when named with at least one character after it
+GAP_LINE_PATTERN = re.compile(r'GAP-\d{3}([^\n]*)', re.IGNORECASE)
+
+# A marker followed only by whitespace, whose match continues on a later line
+DANGLING_MARKER_PATTERN = re.compile(r'(?:[•▪]|REQ-[A-Z]+-\d{3}:)\s*\Z')
+
+# Pieces of BULLET_PATTERN and DANGLING_MARKER_PATTERN that match without
+# backtracking, for the linear-time scanners below
+BULLET_MARKER_PATTERN = re.compile(r'[•▪]')
+BULLET_KEYWORD_PATTERN = re.compile(r'requirement|must|shall|should', re.IGNORECASE)
+BULLET_END_PATTERN = re.compile(r'[•\n]')
+WHITESPACE_PATTERN = re.compile(r'\s*')
+MARKER_RUN_PATTERN = re.compile(r'([•▪]|REQ-[A-Z]+-\d{3}:)\s*')
+
+def _page_at(page_starts, offset):
+    """Page number containing a text offset, given ascending (offset, page) starts"""
+    index = bisect.bisect_right([start for start, _ in page_starts], offset) - 1
+    return page_starts[max(index, 0)][1]
+
+def _page_locator(page_starts):
+    """_page_at for many offsets into the same text"""
+    offsets = [start for start, _ in page_starts]
+    pages = [page for _, page in page_starts]
+    return lambda offset: pages[max(bisect.bisect_right(offsets, offset) - 1, 0)]
+
+def iter_bullet_matches(text):
+    """Yield (match start, requirement text) exactly as BULLET_PATTERN.finditer would
+
+    The pattern's \\s* and two [^•\\n]+ runs overlap, so a bullet followed by
+    whitespace and a long line with no keyword backtracks quadratically.
+    Here each bullet's segment (its line up to the next • or newline) is
+    searched for keywords once, however many ▪ markers share it. The match
+    needs a keyword with at least one segment character before and after it;
+    the captured text starts after the bullet's whitespace, or one character
+    earlier when the keyword starts right there.
+    """
+    segment_end = keyword = None
+    pos = 0
+    while True:
+        marker = BULLET_MARKER_PATTERN.search(text, pos)
+        if marker is None:
+            return
+        start = marker.start()
+        # \s* may cross newlines; the segment is the line its whitespace ends on
+        body = WHITESPACE_PATTERN.match(text, start + 1).end()
+        line_start = max(start + 1, text.rfind('\n', start + 1, body) + 1)
+        if segment_end is not None and body < segment_end:
+            end = segment_end
+        else:
+            end = BULLET_END_PATTERN.search(text, body)
+            end = end.start() if end else len(text)
+        if end != segment_end:
+            # Start of the segment's last keyword that ends before the segment does
+            segment_end, keyword = end, None
+            for found in BULLET_KEYWORD_PATTERN.finditer(text, body, end):
+                if found.end() < end:
+                    keyword = found.start()
+        if keyword is not None and keyword > body:
+            yield start, text[body:end]
+            pos = end
+        elif keyword == body and body > line_start:
+            yield start, text[body - 1:end]
+            pos = end
+        else:
+            pos = start + 1
 
 class VentilatorSpecParser:
-    def __init__(self):
+    def __init__(self, word_boundaries=False, cache=None, metrics=None, dedup=False, page_workers=None,
+                 backend_routes=None):
         # Define the 5 security characteristics we're looking for
         self.characteristics = {
             'Confidentiality': {
@@ -59,104 +152,324 @@ class VentilatorSpecParser:
             'policy': ['policy', 'procedure', 'guideline', 'standard', 'compliance'],
             'training': ['train', 'educate', 'learn', 'competency', 'certification']
         }
+        
+        # One automaton labels text against every keyword vocabulary at once;
+        # call compile_vocabularies() again after editing any keyword list
+        # or adding a characteristic
+        self.word_boundaries = word_boundaries
+        self.compile_vocabularies()
+        
+        # Optional ParseCache serving unchanged documents without re-parsing
+        self.cache = cache
+        
+        # Optional ParseMetrics recording per-stage timings and counters
+        self.metrics = metrics
+        
+        # Tag each requirement with the canonical ID of its near-duplicate cluster
+        self.dedup = dedup
+        
+        # Worker processes sharing the pages of one long document
+        self.page_workers = page_workers or 1
+        
+        # Document format -> text backend name, e.g. from a calibration file;
+        # formats not listed use their default backend
+        self.backend_routes = backend_routes or {}
+
+    def compile_vocabularies(self):
+        """Build the keyword automaton from the current keyword configuration"""
+        self.keyword_automaton = KeywordAutomaton({
+            'characteristic': {char: data['keywords'] for char, data in self.characteristics.items()},
+            'info_state': self.info_states,
+            'measure_type': self.measure_types
+        }, word_boundaries=self.word_boundaries)
+        
+        # Precompiled per-characteristic tests applied to each GAP line
+        self._gap_patterns = {char: re.compile(char + r'[^\n]', re.IGNORECASE)
+                              for char in self.characteristics}
+
+    def iter_pdf_pages(self, pdf_path, first=1, last=None):
+        """Yield (page_number, text) for each document page, one page at a time
+        
+        The text comes from the backend routed to the document's format (PDF,
+        DOCX or plain text). first and last (1-based, inclusive) limit the
+        pages read.
+        """
+        yield from backend_for(pdf_path, self.backend_routes).iter_pages(pdf_path, first, last)
+
+    def page_count(self, pdf_path):
+        return backend_for(pdf_path, self.backend_routes).page_count(pdf_path)
 
     def extract_text_from_pdf(self, pdf_path):
         """Extract text content from PDF file"""
-        text = ""
         try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page_num in range(len(pdf_reader.pages)):
-                    page = pdf_reader.pages[page_num]
-                    text += page.extract_text()
+            text = ''.join(page_text for _, page_text in self.iter_pdf_pages(pdf_path))
         except Exception as e:
             print(f"Error reading PDF: {e}")
             return None
         return text
 
-    def extract_requirements(self, text, characteristic):
-        """Extract requirements for a specific characteristic from text"""
-        requirements = []
-        gaps = []
+    def iter_text_chunks(self, pages):
+        """Regroup a page stream into chunks that no requirement match can straddle
+        
+        Pages are concatenated without separators, so a line may continue on the
+        next page. Each yielded chunk ends on a line boundary and carries the
+        unfinished tail forward; a REQ/bullet marker followed only by whitespace
+        is also carried because its text continues past the newline. Yields
+        (chunk, page_starts) where page_starts lists (offset, page_number).
+        
+        Work is linear in the text: the carry is never rescanned, only its
+        last line, since every newline in it was already refused as a split,
+        and pages without a newline (common in PyPDF2 output) are just
+        appended to it.
+        """
+        carry = []
+        carry_length = 0
+        carry_starts = []
+        # The carry's last line, and whether a marker's whitespace run
+        # reaches the end of the carry from an earlier line
+        tail = []
+        dangling = False
+        for page_number, page_text in pages:
+            if not page_text:
+                continue
+            carry_starts.append((carry_length, page_number))
+            carry.append(page_text)
+            carry_length += len(page_text)
+            
+            split = None
+            newline = page_text.rfind('\n')
+            if newline == -1:
+                tail.append(page_text)
+                dangling = dangling and page_text.isspace()
+            else:
+                # (marker end, whitespace run end) of every marker in reach,
+                # ascending; a split inside a run would cut a match
+                region = ''.join(tail) + page_text
+                page_offset = len(region) - len(page_text)
+                runs = [(0, WHITESPACE_PATTERN.match(region).end())] if dangling else []
+                runs += [(m.end(1), m.end()) for m in MARKER_RUN_PATTERN.finditer(region)]
+                
+                # Last newline of this page outside every run
+                index = len(runs) - 1
+                newline += page_offset
+                while newline != -1:
+                    while index >= 0 and runs[index][0] > newline:
+                        index -= 1
+                    if index < 0 or newline >= runs[index][1]:
+                        split = carry_length - len(region) + newline + 1
+                        break
+                    newline = region.rfind('\n', page_offset, runs[index][0])
+                
+                tail = [page_text[page_text.rfind('\n') + 1:]]
+                dangling = bool(runs) and runs[-1][1] == len(region) and '\n' in region[runs[-1][0]:]
+            
+            if split:
+                buffer = ''.join(carry)
+                yield buffer[:split], carry_starts
+                carry = [buffer[split:]]
+                carry_length -= split
+                carry_starts = [(0, _page_at(carry_starts, split))] + [
+                    (offset - split, page) for offset, page in carry_starts if offset > split]
+            elif len(carry_starts) > 1 and carry_starts[1][0] == 0:
+                # Page after an empty carry: it starts the carry
+                del carry_starts[0]
+        if carry_length:
+            yield ''.join(carry), carry_starts
+
+    def scan_text(self, text, page_starts=None):
+        """Scan text once for REQ, bullet and gap matches as (text, page) pairs
+        
+        Gap matches also carry the characteristics named on their GAP line.
+        """
+        page_at = _page_locator(page_starts or [(0, None)])
         
         # Look for requirement patterns (REQ-XXX-NNN)
-        req_pattern = r'REQ-[A-Z]+-\d{3}:\s*([^\n]+)'
-        req_matches = re.findall(req_pattern, text)
+        req_matches = [(m.group(1), page_at(m.start()))
+                       for m in REQ_PATTERN.finditer(text)]
         
         # Also look for bullet points with requirements
-        bullet_pattern = r'[•▪]\s*([^•\n]+(?:requirement|must|shall|should)[^•\n]+)'
-        bullet_matches = re.findall(bullet_pattern, text, re.IGNORECASE)
-        
-        # Look for gaps
-        gap_pattern = r'GAP-\d{3}[^\n]*' + characteristic + r'[^\n]*([^\n]+)'
-        gap_matches = re.findall(gap_pattern, text, re.IGNORECASE)
-        
-        # Check which requirements match this characteristic
-        char_keywords = self.characteristics[characteristic]['keywords']
-        
-        for req in req_matches + bullet_matches:
-            req_lower = req.lower()
-            if any(keyword in req_lower for keyword in char_keywords):
-                # Determine information state
-                info_state = self._determine_info_state(req)
-                # Determine measure type
-                measure_type = self._determine_measure_type(req)
-                
-                requirements.append({
-                    'requirement': req.strip(),
+        bullet_matches = [(bullet, page_at(start))
+                          for start, bullet in iter_bullet_matches(text)]
+        
+        # Look for gaps; the captured gap text is the last character of the line
+        gap_matches = []
+        for m in GAP_LINE_PATTERN.finditer(text):
+            remainder = m.group(1)
+            chars = [char for char, pattern in self._gap_patterns.items()
+                     if pattern.search(remainder)]
+            if chars:
+                gap_matches.append((remainder[-1], page_at(m.start()), chars))
+        
+        return req_matches, bullet_matches, gap_matches
+
+    def extract_requirements(self, text, characteristic, page_starts=None):
+        """Extract requirements for a specific characteristic from text"""
+        return self.extract_all_requirements(text, page_starts)[characteristic]
+
+    def extract_all_requirements(self, text, page_starts=None):
+        """Extract requirements and gaps for every characteristic in one scan"""
+        req_matches, bullet_matches, gap_matches = self.scan_text(text, page_starts)
+        return self.build_requirements(req_matches + bullet_matches, gap_matches)
+
+    def build_requirements(self, req_matches, gap_matches):
+        """Classify matched requirement and gap text against all characteristics"""
+        extracted = {char: ([], []) for char in self.characteristics}
+        
+        for req, page in req_matches:
+            # Label the requirement against every vocabulary in one pass
+            labels = self.keyword_automaton.classify(req.lower())
+            matched = labels['characteristic']
+            if not matched:
+                continue
+            
+            # Information state and measure type do not depend on the characteristic
+            info_state = labels['info_state'][0] if labels['info_state'] else 'processing'
+            measure_type = labels['measure_type'][0] if labels['measure_type'] else 'technology'
+            requirement = req.strip()
+            
+            for characteristic in matched:
+                extracted[characteristic][0].append({
+                    'requirement': requirement,
                     'characteristic': characteristic,
                     'info_state': info_state,
                     'measure_type': measure_type,
-                    'source': 'technical_specification'
+                    'source': 'technical_specification',
+                    'page': page
                 })
         
         # Process gaps
-        for gap in gap_matches:
-            gaps.append({
-                'gap': gap.strip(),
-                'characteristic': characteristic,
-                'identified': True
-            })
+        for gap, page, chars in gap_matches:
+            for characteristic in chars:
+                extracted[characteristic][1].append({
+                    'gap': gap.strip(),
+                    'characteristic': characteristic,
+                    'identified': True,
+                    'page': page
+                })
         
         # Check if characteristic is underrepresented
-        if len(requirements) < 2:
-            gaps.append({
-                'gap': f'Limited requirements found for {characteristic}',
-                'characteristic': characteristic,
-                'identified': False
-            })
+        for characteristic, (requirements, gaps) in extracted.items():
+            if len(requirements) < 2:
+                gaps.append({
+                    'gap': f'Limited requirements found for {characteristic}',
+                    'characteristic': characteristic,
+                    'identified': False
+                })
         
-        return requirements, gaps
+        return extracted
 
     def _determine_info_state(self, text):
         """Determine the information state from requirement text"""
-        text_lower = text.lower()
-        for state, keywords in self.info_states.items():
-            if any(keyword in text_lower for keyword in keywords):
-                return state
-        return 'processing'  # default
+        states = self.keyword_automaton.classify(text.lower())['info_state']
+        return states[0] if states else 'processing'  # default
 
     def _determine_measure_type(self, text):
         """Determine the IA measure type from requirement text"""
-        text_lower = text.lower()
-        for measure, keywords in self.measure_types.items():
-            if any(keyword in text_lower for keyword in keywords):
-                return measure
-        return 'technology'  # default
-
-    def parse_specification(self, pdf_path):
-        """Main parsing function"""
-        # Extract text from PDF
-        text = self.extract_text_from_pdf(pdf_path)
-        if not text:
+        measures = self.keyword_automaton.classify(text.lower())['measure_type']
+        return measures[0] if measures else 'technology'  # default
+
+    def parse_specification(self, pdf_path, pages=None):
+        """Main parsing function
+        
+        pages optionally supplies the (page_number, text) stream, e.g. wrapped
+        to report progress; the cache is still keyed on the file at pdf_path.
+        """
+        metrics = self.metrics
+        if metrics is None:
+            return self._parse_cached(pdf_path, pages)
+        
+        record = metrics.begin_document(pdf_path.split('/')[-1])
+        with metrics.stage('parse'):
+            results = self._parse_cached(pdf_path, pages)
+        if record['status'] is None:
+            metrics.set_status('parsed' if results else 'failed')
+        return results
+    
+    def _parse_cached(self, pdf_path, pages=None):
+        if self.cache is None:
+            return self.parse_document(pdf_path, pages)
+        
+        # Serve unchanged documents from the content-addressed cache
+        try:
+            cache_key = self.cache.key(pdf_path, parser_fingerprint(self, PARSER_VERSION))
+        except OSError as e:
+            print(f"Error reading PDF: {e}")
             return None
         
-        # Parse requirements for each characteristic
+        with self.metrics.stage('cache_lookup') if self.metrics else nullcontext():
+            results = self.cache.get(cache_key)
+        if results is not None:
+            if self.metrics:
+                self.metrics.set_status('cached')
+            # Identical bytes may be cached under another file name
+            results['metadata']['document'] = pdf_path.split('/')[-1]
+            return results
+        
+        results = self.parse_document(pdf_path, pages)
+        if results:
+            self.cache.put(cache_key, results)
+        return results
+
+    def parse_document(self, pdf_path, pages=None):
+        """Parse a document without consulting the cache
+        
+        pages may supply the document's (page_number, text) stream in place
+        of reading it from pdf_path.
+        """
+        metrics = self.metrics
+        try:
+            scanned = None
+            if pages is None and self.page_workers > 1:
+                # Long documents are split into page ranges scanned in parallel
+                from page_ranges import scan_page_ranges
+                scanned = scan_page_ranges(self, pdf_path, self.page_workers)
+            if scanned is None:
+                scanned = self.scan_pages(self.iter_pdf_pages(pdf_path) if pages is None else pages)
+        except Exception as e:
+            print(f"Error reading PDF: {e}")
+            return None
+        req_matches, bullet_matches, gap_matches, has_text = scanned
+        if not has_text:
+            return None
+        
+        if metrics:
+            metrics.count('matches_requirement', len(req_matches))
+            metrics.count('matches_bullet', len(bullet_matches))
+            metrics.count('matches_gap', len(gap_matches))
+        with metrics.stage('classification') if metrics else nullcontext():
+            extracted = self.build_requirements(req_matches + bullet_matches, gap_matches)
+            return self.assemble_results(pdf_path, extracted)
+
+    def scan_pages(self, pages):
+        """Match requirements in a page stream as the pages arrive
+        
+        Returns (req_matches, bullet_matches, gap_matches, has_text).
+        """
+        metrics = self.metrics
+        req_matches, bullet_matches, gap_matches = [], [], []
+        has_text = False
+        if metrics:
+            pages = metrics.timed_pages(pages)
+        for chunk, page_starts in self.iter_text_chunks(pages):
+            has_text = True
+            with metrics.stage('requirement_extraction') if metrics else nullcontext():
+                chunk_reqs, chunk_bullets, chunk_gaps = self.scan_text(chunk, page_starts)
+            req_matches.extend(chunk_reqs)
+            bullet_matches.extend(chunk_bullets)
+            gap_matches.extend(chunk_gaps)
+        return req_matches, bullet_matches, gap_matches, has_text
+
+    def assemble_results(self, pdf_path, extracted):
+        """Build the results structure from per-characteristic requirements and gaps
+        
+        With dedup, canonical IDs are clustered within this document only;
+        requirements_store clusters wording across documents.
+        """
         results = {
             'metadata': {
                 'document': pdf_path.split('/')[-1],
                 'parsed_date': datetime.now().isoformat(),
-                'parser_version': '1.0'
+                'parser_version': PARSER_VERSION
             },
             'characteristics': {},
             'summary': {
@@ -166,9 +479,7 @@ class VentilatorSpecParser:
             }
         }
         
-        for characteristic in self.characteristics:
-            requirements, gaps = self.extract_requirements(text, characteristic)
-            
+        for characteristic, (requirements, gaps) in extracted.items():
             results['characteristics'][characteristic] = {
                 'requirements': requirements,
                 'gaps': gaps,
@@ -179,15 +490,24 @@ class VentilatorSpecParser:
             results['summary']['total_gaps'] += len(gaps)
             results['summary']['coverage'][characteristic] = 'Good' if len(requirements) >= 3 else 'Limited'
         
+        if self.dedup:
+            # The same requirement is often filed under several characteristics
+            unique = RequirementDeduplicator().annotate(results)
+            results['summary']['unique_requirements'] = unique
+            if self.metrics:
+                self.metrics.count('duplicate_requirements', results['summary']['total_requirements'] - unique)
+        
         return results
 
     def generate_spreadsheet_output(self, results):
         """Generate a spreadsheet-compatible output"""
-        rows = []
-        
+        return list(self.iter_spreadsheet_rows(results))
+    
+    def iter_spreadsheet_rows(self, results):
+        """Yield spreadsheet rows one at a time, header first"""
         # Header row
-        rows.append(['Characteristic', 'Requirement', 'Information State', 
-                    'Measure Type', 'Gap Identified', 'Coverage'])
+        yield ['Characteristic', 'Requirement', 'Information State', 
+               'Measure Type', 'Gap Identified', 'Coverage']
         
         # Data rows
         for char, data in results['characteristics'].items():
@@ -195,27 +515,25 @@ class VentilatorSpecParser:
             
             # Add requirements
             for req in data['requirements']:
-                rows.append([
+                yield [
                     char,
                     req['requirement'],
                     req['info_state'],
                     req['measure_type'],
                     'No',
                     coverage
-                ])
+                ]
             
             # Add gaps
             for gap in data['gaps']:
-                rows.append([
+                yield [
                     char,
                     '',
                     '',
                     '',
                     gap['gap'],
                     coverage
-                ])
-        
-        return rows
+                ]
 
     def convert_to_ia_json_schema(self, results):
         """Convert parsed results to IA framework JSON schema format"""
@@ -261,49 +579,617 @@ class VentilatorSpecParser:
                     "measure_type": req['measure_type'],
                     "description": f"{char} - {req['info_state']} - {req['measure_type']}",
                     "requirement": req['requirement'],
-                    "source": "Synthetic_Ventilator_Model_1X_Spec.pdf",
+                    "source": results['metadata']['document'],
                     "value": 1  # Indicates requirement exists
                 }
         
         return ia_json
 
-def main():
-    if len(sys.argv) < 2:
-        # Default to synthetic ventilator spec
-        pdf_path = 'client/public/pdf/Synthetic_Ventilator_Model_1X_Spec.pdf'
-    else:
-        pdf_path = sys.argv[1]
+def iter_result_records(results):
+    """Flatten parsed results into one record per requirement and gap
     
-    parser = VentilatorSpecParser()
-    results = parser.parse_specification(pdf_path)
+    The stream opens with a metadata record and closes with a summary record.
+    """
+    document = results['metadata']['document']
+    yield dict(results['metadata'], record_type='metadata')
+    for data in results['characteristics'].values():
+        for req in data['requirements']:
+            yield dict(req, record_type='requirement', document=document)
+        for gap in data['gaps']:
+            yield dict(gap, record_type='gap', document=document)
+    yield dict(results['summary'], record_type='summary', document=document)
+
+def write_ndjson(records, f):
+    """Write each record as one compact JSON line as it is produced; returns the count"""
+    count = 0
+    for record in records:
+        f.write(json.dumps(record, separators=(',', ':')) + '\n')
+        count += 1
+    return count
+
+def write_outputs(parser, results, json_path, ia_path, csv_path, output_format='json', compact=False):
+    """Write parsed results, IA framework JSON and spreadsheet CSV for one document
     
-    if results:
-        # Save parsed results
-        with open('parsed_ventilator_spec.json', 'w') as f:
-            json.dump(results, f, indent=2)
-        
-        # Generate IA framework compatible JSON
+    output_format 'ndjson' writes the parsed results as NDJSON records instead
+    of one JSON document; compact drops the indentation from JSON output.
+    Spreadsheet rows are streamed to the CSV without building a row list.
+    """
+    metrics = parser.metrics
+    indent = None if compact else 2
+    separators = (',', ':') if compact else None
+    
+    def stage(name):
+        return metrics.stage(name) if metrics else nullcontext()
+    
+    # Save parsed results
+    with stage(f'write_parsed_{output_format}'):
+        with open(json_path, 'w') as f:
+            if output_format == 'ndjson':
+                write_ndjson(iter_result_records(results), f)
+            else:
+                json.dump(results, f, indent=indent, separators=separators)
+    
+    # Generate IA framework compatible JSON
+    with stage('convert_to_ia_json_schema'):
         ia_json = parser.convert_to_ia_json_schema(results)
-        with open('ventilator_ia_requirements.json', 'w') as f:
-            json.dump(ia_json, f, indent=2)
+    with stage('write_ia_json'):
+        with open(ia_path, 'w') as f:
+            json.dump(ia_json, f, indent=indent, separators=separators)
+    
+    # Stream spreadsheet rows straight into the CSV
+    with stage('write_csv'):
+        with open(csv_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerows(parser.iter_spreadsheet_rows(results))
+    
+    if metrics:
+        metrics.count(f'bytes_parsed_{output_format}', os.path.getsize(json_path))
+        metrics.count('bytes_ia_json', os.path.getsize(ia_path))
+        metrics.count('bytes_csv', os.path.getsize(csv_path))
+
+def collect_spec_paths(target):
+    """Expand a directory or glob pattern into a sorted list of document paths
+    
+    A directory contributes every file in a format some text backend reads.
+    """
+    if os.path.isdir(target):
+        extensions = supported_extensions()
+        return sorted(path for path in glob.glob(os.path.join(target, '*'))
+                      if os.path.isfile(path) and os.path.splitext(path)[1].lower() in extensions)
+    return sorted(path for path in glob.glob(target) if os.path.isfile(path))
+
+def document_output_paths(output_dir, pdf_path, output_format='json'):
+    """Per-document output file paths inside a batch output directory
+    
+    Names carry the document's extension and a short hash of its absolute
+    path, so spec.pdf and spec.docx, or spec.pdf from two vendor
+    directories, write separate outputs.
+    """
+    name, extension = os.path.splitext(os.path.basename(pdf_path))
+    path_hash = hashlib.sha256(os.path.abspath(pdf_path).encode('utf-8')).hexdigest()[:8]
+    stem = f"{name}_{extension.lstrip('.').lower() or 'noext'}_{path_hash}"
+    return {
+        'parsed': os.path.join(output_dir, f'{stem}_parsed.{output_format}'),
+        'ia_requirements': os.path.join(output_dir, f'{stem}_ia_requirements.json'),
+        'spreadsheet': os.path.join(output_dir, f'{stem}_security_analysis.csv')
+    }
+
+def output_collisions(pdf_paths, output_dir, output_format='json'):
+    """Pairs of documents whose batch outputs would overwrite each other"""
+    owners = {}
+    collisions = []
+    for pdf_path in pdf_paths:
+        parsed = document_output_paths(output_dir, pdf_path, output_format)['parsed']
+        if parsed in owners:
+            collisions.append((owners[parsed], pdf_path))
+        else:
+            owners[parsed] = pdf_path
+    return collisions
+
+# Each pool worker builds its own parser once instead of once per document
+_worker_parser = None
+# {'budget_bytes': ...} when documents are parsed under memory profiling
+_worker_memory = None
+# (output_format, compact) passed on to write_outputs
+_worker_output = ('json', False)
+
+def _init_batch_worker(cache_dir=None, cache_max_bytes=DEFAULT_MAX_BYTES, metrics=False, memory=None,
+                       output=('json', False), dedup=False, backend_routes=None):
+    global _worker_parser, _worker_memory, _worker_output
+    cache = ParseCache(cache_dir, cache_max_bytes) if cache_dir else None
+    _worker_parser = VentilatorSpecParser(cache=cache, metrics=ParseMetrics() if metrics else None,
+                                          dedup=dedup, backend_routes=backend_routes)
+    _worker_memory = memory
+    _worker_output = output
+    # Under a per-document time budget the first document must not pay for imports
+    prepare_backends()
+
+def _write_batch_outputs(results, pdf_path, output_dir):
+    output_format, compact = _worker_output
+    outputs = document_output_paths(output_dir, pdf_path, output_format)
+    write_outputs(_worker_parser, results, outputs['parsed'], outputs['ia_requirements'],
+                  outputs['spreadsheet'], output_format, compact)
+    return outputs
+
+def _parse_batch_document(pdf_path, output_dir):
+    """Parse one document inside a pool worker and write its outputs"""
+    if _worker_memory is not None:
+        return _parse_batch_document_profiled(pdf_path, output_dir)
+    
+    cache = _worker_parser.cache
+    hits_before = cache.hits if cache else 0
+    results = _worker_parser.parse_specification(pdf_path)
+    cache_status = None
+    if cache:
+        cache_status = 'hit' if cache.hits > hits_before else 'miss'
+    if not results:
+        return {'document': pdf_path, 'status': 'failed', 'cache': cache_status,
+                'metrics': _take_worker_metrics()}
+    
+    outputs = _write_batch_outputs(results, pdf_path, output_dir)
+    return {
+        'document': pdf_path,
+        'status': 'parsed',
+        'summary': results['summary'],
+        'outputs': outputs,
+        'cache': cache_status,
+        'metrics': _take_worker_metrics()
+    }
+
+def _parse_batch_document_profiled(pdf_path, output_dir):
+    """Parse one document under tracemalloc and its memory budget, bypassing the cache"""
+    from parse_memory import profile_document
+    metrics = _worker_parser.metrics
+    if metrics:
+        metrics.begin_document(os.path.basename(pdf_path))
+    results, report = profile_document(_worker_parser, pdf_path, _worker_memory['budget_bytes'])
+    if metrics:
+        metrics.set_status(report['status'])
+    memory = {key: report[key] for key in ('status', 'mode', 'peak_bytes', 'phases')}
+    if not results:
+        return {'document': pdf_path, 'status': report['status'], 'memory': memory,
+                'metrics': _take_worker_metrics()}
+    
+    outputs = _write_batch_outputs(results, pdf_path, output_dir)
+    return {
+        'document': pdf_path,
+        'status': 'parsed',
+        'summary': results['summary'],
+        'outputs': outputs,
+        'memory': memory,
+        'metrics': _take_worker_metrics()
+    }
+
+def _take_worker_metrics():
+    """Hand this worker's document records back to the parent process"""
+    metrics = _worker_parser.metrics
+    if metrics is None:
+        return None
+    records, metrics.records = metrics.records, []
+    return records
+
+def merge_corpus_summary(document_results):
+    """Merge per-document summaries into a single corpus summary"""
+    corpus = {
+        'metadata': {
+            'parsed_date': datetime.now().isoformat(),
+            'parser_version': PARSER_VERSION,
+            'documents': len(document_results),
+            'parsed': 0,
+            'failed': []
+        },
+        'summary': {
+            'total_requirements': 0,
+            'total_gaps': 0,
+            'coverage': {}
+        },
+        'documents': []
+    }
+    
+    for doc in document_results:
+        if doc.get('cache'):
+            cache_counts = corpus['metadata'].setdefault('cache', {'hits': 0, 'misses': 0})
+            cache_counts['hits' if doc['cache'] == 'hit' else 'misses'] += 1
         
-        # Generate spreadsheet data
-        spreadsheet_data = parser.generate_spreadsheet_output(results)
+        if doc['status'] == 'skipped':
+            # Over the memory budget even in streaming mode
+            corpus['metadata'].setdefault('skipped', []).append(doc['document'])
+            continue
+        if doc['status'] == 'timeout':
+            corpus['metadata'].setdefault('timed_out', []).append({
+                'document': doc['document'],
+                'budget': doc['budget'],
+                'elapsed_seconds': doc['elapsed_seconds']
+            })
+            continue
+        if doc['status'] != 'parsed':
+            corpus['metadata']['failed'].append(doc['document'])
+            continue
         
-        # Save as CSV
-        import csv
-        with open('ventilator_security_analysis.csv', 'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerows(spreadsheet_data)
+        summary = doc['summary']
+        corpus['metadata']['parsed'] += 1
+        corpus['summary']['total_requirements'] += summary['total_requirements']
+        corpus['summary']['total_gaps'] += summary['total_gaps']
+        for char, coverage in summary['coverage'].items():
+            counts = corpus['summary']['coverage'].setdefault(char, {'Good': 0, 'Limited': 0})
+            counts[coverage] += 1
+        corpus['documents'].append({
+            'document': doc['document'],
+            'summary': summary,
+            'outputs': doc['outputs']
+        })
+        if doc.get('memory'):
+            corpus['documents'][-1]['memory'] = doc['memory']
+    
+    return corpus
+
+def _budgeted_result(pdf_path, result):
+    """Batch record of a document whose isolated worker returned result"""
+    if isinstance(result, BudgetExceeded):
+        return {'document': pdf_path, 'status': 'timeout', 'budget': result.reason,
+                'elapsed_seconds': round(result.elapsed, 3)}
+    if isinstance(result, Exception):
+        return {'document': pdf_path, 'status': 'failed', 'error': str(result)}
+    return result
+
+def load_retry_queue(queue_path):
+    """Retry queue entries by document path; empty if there is no queue"""
+    try:
+        with open(queue_path, 'r') as f:
+            return {entry['document']: entry for entry in json.load(f)['documents']}
+    except (OSError, ValueError, KeyError):
+        return {}
+
+def update_retry_queue(queue_path, document_results):
+    """Queue documents stopped by their budget for a later run; parsed ones leave the queue
+    
+    Returns the number of documents left in the queue.
+    """
+    queue = load_retry_queue(queue_path)
+    if not queue and not any(doc['status'] == 'timeout' for doc in document_results):
+        return 0
+    for doc in document_results:
+        if doc['status'] == 'timeout':
+            entry = queue.setdefault(doc['document'], {'document': doc['document'], 'attempts': 0})
+            entry['attempts'] += 1
+            entry['budget'] = doc['budget']
+            entry['elapsed_seconds'] = doc['elapsed_seconds']
+            entry['last_attempt'] = datetime.now().isoformat()
+        elif doc['status'] == 'parsed':
+            queue.pop(doc['document'], None)
+    
+    directory = os.path.dirname(os.path.abspath(queue_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'documents': sorted(queue.values(), key=lambda entry: entry['document'])}, f, indent=2)
+        os.replace(tmp_path, queue_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return len(queue)
+
+def _document_digest(pdf_path):
+    """Content hash of a document, or None if it cannot be read (its parse then fails)"""
+    try:
+        return file_digest(pdf_path)
+    except OSError:
+        return None
+
+def run_batch(target, output_dir, workers=None, cache_dir=None, cache_max_bytes=DEFAULT_MAX_BYTES,
+              metrics=None, memory_profile=False, memory_budget=None, output_format='json',
+              compact=False, dedup=False, backend_routes=None, doc_timeout=None, doc_cpu_seconds=None,
+              resume=True, shard=None, retry=False):
+    """Parse every document matched by a directory or glob across a process pool
+    
+    With a ParseMetrics, the records collected in each worker are merged into it.
+    With memory_profile or a memory_budget (bytes), each document is parsed
+    under tracemalloc; one over budget is re-parsed streaming or skipped.
+    output_format and compact are passed on to write_outputs. With dedup,
+    requirements are tagged with canonical IDs of their near-duplicate clusters
+    within each document.
+    backend_routes picks the text backend of each document format.
+    
+    With doc_timeout or doc_cpu_seconds, each document is parsed in an
+    isolated worker that is killed and replaced once the document runs past
+    that many wall-clock or CPU seconds; such documents are recorded in the
+    output directory's retry queue. target may also be a list of paths.
+    
+    Each finished document is checkpointed in the output directory's run
+    manifest. With resume, documents the manifest already records as finished
+    at the same content hash are not parsed again, so an interrupted run picks
+    up where it stopped and merges the same corpus summary.
+    
+    With shard (index, count), only the documents whose content hash falls in
+    that shard are parsed, for merging with the other shards by corpus_shards.
+    
+    With retry, target is the retry queue of an earlier run into output_dir;
+    the other documents its manifest records join the corpus, so the corpus
+    files keep covering the whole run.
+    """
+    pdf_paths = sorted(target) if isinstance(target, list) else collect_spec_paths(target)
+    if not pdf_paths:
+        print(f"No specification documents found for {target}")
+        return None
+    collisions = output_collisions(pdf_paths, output_dir, output_format)
+    if collisions:
+        for first, second in collisions:
+            print(f"Output collision: {first} and {second} would write the same files")
+        return None
+    
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    memory = {'budget_bytes': memory_budget} if memory_profile or memory_budget else None
+    
+    initargs = (cache_dir, cache_max_bytes, metrics is not None, memory, (output_format, compact),
+                dedup, backend_routes)
+    
+    start = time.perf_counter()
+    key = run_key(parser_fingerprint(VentilatorSpecParser(dedup=dedup, backend_routes=backend_routes),
+                                     PARSER_VERSION),
+                  memory=memory, output_format=output_format, compact=compact)
+    digests = {pdf_path: _document_digest(pdf_path) for pdf_path in pdf_paths}
+    if shard:
+        index, count = shard
+        pdf_paths = [pdf_path for pdf_path in pdf_paths
+                     if document_shard(pdf_path, digests[pdf_path], count) == index]
+    recycled = None
+    with RunManifest(os.path.join(output_dir, MANIFEST_NAME), key, resume or retry) as manifest:
+        finished = {}
+        for pdf_path in pdf_paths:
+            result = manifest.finished(pdf_path, digests[pdf_path])
+            if result is not None:
+                finished[pdf_path] = result
+        pending = [pdf_path for pdf_path in pdf_paths if pdf_path not in finished]
+        if finished:
+            print(f"Resuming: {len(finished)} of {len(pdf_paths)} documents already finished "
+                  f"in {manifest.path}")
+        
+        def checkpoint(pdf_path, doc):
+            # Metrics stay with this process; the manifest keeps the batch record
+            if metrics is not None:
+                metrics.records.extend(doc.pop('metrics', None) or [])
+            else:
+                doc.pop('metrics', None)
+            manifest.record(doc, digests[pdf_path])
+            finished[pdf_path] = doc
+        
+        if pending and (doc_timeout or doc_cpu_seconds):
+            pool = IsolatedPool(workers, _init_batch_worker, initargs, doc_timeout, doc_cpu_seconds)
+            pool.map(_parse_batch_document, pending, [output_dir] * len(pending),
+                     callback=lambda index, result: checkpoint(
+                         pending[index], _budgeted_result(pending[index], result)))
+            recycled = pool.recycled
+        elif pending:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                                     initargs=initargs) as pool:
+                futures = {pool.submit(_parse_batch_document, pdf_path, output_dir): pdf_path
+                           for pdf_path in pending}
+                for future in as_completed(futures):
+                    checkpoint(futures[future], future.result())
+        earlier = {document: entry['result'] for document, entry in manifest.entries.items()
+                   if document not in finished} if retry else {}
+    elapsed = time.perf_counter() - start
+    # Merged in path order, whichever run each document finished in
+    finished.update(earlier)
+    document_results = [finished[pdf_path] for pdf_path in sorted(finished)]
+    
+    corpus = merge_corpus_summary(document_results)
+    corpus['metadata']['elapsed_seconds'] = round(elapsed, 3)
+    corpus['metadata']['documents_per_second'] = round(len(pending) / elapsed, 2) if elapsed else None
+    if len(pending) < len(pdf_paths):
+        corpus['metadata']['resumed'] = len(pdf_paths) - len(pending)
+    if shard:
+        corpus['metadata']['shards'] = [shard[0]]
+        corpus['metadata']['shard_count'] = shard[1]
+    if recycled is not None:
+        corpus['metadata']['workers_recycled'] = recycled
+    queued = update_retry_queue(os.path.join(output_dir, RETRY_QUEUE_NAME), document_results)
+    
+    if retry and not earlier:
+        # Without the earlier run's records the corpus would shrink to the retried documents
+        print(f"No earlier documents in {os.path.join(output_dir, MANIFEST_NAME)}; "
+              f"leaving the corpus files unchanged")
+    else:
+        with open(os.path.join(output_dir, CORPUS_SUMMARY_NAME), 'w') as f:
+            json.dump(corpus, f, indent=2)
+        with open(os.path.join(output_dir, CORPUS_IA_NAME), 'w') as f:
+            json.dump(corpus_ia_json(document_results), f, indent=2)
+    
+    shard_label = f" in shard {shard[0]}/{shard[1]}" if shard else ''
+    print(f"Batch complete: {corpus['metadata']['parsed']}/{corpus['metadata']['documents']} documents "
+          f"parsed{shard_label} with {workers} workers")
+    for failed in corpus['metadata']['failed']:
+        print(f"  Failed: {failed}")
+    for skipped in corpus['metadata'].get('skipped', []):
+        print(f"  Skipped (over memory budget): {skipped}")
+    for timed_out in corpus['metadata'].get('timed_out', []):
+        print(f"  Timed out ({timed_out['budget']} budget, {timed_out['elapsed_seconds']:.1f}s): "
+              f"{timed_out['document']}")
+    if queued:
+        print(f"Retry queue: {queued} documents in {os.path.join(output_dir, RETRY_QUEUE_NAME)}")
+    print(f"Total requirements found: {corpus['summary']['total_requirements']}")
+    print(f"Total gaps identified: {corpus['summary']['total_gaps']}")
+    if 'cache' in corpus['metadata']:
+        cache_counts = corpus['metadata']['cache']
+        print(f"Cache: {cache_counts['hits']} hits, {cache_counts['misses']} misses")
+    print(f"Throughput: {corpus['metadata']['documents_per_second']} documents/second "
+          f"({elapsed:.2f}s elapsed)")
+    return corpus
+
+def write_metrics(metrics, jsonl_path=None, prom_path=None):
+    """Emit collected instrumentation to whichever outputs were requested"""
+    if metrics is None:
+        return
+    if jsonl_path:
+        metrics.write_jsonl(jsonl_path)
+    if prom_path:
+        metrics.write_prometheus(prom_path)
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Parse ventilator technical specification PDFs')
+    arg_parser.add_argument('pdf_path', nargs='?',
+                            default='client/public/pdf/Synthetic_Ventilator_Model_1X_Spec.pdf',
+                            help='Specification PDF, DOCX or text file to parse (defaults to the synthetic ventilator spec)')
+    arg_parser.add_argument('--batch', metavar='DIR_OR_GLOB',
+                            help='Parse every specification document in a directory or matching a glob pattern')
+    arg_parser.add_argument('--output-dir', default='parsed_specs',
+                            help='Directory for per-document outputs in batch mode')
+    arg_parser.add_argument('--workers', type=int, default=None,
+                            help='Worker processes for batch mode (defaults to CPU count)')
+    arg_parser.add_argument('--cache-dir', default=None,
+                            help='Directory of the content-addressed parse cache (disabled if omitted)')
+    arg_parser.add_argument('--cache-max-mb', type=float, default=DEFAULT_MAX_BYTES / (1024 * 1024),
+                            help='Size bound of the parse cache before LRU eviction, in MiB')
+    arg_parser.add_argument('--incremental', action='store_true',
+                            help='Re-extract and re-match only pages changed since the last parse')
+    arg_parser.add_argument('--metrics-jsonl', metavar='PATH',
+                            help='Append per-document stage timings and counters as JSON lines')
+    arg_parser.add_argument('--metrics-prom', metavar='PATH',
+                            help='Write stage timings and counters as a Prometheus text file')
+    arg_parser.add_argument('--memory-profile', action='store_true',
+                            help='Track peak memory and top allocation sites per document')
+    arg_parser.add_argument('--memory-budget-mb', type=float, default=None,
+                            help='Per-document memory budget; documents over it are re-parsed '
+                                 'streaming or skipped (implies --memory-profile)')
+    arg_parser.add_argument('--format', choices=['json', 'ndjson'], default='json',
+                            help='Parsed results as one JSON document or one NDJSON record per '
+                                 'requirement and gap')
+    arg_parser.add_argument('--compact', action='store_true',
+                            help='Write JSON output without indentation')
+    arg_parser.add_argument('--page-workers', type=int, default=None,
+                            help='Split a long document into page ranges parsed by this many processes')
+    arg_parser.add_argument('--dedup', action='store_true',
+                            help='Tag requirements with the canonical ID of their near-duplicate cluster '
+                                 'within the document (--store clusters across documents)')
+    arg_parser.add_argument('--store', metavar='DB',
+                            help='Also add the parsed results to this SQLite requirements store')
+    arg_parser.add_argument('--backends', metavar='PATH',
+                            help='Text backend routes from a text_backends.py calibration file')
+    arg_parser.add_argument('--doc-timeout', type=float, default=None,
+                            help='Batch mode: wall-clock seconds per document before its worker is '
+                                 'killed and the document queued for retry')
+    arg_parser.add_argument('--doc-cpu-seconds', type=float, default=None,
+                            help='Batch mode: CPU seconds per document, enforced the same way')
+    arg_parser.add_argument('--retry', action='store_true',
+                            help="Parse only the documents in the output directory's retry queue")
+    arg_parser.add_argument('--no-resume', action='store_true',
+                            help="Batch mode: parse every document again instead of resuming from "
+                                 "the output directory's run manifest")
+    arg_parser.add_argument('--shard', type=parse_shard_spec, metavar='INDEX/COUNT',
+                            help='Batch mode: parse only the documents whose content hash falls in this '
+                                 'shard, e.g. 0/4; merge shards with corpus_shards.py')
+    args = arg_parser.parse_args()
+    cache_max_bytes = int(args.cache_max_mb * 1024 * 1024)
+    metrics = ParseMetrics() if args.metrics_jsonl or args.metrics_prom else None
+    memory_budget = int(args.memory_budget_mb * 1024 * 1024) if args.memory_budget_mb else None
+    backend_routes = load_routes(args.backends) if args.backends else None
+    
+    if args.retry:
+        queue = load_retry_queue(os.path.join(args.output_dir, RETRY_QUEUE_NAME))
+        if not queue:
+            print(f"No documents in the retry queue of {args.output_dir}")
+            return
+        args.batch = list(queue)
+    
+    if args.batch:
+        corpus = run_batch(args.batch, args.output_dir, args.workers, args.cache_dir, cache_max_bytes,
+                           metrics, args.memory_profile, memory_budget, args.format, args.compact,
+                           args.dedup, backend_routes, args.doc_timeout, args.doc_cpu_seconds,
+                           not args.no_resume, args.shard, args.retry)
+        if corpus and args.store:
+            from requirements_store import RequirementStore
+            with RequirementStore(args.store) as store:
+                stored = store.ingest_files([doc['outputs']['parsed'] for doc in corpus['documents']],
+                                            sources=[doc['document'] for doc in corpus['documents']])
+            print(f"Stored {stored} documents in {args.store}")
+        write_metrics(metrics, args.metrics_jsonl, args.metrics_prom)
+        return
+    
+    pdf_path = args.pdf_path
+    
+    cache = ParseCache(args.cache_dir, cache_max_bytes) if args.cache_dir else None
+    parser = VentilatorSpecParser(cache=cache, metrics=metrics, dedup=args.dedup,
+                                  page_workers=args.page_workers, backend_routes=backend_routes)
+    changes = None
+    memory_report = None
+    if args.memory_profile or memory_budget:
+        from parse_memory import profile_document
+        if metrics:
+            metrics.begin_document(os.path.basename(pdf_path))
+        results, memory_report = profile_document(parser, pdf_path, memory_budget)
+        if metrics:
+            metrics.set_status(memory_report['status'])
+    elif args.incremental and backend_for(pdf_path, backend_routes).name != 'pypdf2':
+        # The page index fingerprints PyPDF2 page objects
+        print("Incremental parsing needs the pypdf2 backend; parsing the whole document")
+        results = parser.parse_specification(pdf_path)
+    elif args.incremental:
+        from incremental_parse import incremental_parse, index_path_for
+        from requirements_store import load_results
+        previous_path = f'parsed_ventilator_spec.{args.format}'
+        previous = None
+        if os.path.exists(previous_path):
+            previous = load_results(previous_path)
+            previous_document = previous['metadata'].get('document')
+            if previous_document != os.path.basename(pdf_path):
+                print(f"{previous_path} holds {previous_document}; not comparing requirements with it")
+                previous = None
+        if metrics:
+            metrics.begin_document(os.path.basename(pdf_path))
+        with metrics.stage('parse') if metrics else nullcontext():
+            results, changes = incremental_parse(parser, pdf_path, index_path_for(previous_path), previous)
+        if metrics:
+            metrics.set_status('parsed' if results else 'failed')
+    else:
+        results = parser.parse_specification(pdf_path)
+    
+    if results:
+        write_outputs(parser, results, f'parsed_ventilator_spec.{args.format}',
+                      'ventilator_ia_requirements.json', 'ventilator_security_analysis.csv',
+                      args.format, args.compact)
         
         print("Parsing complete!")
         print(f"Total requirements found: {results['summary']['total_requirements']}")
         print(f"Total gaps identified: {results['summary']['total_gaps']}")
+        if 'unique_requirements' in results['summary']:
+            print(f"Unique requirements after deduplication: {results['summary']['unique_requirements']}")
         print("\nCoverage by characteristic:")
         for char, coverage in results['summary']['coverage'].items():
             print(f"  {char}: {coverage}")
+        if changes:
+            print(f"\nRe-extracted {len(changes['pages_reextracted'])} of {changes['pages_total']} pages, "
+                  f"re-matched {changes['chunks_rematched']} of {changes['chunks_total']} chunks")
+        if changes and 'added' in changes:
+            print(f"Requirements added: {len(changes['added'])}, removed: {len(changes['removed'])}, "
+                  f"changed: {len(changes['changed'])}, moved to another page: {len(changes['moved'])}")
+            for req in changes['added']:
+                print(f"  + [{req['characteristic']}] {req['requirement']}")
+            for req in changes['removed']:
+                print(f"  - [{req['characteristic']}] {req['requirement']}")
+            for change in changes['changed']:
+                print(f"  ~ [{change['characteristic']}] {change['requirement']}")
+        if cache:
+            stats = cache.stats()
+            print(f"\nCache: {stats['hits']} hits, {stats['misses']} misses")
+        if args.store:
+            from requirements_store import RequirementStore
+            with RequirementStore(args.store) as store:
+                store.add_results(results, pdf_path)
+            print(f"\nStored in {args.store}")
+    elif memory_report and memory_report['status'] == 'skipped':
+        print(f"Skipped PDF: over the {args.memory_budget_mb:g} MiB memory budget even when streaming")
     else:
         print("Failed to parse PDF")
+    if memory_report:
+        print(f"\nMemory: {memory_report['status']} ({memory_report['mode']}), "
+              f"peak {memory_report['peak_bytes']['max'] / (1024 * 1024):.2f} MiB")
+        for phase, sites in memory_report['phases'].items():
+            print(f"  Top allocations during {phase}:")
+            for site in sites[:5]:
+                print(f"    {site['size_bytes'] / 1024:>10.1f} KiB  {site['site']}")
+    write_metrics(metrics, args.metrics_jsonl, args.metrics_prom)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate detection for requirement text. Each requirement is reduced
+to character shingles and a one-permutation MinHash signature;
+locality-sensitive hashing
+over signature bands finds candidate duplicates without comparing every
+pair, and candidates are confirmed by exact shingle Jaccard similarity.
+Every cluster of near-identical wording gets one canonical requirement ID.
+"""
+
+import re
+import sys
+import zlib
+import random
+import hashlib
+import argparse
+from array import array
+from collections import defaultdict
+
+SHINGLE_SIZE = 5
+DEFAULT_NUM_PERM = 64
+DEFAULT_BANDS = 16
+# Exact shingle Jaccard similarity at or above which two requirements are one
+DEFAULT_THRESHOLD = 0.8
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_WORD_PATTERN = re.compile(r'[a-z0-9]+')
+
+def normalize(text):
+    """Lower-case words only, so case, punctuation and spacing never tell requirements apart"""
+    return ' '.join(_WORD_PATTERN.findall(text.lower()))
+
+def shingle_hashes(normalized, size=SHINGLE_SIZE):
+    """32-bit hashes of the character shingles of normalized text
+
+    crc32 rather than hash() so hashes agree across processes and runs.
+    """
+    if len(normalized) <= size:
+        return {zlib.crc32(normalized.encode('utf-8'))}
+    encoded = normalized.encode('utf-8')
+    return {zlib.crc32(encoded[i:i + size]) for i in range(len(encoded) - size + 1)}
+
+def canonical_id(normalized):
+    """Stable ID of a cluster, derived from its representative's text"""
+    return 'CR-' + hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).hexdigest()
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+class MinHasher:
+    def __init__(self, num_perm=DEFAULT_NUM_PERM, seed=1):
+        """One permutation hashing: each shingle is hashed once into one of
+        num_perm bins, instead of once per permutation, and empty bins are
+        filled from the next non-empty bin (rotation densification)"""
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        # Universal hash (a * x + b) mod p mixing the linear crc32 shingle hashes
+        self.a = rng.randrange(1, _PRIME)
+        self.b = rng.randrange(0, _PRIME)
+        # Offset added per bin skipped, so borrowed values differ from the source bin's
+        self.offset = rng.randrange(1, _MAX_HASH)
+
+    def signature(self, hashes):
+        n = self.num_perm
+        a, b = self.a, self.b
+        bins = [None] * n
+        for h in hashes:
+            value, bin_index = divmod((a * h + b) % _PRIME, n)
+            current = bins[bin_index]
+            if current is None or value < current:
+                bins[bin_index] = value
+
+        # Walk leftwards round the bins from a non-empty one, so each empty
+        # bin borrows from its nearest non-empty bin to the right
+        start = next(i for i, value in enumerate(bins) if value is not None)
+        borrowed, distance = bins[start], 0
+        for step in range(1, n):
+            i = (start - step) % n
+            if bins[i] is not None:
+                borrowed, distance = bins[i], 0
+            else:
+                distance += 1
+                bins[i] = borrowed + distance * self.offset
+        return array('I', (value & _MAX_HASH for value in bins))
+
+class RequirementDeduplicator:
+    def __init__(self, threshold=DEFAULT_THRESHOLD, num_perm=DEFAULT_NUM_PERM, bands=DEFAULT_BANDS):
+        """Cluster requirement text as it is assigned
+
+        Signatures are split into bands of num_perm / bands rows; texts that
+        agree on every row of any band become candidates, then candidates
+        are confirmed by exact shingle Jaccard similarity.
+        """
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm)
+
+        # Canonical ID -> representative text, and its shingle hashes kept
+        # compactly as an array until a candidate needs verifying
+        self.canonical = {}
+        self._shingles = {}
+        # Normalized text already assigned -> canonical ID, skipping MinHash for repeats
+        self._assigned = {}
+        # Hash of (band, band rows) -> canonical IDs in that bucket; a
+        # colliding hash only adds a candidate that verification rejects
+        self._buckets = defaultdict(list)
+
+    def _band_keys(self, signature):
+        rows = self.rows
+        return [hash((band, *signature[band * rows:(band + 1) * rows])) for band in range(self.bands)]
+
+    def _register(self, cluster_id, text, normalized, hashes, signature):
+        self.canonical[cluster_id] = text
+        self._shingles[cluster_id] = array('I', hashes)
+        self._assigned.setdefault(normalized, cluster_id)
+        for key in self._band_keys(signature):
+            self._buckets[key].append(cluster_id)
+
+    def add(self, cluster_id, text, signature=None):
+        """Register an existing cluster, e.g. one loaded from a store; returns its signature"""
+        normalized = normalize(text)
+        hashes = shingle_hashes(normalized)
+        if signature is None:
+            signature = self.hasher.signature(hashes)
+        self._register(cluster_id, text, normalized, hashes, signature)
+        return signature
+
+    def alias(self, text, cluster_id):
+        """Record a wording already known to belong to a cluster"""
+        self._assigned.setdefault(normalize(text), cluster_id)
+
+    def assign(self, text):
+        """Canonical ID for a requirement, starting a new cluster if nothing is close enough
+
+        Returns (canonical ID, signature); the signature is None unless a
+        new cluster was started.
+        """
+        normalized = normalize(text)
+        cluster_id = self._assigned.get(normalized)
+        if cluster_id is not None:
+            return cluster_id, None
+
+        hashes = shingle_hashes(normalized)
+        signature = self.hasher.signature(hashes)
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(self._buckets.get(key, ()))
+
+        best, best_similarity = None, self.threshold
+        for candidate in sorted(candidates):
+            similarity = jaccard(hashes, set(self._shingles[candidate]))
+            if similarity >= best_similarity:
+                best, best_similarity = candidate, similarity
+        if best is not None:
+            self._assigned[normalized] = best
+            return best, None
+
+        cluster_id = canonical_id(normalized)
+        self._register(cluster_id, text, normalized, hashes, signature)
+        return cluster_id, signature
+
+    def annotate(self, results):
+        """Add a canonical_id to every requirement of parse results
+
+        Returns the number of distinct canonical requirements.
+        """
+        clusters = set()
+        for data in results['characteristics'].values():
+            for req in data['requirements']:
+                req['canonical_id'], _ = self.assign(req['requirement'])
+                clusters.add(req['canonical_id'])
+        return len(clusters)
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Cluster near-duplicate requirements in parsed outputs')
+    arg_parser.add_argument('paths', nargs='+', help='Parsed JSON/NDJSON output files')
+    arg_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                            help='Shingle Jaccard similarity at which requirements are duplicates')
+    arg_parser.add_argument('--top', type=int, default=20, help='Largest clusters to show')
+    args = arg_parser.parse_args()
+
+    from requirements_store import load_results
+    dedup = RequirementDeduplicator(args.threshold)
+    members = defaultdict(list)
+    total = 0
+    for path in args.paths:
+        results = load_results(path)
+        for data in results['characteristics'].values():
+            for req in data['requirements']:
+                cluster_id, _ = dedup.assign(req['requirement'])
+                members[cluster_id].append(req['requirement'])
+                total += 1
+
+    if not total:
+        print("No requirements found")
+        sys.exit(1)
+    print(f"{total} requirements in {len(members)} canonical requirements "
+          f"({100 * (1 - len(members) / total):.1f}% duplicates)")
+    largest = sorted(members.items(), key=lambda item: (-len(item[1]), item[0]))[:args.top]
+    for cluster_id, texts in largest:
+        variants = sorted(set(texts))
+        print(f"  {cluster_id} x{len(texts)}: {dedup.canonical[cluster_id]}")
+        for variant in variants[:3]:
+            if variant != dedup.canonical[cluster_id]:
+                print(f"      ~ {variant}")
+    if len(largest) < len(members):
+        print(f"  ... {len(members) - len(largest)} more")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+"""
+Persistent SQLite store of parsed specification requirements and gaps
+across the whole corpus. Results are bulk-inserted one transaction per
+batch, filtered through indexes on characteristic, info_state and
+measure_type, and searched with an FTS5 index over requirement text. The
+FTS index is filled with one set-based insert per batch rather than a
+trigger per row, which is several times faster on bulk ingest.
+
+Each distinct requirement wording is stored and indexed once, however many
+documents and characteristics repeat it, and near-duplicate wordings are
+linked to one canonical requirement by MinHash/LSH clustering.
+"""
+
+import os
+import sys
+import json
+import glob
+import sqlite3
+import argparse
+from array import array
+from datetime import datetime
+from requirement_dedup import RequirementDeduplicator
+
+SCHEMA_VERSION = 3
+
+SCHEMA = '''
+-- Keyed on the document's absolute path, as same-named specifications
+-- from different vendors are different documents
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    document TEXT NOT NULL,
+    parsed_date TEXT,
+    parser_version TEXT,
+    total_requirements INTEGER NOT NULL DEFAULT 0,
+    total_gaps INTEGER NOT NULL DEFAULT 0,
+    coverage TEXT,
+    ingested_at TEXT NOT NULL
+);
+
+-- Representative wording and MinHash signature of each near-duplicate cluster
+CREATE TABLE IF NOT EXISTS canonical_requirements (
+    id TEXT PRIMARY KEY,
+    requirement TEXT NOT NULL,
+    signature BLOB NOT NULL
+);
+
+-- Each distinct wording once; AUTOINCREMENT so ids never go backwards and
+-- a batch's new texts are those with id > its start
+CREATE TABLE IF NOT EXISTS requirement_texts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    text TEXT NOT NULL UNIQUE,
+    canonical_id TEXT NOT NULL REFERENCES canonical_requirements(id)
+);
+
+CREATE TABLE IF NOT EXISTS requirements (
+    id INTEGER PRIMARY KEY,
+    document_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    characteristic TEXT NOT NULL,
+    text_id INTEGER NOT NULL REFERENCES requirement_texts(id),
+    info_state TEXT NOT NULL,
+    measure_type TEXT NOT NULL,
+    source TEXT,
+    page INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS gaps (
+    id INTEGER PRIMARY KEY,
+    document_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    characteristic TEXT NOT NULL,
+    gap TEXT NOT NULL,
+    identified INTEGER NOT NULL,
+    page INTEGER
+);
+
+CREATE INDEX IF NOT EXISTS idx_documents_document ON documents(document);
+CREATE INDEX IF NOT EXISTS idx_requirements_characteristic
+    ON requirements(characteristic, info_state, measure_type);
+CREATE INDEX IF NOT EXISTS idx_requirements_info_state ON requirements(info_state, measure_type);
+CREATE INDEX IF NOT EXISTS idx_requirements_measure_type ON requirements(measure_type);
+CREATE INDEX IF NOT EXISTS idx_requirements_document ON requirements(document_id);
+CREATE INDEX IF NOT EXISTS idx_requirements_text ON requirements(text_id);
+CREATE INDEX IF NOT EXISTS idx_requirement_texts_canonical ON requirement_texts(canonical_id);
+CREATE INDEX IF NOT EXISTS idx_gaps_characteristic ON gaps(characteristic);
+CREATE INDEX IF NOT EXISTS idx_gaps_document ON gaps(document_id);
+
+-- Full-text index over distinct requirement texts, filled per batch by
+-- _add_batch. Texts are kept when the documents using them are removed
+CREATE VIRTUAL TABLE IF NOT EXISTS requirements_fts USING fts5(
+    text, content='requirement_texts', content_rowid='id'
+);
+'''
+
+# Columns a query may filter on directly
+FILTER_COLUMNS = ('characteristic', 'info_state', 'measure_type')
+
+def fts_query(text):
+    """FTS5 query matching every word of plain text, with no FTS syntax
+
+    'TLS 1.3' becomes '"TLS" "1.3"', so punctuation and operator words are
+    searched for rather than parsed.
+    """
+    return ' '.join('"' + word.replace('"', '""') + '"' for word in text.split())
+
+def load_results(path):
+    """Load parse results written as JSON, or rebuild them from NDJSON records"""
+    if not path.endswith('.ndjson'):
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    results = {'metadata': {}, 'characteristics': {}, 'summary': {}}
+    with open(path, 'r') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            record_type = record.pop('record_type')
+            if record_type == 'metadata':
+                results['metadata'] = record
+                continue
+            record.pop('document', None)
+            if record_type == 'summary':
+                results['summary'] = record
+                continue
+            entry = results['characteristics'].setdefault(
+                record['characteristic'], {'requirements': [], 'gaps': [], 'count': 0})
+            if record_type == 'requirement':
+                entry['requirements'].append(record)
+                entry['count'] += 1
+            else:
+                entry['gaps'].append(record)
+    return results
+
+class RequirementStore:
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self.connection.execute('PRAGMA synchronous = NORMAL')
+        version = self.connection.execute('PRAGMA user_version').fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            raise ValueError(f"{path} has schema version {version}, expected {SCHEMA_VERSION}; "
+                             f"re-ingest the parsed outputs into a new database")
+        self.connection.executescript(SCHEMA)
+        self.connection.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+        # Loaded on first insert: text -> requirement_texts id, and the
+        # clustering state of every canonical requirement stored so far
+        self._text_ids = None
+        self._dedup = None
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _insert_results(self, path, results):
+        """Insert one document's results, replacing any earlier version stored at path"""
+        metadata = results['metadata']
+        summary = results['summary']
+        document = metadata['document']
+        self.connection.execute('DELETE FROM documents WHERE path = ?', (path,))
+        cursor = self.connection.execute(
+            'INSERT INTO documents (path, document, parsed_date, parser_version, total_requirements, '
+            'total_gaps, coverage, ingested_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (path, document, metadata.get('parsed_date'), metadata.get('parser_version'),
+             summary.get('total_requirements', 0), summary.get('total_gaps', 0),
+             json.dumps(summary.get('coverage', {})), datetime.now().isoformat()))
+        document_id = cursor.lastrowid
+
+        self.connection.executemany(
+            'INSERT INTO requirements (document_id, characteristic, text_id, info_state, '
+            'measure_type, source, page) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            ((document_id, char, self._text_id(req['requirement']), req['info_state'],
+              req['measure_type'], req.get('source'), req.get('page'))
+             for char, data in results['characteristics'].items()
+             for req in data['requirements']))
+        self.connection.executemany(
+            'INSERT INTO gaps (document_id, characteristic, gap, identified, page) '
+            'VALUES (?, ?, ?, ?, ?)',
+            ((document_id, char, gap['gap'], int(gap['identified']), gap.get('page'))
+             for char, data in results['characteristics'].items()
+             for gap in data['gaps']))
+        return document_id
+
+    def _load_texts(self):
+        """Rebuild the text lookup and clustering state from the database"""
+        self._dedup = RequirementDeduplicator()
+        for cluster_id, text, signature in self.connection.execute(
+                'SELECT id, requirement, signature FROM canonical_requirements ORDER BY id'):
+            self._dedup.add(cluster_id, text, array('I', signature))
+        self._text_ids = {}
+        for text_id, text, cluster_id in self.connection.execute(
+                'SELECT id, text, canonical_id FROM requirement_texts'):
+            self._text_ids[text] = text_id
+            self._dedup.alias(text, cluster_id)
+
+    def _text_id(self, text):
+        """requirement_texts id of a wording, storing it and clustering it if new"""
+        text_id = self._text_ids.get(text)
+        if text_id is None:
+            cluster_id, signature = self._dedup.assign(text)
+            if signature is not None:
+                self.connection.execute(
+                    'INSERT INTO canonical_requirements (id, requirement, signature) VALUES (?, ?, ?)',
+                    (cluster_id, text, signature.tobytes()))
+            text_id = self.connection.execute(
+                'INSERT INTO requirement_texts (text, canonical_id) VALUES (?, ?)',
+                (text, cluster_id)).lastrowid
+            self._text_ids[text] = text_id
+        return text_id
+
+    def add_results(self, results, path=None, document=None):
+        """Store one document's parse results in a single transaction
+
+        path is the specification's location, which identifies the document;
+        without one, the document name stands in for it.
+        """
+        if document:
+            results = dict(results, metadata=dict(results['metadata'], document=document))
+        path = os.path.abspath(path) if path else results['metadata']['document']
+        self._add_batch([(path, results)])
+
+    def add_many(self, documents, batch_size=500):
+        """Store many (path, results) documents, committing once per batch_size documents"""
+        stored = 0
+        batch = []
+        for path, results in documents:
+            batch.append((path, results))
+            if len(batch) >= batch_size:
+                stored += self._add_batch(batch)
+                batch = []
+        if batch:
+            stored += self._add_batch(batch)
+        return stored
+
+    def _add_batch(self, batch):
+        if self._text_ids is None:
+            self._load_texts()
+        try:
+            with self.connection:
+                start = self.connection.execute(
+                    "SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence WHERE name = 'requirement_texts'"
+                ).fetchone()[0]
+                for path, results in batch:
+                    self._insert_results(path, results)
+                self.connection.execute(
+                    'INSERT INTO requirements_fts(rowid, text) '
+                    'SELECT id, text FROM requirement_texts WHERE id > ?', (start,))
+        except BaseException:
+            # The rolled-back texts and clusters must not stay in the lookups
+            self._text_ids = None
+            self._dedup = None
+            raise
+        return len(batch)
+
+    def ingest_files(self, paths, batch_size=500, sources=None):
+        """Store parsed JSON/NDJSON output files; returns the number stored
+
+        Each file is stored under its specification's path from sources
+        when given, otherwise under the output file's own absolute path.
+        """
+        keys = sources or paths
+        return self.add_many(((os.path.abspath(key), load_results(path)) for key, path in zip(keys, paths)),
+                             batch_size)
+
+    def remove_document(self, document):
+        """Remove a document by path, or every document of that name"""
+        with self.connection:
+            return self.connection.execute('DELETE FROM documents WHERE path = ? OR document = ?',
+                                           (os.path.abspath(document), document)).rowcount
+
+    def _select(self, columns, text, document, filters, raw=False):
+        """SQL and parameters selecting requirements that match every filter"""
+        unknown = set(filters) - set(FILTER_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown filters: {', '.join(sorted(unknown))}")
+
+        clauses = []
+        params = []
+        if text:
+            sql = (f'SELECT {columns} FROM requirements_fts '
+                   'JOIN requirement_texts t ON t.id = requirements_fts.rowid '
+                   'JOIN requirements r ON r.text_id = t.id '
+                   'JOIN documents d ON d.id = r.document_id')
+            clauses.append('requirements_fts MATCH ?')
+            params.append(text if raw else fts_query(text))
+        else:
+            sql = (f'SELECT {columns} FROM requirements r '
+                   'JOIN requirement_texts t ON t.id = r.text_id '
+                   'JOIN documents d ON d.id = r.document_id')
+        for column, value in filters.items():
+            if value is not None:
+                clauses.append(f'r.{column} = ?')
+                params.append(value)
+        if document is not None:
+            clauses.append('(d.document = ? OR d.path = ?)')
+            params += [document, os.path.abspath(document)]
+
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        return sql, params
+
+    def query(self, text=None, document=None, limit=None, raw=False, **filters):
+        """Requirements matching every given filter, best text matches first
+
+        text is plain text whose words must all appear, e.g. 'TLS 1.3', or
+        with raw an FTS5 query, e.g. 'encrypt* AND key'; document is a name
+        or path; filters may be characteristic, info_state and measure_type.
+        """
+        sql, params = self._select('r.*, t.text AS requirement, t.canonical_id, d.document, d.path',
+                                   text, document, filters, raw)
+        sql += ' ORDER BY requirements_fts.rank, r.id' if text else ' ORDER BY r.id'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        return [dict(row) for row in self.connection.execute(sql, params)]
+
+    def documents(self, text=None, document=None, raw=False, **filters):
+        """Paths of documents with at least one requirement matching the query"""
+        sql, params = self._select('DISTINCT d.path', text, document, filters, raw)
+        return [row[0] for row in self.connection.execute(sql + ' ORDER BY d.path', params)]
+
+    def canonical(self, text=None, document=None, limit=None, raw=False, **filters):
+        """Canonical requirements among the matches, most repeated first
+
+        Each row counts the matching requirements in the cluster, the
+        documents they come from and the distinct wordings used.
+        """
+        sql, params = self._select(
+            't.canonical_id, (SELECT requirement FROM canonical_requirements c '
+            'WHERE c.id = t.canonical_id) AS requirement, COUNT(*) AS occurrences, '
+            'COUNT(DISTINCT r.document_id) AS documents, COUNT(DISTINCT r.text_id) AS variants',
+            text, document, filters, raw)
+        sql += ' GROUP BY t.canonical_id ORDER BY occurrences DESC, t.canonical_id'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        return [dict(row) for row in self.connection.execute(sql, params)]
+
+    def counts(self, group_by='characteristic'):
+        """Requirement counts grouped by one of the filter columns"""
+        if group_by not in FILTER_COLUMNS:
+            raise ValueError(f"Cannot group by {group_by}")
+        rows = self.connection.execute(
+            f'SELECT {group_by}, COUNT(*) FROM requirements GROUP BY {group_by} ORDER BY {group_by}')
+        return {value: count for value, count in rows}
+
+    def stats(self):
+        return {
+            table: self.connection.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+            for table in ('documents', 'requirements', 'gaps', 'requirement_texts',
+                          'canonical_requirements')
+        }
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Store and search parsed specification requirements')
+    arg_parser.add_argument('--db', default='requirements.db', help='SQLite database file')
+    commands = arg_parser.add_subparsers(dest='command', required=True)
+
+    ingest = commands.add_parser('ingest', help='Store parsed JSON/NDJSON output files')
+    ingest.add_argument('paths', nargs='+', help='Parsed output files, directories or glob patterns')
+
+    search = commands.add_parser('search', help='Search requirements')
+    search.add_argument('text', nargs='?', help="Words to find, e.g. 'TLS 1.3'")
+    search.add_argument('--fts', action='store_true',
+                        help="Treat the text as an FTS5 query, e.g. 'encrypt* AND key'")
+    search.add_argument('--characteristic')
+    search.add_argument('--info-state')
+    search.add_argument('--measure-type')
+    search.add_argument('--document', help='Document name or path')
+    search.add_argument('--limit', type=int, default=50)
+    search.add_argument('--documents-only', action='store_true',
+                        help='List matching documents instead of requirements')
+    search.add_argument('--canonical', action='store_true',
+                        help='List matching canonical requirements with their repeat counts')
+
+    commands.add_parser('stats', help='Show corpus totals')
+    args = arg_parser.parse_args()
+
+    with RequirementStore(args.db) as store:
+        if args.command == 'ingest':
+            paths = []
+            for pattern in args.paths:
+                if os.path.isdir(pattern):
+                    paths += glob.glob(os.path.join(pattern, '*_parsed.json'))
+                    paths += glob.glob(os.path.join(pattern, '*_parsed.ndjson'))
+                else:
+                    paths += glob.glob(pattern)
+            stored = store.ingest_files(sorted(set(paths)))
+            print(f"Stored {stored} documents in {args.db}")
+            print(f"Corpus: {store.stats()}")
+        elif args.command == 'search':
+            filters = {
+                'characteristic': args.characteristic,
+                'info_state': args.info_state,
+                'measure_type': args.measure_type
+            }
+            try:
+                if args.documents_only:
+                    for document in store.documents(args.text, args.document, args.fts, **filters):
+                        print(document)
+                    return
+                if args.canonical:
+                    clusters = store.canonical(args.text, args.document, args.limit, args.fts, **filters)
+                    for row in clusters:
+                        print(f"{row['canonical_id']} x{row['occurrences']} in {row['documents']} documents, "
+                              f"{row['variants']} wordings: {row['requirement']}")
+                    print(f"{len(clusters)} canonical requirements")
+                    return
+                rows = store.query(args.text, args.document, args.limit, args.fts, **filters)
+            except sqlite3.OperationalError as e:
+                print(f"Invalid search: {e}")
+                sys.exit(1)
+            for row in rows:
+                print(f"{row['path']} p{row['page']} [{row['characteristic']}/{row['info_state']}/"
+                      f"{row['measure_type']}] {row['requirement']}")
+            print(f"{len(rows)} requirements")
+        else:
+            stats = store.stats()
+            print(f"{stats['documents']} documents, {stats['requirements']} requirements, "
+                  f"{stats['gaps']} gaps")
+            print(f"{stats['requirement_texts']} distinct wordings in "
+                  f"{stats['canonical_requirements']} canonical requirements")
+            for char, count in store.counts().items():
+                print(f"  {char}: {count}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Checkpoint manifest for batch parsing runs. Every document's batch record is
+appended to a JSON lines file, with the document's content hash, as soon as
+the document finishes, so a run that crashes or is interrupted can be
+restarted and skip everything already done. The first line identifies the
+run's configuration; a manifest written under another configuration is
+discarded rather than resumed.
+"""
+
+import os
+import json
+import hashlib
+from datetime import datetime
+
+MANIFEST_VERSION = 2
+MANIFEST_NAME = 'run_manifest.jsonl'
+# Outcomes a resumed run keeps; timed-out documents are attempted again
+FINISHED_STATUSES = ('parsed', 'failed', 'skipped')
+
+def run_key(parser_fingerprint, **options):
+    """Hash of everything besides the documents that shapes a run's outputs"""
+    config = dict(options, parser_fingerprint=parser_fingerprint, manifest_version=MANIFEST_VERSION)
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode('utf-8')).hexdigest()
+
+class RunManifest:
+    def __init__(self, path, key, resume=True):
+        """Open the manifest at path for a run, resuming it if it was written under the same key"""
+        self.path = path
+        self.key = key
+        # Document path -> {'sha256', 'completed', 'result'}
+        self.entries = {}
+        if resume:
+            self._load()
+        if self.entries:
+            self._file = open(path, 'a')
+        else:
+            self._file = open(path, 'w')
+            self._append({'manifest_version': MANIFEST_VERSION, 'run_key': key,
+                          'started': datetime.now().isoformat()})
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                lines = f.readlines()
+        except OSError:
+            return
+        try:
+            header = json.loads(lines[0])
+        except (IndexError, ValueError):
+            return
+        if header.get('run_key') != self.key:
+            return
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # A line cut short by a crash; its document runs again
+                continue
+            self.entries[entry['result']['document']] = entry
+        if lines[-1] and not lines[-1].endswith('\n'):
+            # Drop the partial line so the next record starts on its own
+            with open(self.path, 'w') as f:
+                f.writelines(lines[:-1])
+
+    def _append(self, record):
+        self._file.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def finished(self, document, digest):
+        """The recorded batch result of a document still finished at this content, else None"""
+        entry = self.entries.get(document)
+        if entry is None or entry['sha256'] != digest:
+            return None
+        result = entry['result']
+        if result['status'] not in FINISHED_STATUSES:
+            return None
+        if any(not os.path.exists(path) for path in result.get('outputs', {}).values()):
+            return None
+        return result
+
+    def record(self, result, digest):
+        """Checkpoint a document's batch result"""
+        entry = {'sha256': digest, 'completed': datetime.now().isoformat(), 'result': result}
+        self.entries[result['document']] = entry
+        self._append(entry)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
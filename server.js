@@ -3,6 +3,7 @@ const cors = require('cors');
 const bodyParser = require('body-parser');
 const path = require('path');
 const fs = require('fs');
+const http = require('http');
 
 const app = express();
 const port = process.env.PORT || 3001;
@@ -272,6 +273,97 @@ app.get('/api/security-comparison', (req, res) => {
   }
 });
 
+// Forward a request to the resident parse daemon (parse_daemon.py); a transform
+// reshapes a successful JSON response before it is sent on
+const proxyToParseDaemon = (method, daemonPath, payload, res, transform) => {
+  const body = payload === undefined ? '' : JSON.stringify(payload);
+  const options = {
+    path: daemonPath,
+    method,
+    headers: { 'Content-Type': 'application/json', 'Content-Length': Buffer.byteLength(body) }
+  };
+  if (process.env.PARSE_DAEMON_SOCKET) {
+    options.socketPath = process.env.PARSE_DAEMON_SOCKET;
+  } else {
+    options.host = process.env.PARSE_DAEMON_HOST || '127.0.0.1';
+    options.port = process.env.PARSE_DAEMON_PORT || 8765;
+  }
+  
+  const daemonReq = http.request(options, (daemonRes) => {
+    res.status(daemonRes.statusCode).type('application/json');
+    if (!transform || daemonRes.statusCode !== 200) {
+      daemonRes.pipe(res);
+      return;
+    }
+    const chunks = [];
+    daemonRes.on('data', (chunk) => chunks.push(chunk));
+    daemonRes.on('end', () => {
+      try {
+        res.json(transform(JSON.parse(Buffer.concat(chunks).toString('utf8'))));
+      } catch (error) {
+        console.error('Invalid parse daemon response:', error);
+        res.status(502).json({ error: `Invalid parse daemon response: ${error.message}` });
+      }
+    });
+  });
+  daemonReq.on('error', (error) => {
+    console.error('Parse daemon unavailable:', error);
+    res.status(503).json({ error: `Parse daemon unavailable: ${error.message}` });
+  });
+  daemonReq.end(body);
+};
+
+// Parse a specification PDF immediately (runs ahead of queued ingestion jobs)
+app.post('/api/parse-spec', (req, res) => {
+  proxyToParseDaemon('POST', '/parse', { pdf_path: req.body.pdf_path }, res);
+});
+
+// Parse one of the bundled specification PDFs for the technical spec parser page
+const SPEC_PDF_DIR = path.join(__dirname, 'client/public/pdf');
+
+app.post('/api/parse-specification', (req, res) => {
+  const { filename } = req.body;
+  // A bare file name inside client/public/pdf; anything with a path in it is refused
+  if (typeof filename !== 'string' || !filename || filename !== path.basename(filename) ||
+      filename === '.' || filename === '..') {
+    return res.status(400).json({ error: 'filename must be the name of a PDF in client/public/pdf' });
+  }
+  const pdfPath = path.join(SPEC_PDF_DIR, filename);
+  if (!fs.existsSync(pdfPath)) {
+    return res.status(404).json({ error: `${filename} not found` });
+  }
+  proxyToParseDaemon('POST', '/parse', { pdf_path: path.relative(__dirname, pdfPath) }, res,
+    ({ parsed }) => {
+      // TechnicalSpecParser reads each characteristic's coverage alongside its requirements
+      Object.entries(parsed.characteristics).forEach(([char, data]) => {
+        data.coverage = parsed.summary.coverage[char];
+      });
+      return parsed;
+    });
+});
+
+// Queued ingestion: submit, list, check, fetch results and cancel parse jobs
+app.post('/api/parse-jobs', (req, res) => {
+  const { pdf_path, priority } = req.body;
+  proxyToParseDaemon('POST', '/jobs', { pdf_path, priority }, res);
+});
+
+app.get('/api/parse-jobs', (req, res) => {
+  proxyToParseDaemon('GET', '/jobs', undefined, res);
+});
+
+app.get('/api/parse-jobs/:id', (req, res) => {
+  proxyToParseDaemon('GET', `/jobs/${encodeURIComponent(req.params.id)}`, undefined, res);
+});
+
+app.get('/api/parse-jobs/:id/result', (req, res) => {
+  proxyToParseDaemon('GET', `/jobs/${encodeURIComponent(req.params.id)}/result`, undefined, res);
+});
+
+app.delete('/api/parse-jobs/:id', (req, res) => {
+  proxyToParseDaemon('DELETE', `/jobs/${encodeURIComponent(req.params.id)}`, undefined, res);
+});
+
 // Serve React app
 app.get('*', (req, res) => {
   res.sendFile(path.join(__dirname, 'client/build/index.html'));
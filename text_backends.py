@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+Text extraction backends for specification documents. Each backend turns
+one document format into a (page_number, text) stream: PyPDF2 and the
+poppler pdftotext binary for PDFs, the DOCX XML read directly from the zip
+archive, and plain text with form feeds between pages. Calibration times
+every installed backend on sample documents and routes each format to the
+fastest one that finds the same requirements as the default backend.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import zipfile
+import argparse
+import subprocess
+import xml.etree.ElementTree as ET
+from datetime import datetime
+
+BLOCK_SIZE = 1024 * 1024
+# Share of the default backend's requirements a faster backend must also find
+DEFAULT_MIN_RECALL = 0.98
+# Share of replacement and control characters above which text is garbage
+MAX_BAD_CHARACTERS = 0.01
+
+BAD_CHARACTER_PATTERN = re.compile(r'[\x00-\x08\x0b\x0e-\x1f\ufffd]')
+
+# Bytes sniffed for the format of a document without a known extension;
+# PDF readers accept a header anywhere in the first kilobyte
+MAGIC_BYTES = 1024
+# Assumed for anything else, as the parser did before it had other backends
+DEFAULT_FORMAT = '.pdf'
+
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+def _split_pages(blocks, first=1, last=None):
+    """Yield (page_number, text) from text blocks with a form feed after each page"""
+    page_number = 1
+    parts = []
+    for block in blocks:
+        *finished, rest = block.split('\f')
+        for piece in finished:
+            parts.append(piece)
+            if page_number >= first:
+                yield page_number, ''.join(parts)
+            page_number += 1
+            parts = []
+            if last is not None and page_number > last:
+                return
+        parts.append(rest)
+    text = ''.join(parts)
+    # A form feed after the last page does not start another
+    if text and page_number >= first:
+        yield page_number, text
+
+class TextBackend:
+    """One way of extracting page text from a document format"""
+    name = None
+    extensions = ()
+
+    def available(self):
+        return True
+
+    def prepare(self):
+        """Load what the backend needs up front, e.g. in a pool worker's initializer"""
+
+    def iter_pages(self, path, first=1, last=None):
+        """Yield (page_number, text) for pages first to last (1-based, inclusive)"""
+        raise NotImplementedError
+
+    def page_count(self, path):
+        return sum(1 for _ in self.iter_pages(path))
+
+class PyPDF2Backend(TextBackend):
+    name = 'pypdf2'
+    extensions = ('.pdf',)
+
+    def prepare(self):
+        try:
+            import PyPDF2
+        except ImportError:
+            # Reported when a document is parsed
+            pass
+
+    def iter_pages(self, path, first=1, last=None):
+        import PyPDF2
+        with open(path, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            last = min(last or len(pdf_reader.pages), len(pdf_reader.pages))
+            for page_num in range(first - 1, last):
+                page = pdf_reader.pages[page_num]
+                yield page_num + 1, page.extract_text() or ''
+
+    def page_count(self, path):
+        import PyPDF2
+        with open(path, 'rb') as file:
+            return len(PyPDF2.PdfReader(file).pages)
+
+class PdftotextBackend(TextBackend):
+    """poppler's pdftotext, run once per page range with its output streamed back"""
+    name = 'pdftotext'
+    extensions = ('.pdf',)
+
+    def available(self):
+        return shutil.which('pdftotext') is not None
+
+    def iter_pages(self, path, first=1, last=None):
+        command = ['pdftotext', '-q', '-enc', 'UTF-8', '-f', str(first)]
+        if last is not None:
+            command += ['-l', str(last)]
+        with subprocess.Popen(command + [path, '-'], stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                              encoding='utf-8', errors='replace') as process:
+            blocks = iter(lambda: process.stdout.read(BLOCK_SIZE), '')
+            for page_number, text in _split_pages(blocks):
+                yield page_number + first - 1, text
+            error = process.stderr.read()
+        if process.returncode:
+            raise RuntimeError(f"pdftotext failed on {path}: {error.strip() or process.returncode}")
+
+    def page_count(self, path):
+        if shutil.which('pdfinfo'):
+            info = subprocess.run(['pdfinfo', path], capture_output=True, encoding='utf-8',
+                                  errors='replace')
+            for line in info.stdout.splitlines():
+                if line.startswith('Pages:'):
+                    return int(line.split()[1])
+        return PyPDF2Backend().page_count(path)
+
+class DocxBackend(TextBackend):
+    """Paragraph text straight from word/document.xml, streamed with iterparse
+
+    Paragraphs end in a newline and bulleted list paragraphs start with
+    '• ', as a rendered PDF of the document would show them. Pages break at
+    explicit page breaks and at the page breaks Word saved when it last laid
+    the document out.
+    """
+    name = 'docx'
+    extensions = ('.docx',)
+
+    def _bullet_lists(self, archive):
+        """Whether each (numId, ilvl) list level and each paragraph style is bulleted"""
+        names = set(archive.namelist())
+        levels = {}
+        if 'word/numbering.xml' in names:
+            root = ET.fromstring(archive.read('word/numbering.xml'))
+            formats = {}
+            for abstract in root.iter(W + 'abstractNum'):
+                for level in abstract.iter(W + 'lvl'):
+                    number_format = level.find(W + 'numFmt')
+                    formats[abstract.get(W + 'abstractNumId'), level.get(W + 'ilvl')] = (
+                        number_format is not None and number_format.get(W + 'val') == 'bullet')
+            for num in root.iter(W + 'num'):
+                abstract_id = num.find(W + 'abstractNumId').get(W + 'val')
+                for (abstract, ilvl), bullet in formats.items():
+                    if abstract == abstract_id:
+                        levels[num.get(W + 'numId'), ilvl] = bullet
+
+        styles = {}
+        if 'word/styles.xml' in names:
+            root = ET.fromstring(archive.read('word/styles.xml'))
+            for style in root.iter(W + 'style'):
+                num_id = style.find(f'{W}pPr/{W}numPr/{W}numId')
+                if num_id is not None:
+                    ilvl = style.find(f'{W}pPr/{W}numPr/{W}ilvl')
+                    level = ilvl.get(W + 'val') if ilvl is not None else '0'
+                    styles[style.get(W + 'styleId')] = levels.get((num_id.get(W + 'val'), level), False)
+        return levels, styles
+
+    def iter_pages(self, path, first=1, last=None):
+        with zipfile.ZipFile(path) as archive:
+            levels, styles = self._bullet_lists(archive)
+            page_number = 1
+            page = []
+            # Paragraphs may nest (text boxes); each is [parts, bulleted, prefixed]
+            paragraphs = []
+            # Inside paragraph properties, where w:tab defines a tab stop
+            properties = 0
+            with archive.open('word/document.xml') as document:
+                for event, element in ET.iterparse(document, events=('start', 'end')):
+                    tag = element.tag
+                    if tag == W + 'pPr':
+                        properties += 1 if event == 'start' else -1
+                    if event == 'start':
+                        if tag == W + 'p':
+                            paragraphs.append([[], False, False])
+                        continue
+                    if not paragraphs:
+                        continue
+                    paragraph = paragraphs[-1]
+                    parts = paragraph[0]
+                    if tag == W + 't':
+                        parts.append(element.text or '')
+                    elif tag == W + 'tab' and not properties:
+                        parts.append('\t')
+                    elif tag in (W + 'cr', W + 'br') and element.get(W + 'type') != 'page':
+                        parts.append('\n')
+                    elif tag == W + 'pStyle':
+                        paragraph[1] = paragraph[1] or styles.get(element.get(W + 'val'), False)
+                    elif tag == W + 'numPr':
+                        num_id = element.find(W + 'numId')
+                        ilvl = element.find(W + 'ilvl')
+                        paragraph[1] = levels.get((num_id.get(W + 'val') if num_id is not None else None,
+                                                   ilvl.get(W + 'val') if ilvl is not None else '0'), False)
+                    elif tag in (W + 'br', W + 'lastRenderedPageBreak'):
+                        # Consecutive breaks with nothing between them are one break
+                        if page or parts:
+                            page.append(self._flush(paragraph))
+                            if page_number >= first:
+                                yield page_number, ''.join(page)
+                            page_number += 1
+                            page = []
+                            if last is not None and page_number > last:
+                                return
+                    elif tag == W + 'p':
+                        paragraphs.pop()
+                        page.append(self._flush(paragraph) + '\n')
+                        element.clear()
+            if page_number >= first and (page or page_number == 1):
+                yield page_number, ''.join(page)
+
+    def _flush(self, paragraph):
+        """Text gathered so far of a paragraph, bullet first"""
+        parts, bulleted, prefixed = paragraph
+        if bulleted and parts and not prefixed:
+            parts.insert(0, '• ')
+            paragraph[2] = True
+        text = ''.join(parts)
+        parts.clear()
+        return text
+
+class PlainTextBackend(TextBackend):
+    """UTF-8 text, one page per form feed separated section"""
+    name = 'text'
+    extensions = ('.txt',)
+
+    def iter_pages(self, path, first=1, last=None):
+        with open(path, 'r', encoding='utf-8', errors='replace') as file:
+            yield from _split_pages(iter(lambda: file.read(BLOCK_SIZE), ''), first, last)
+
+# In order of preference; the first available backend of a format is its default
+BACKENDS = [PyPDF2Backend(), PdftotextBackend(), DocxBackend(), PlainTextBackend()]
+
+def supported_extensions():
+    return sorted({extension for backend in BACKENDS for extension in backend.extensions})
+
+def document_format(path):
+    """Format of a document by its extension, else by its leading bytes, else PDF"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in supported_extensions():
+        return extension
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(MAGIC_BYTES)
+    except OSError:
+        return DEFAULT_FORMAT
+    if b'%PDF-' in head:
+        return '.pdf'
+    if head.startswith(b'PK\x03\x04'):
+        return '.docx'
+    return DEFAULT_FORMAT
+
+def available_backends(extension):
+    return [backend for backend in BACKENDS if extension in backend.extensions and backend.available()]
+
+def backend_for(path, routes=None):
+    """Backend a document's format is routed to, falling back to the format's default"""
+    extension = document_format(path)
+    candidates = available_backends(extension)
+    if not candidates:
+        raise ValueError(f"No text backend for {extension or 'extensionless'} documents ({path})")
+    name = (routes or {}).get(extension)
+    for backend in candidates:
+        if backend.name == name:
+            return backend
+    return candidates[0]
+
+def prepare_backends():
+    """Load every available backend up front, so no document pays for the imports"""
+    for backend in BACKENDS:
+        if backend.available():
+            backend.prepare()
+
+def load_routes(path):
+    """Format -> backend routes from a calibration file"""
+    with open(path, 'r') as f:
+        return json.load(f)['routes']
+
+def text_quality(text):
+    """Share of characters that are neither replacement nor control characters"""
+    if not text:
+        return 0.0
+    return 1 - len(BAD_CHARACTER_PATTERN.findall(text)) / len(text)
+
+def _requirement_texts(parser, pages):
+    from requirement_dedup import normalize
+    req_matches, bullet_matches, _, _ = parser.scan_pages(pages)
+    return {normalize(text) for text, _ in req_matches + bullet_matches}
+
+def calibrate(sample_paths, parser=None, repeats=3, min_recall=DEFAULT_MIN_RECALL):
+    """Time each installed backend on the samples of each format and choose routes
+
+    A backend qualifies for a format when its text is clean and it finds at
+    least min_recall of the requirements the format's default backend finds
+    on the same samples; the fastest qualifying backend gets the route.
+    Returns {'calibrated', 'routes', 'results'}.
+    """
+    if parser is None:
+        from parse_ventilator_spec import VentilatorSpecParser
+        parser = VentilatorSpecParser()
+
+    samples = {}
+    for path in sample_paths:
+        samples.setdefault(document_format(path), []).append(path)
+
+    routes = {}
+    results = []
+    for extension, paths in sorted(samples.items()):
+        reference = None
+        best = None
+        for backend in available_backends(extension):
+            entry = {'format': extension, 'backend': backend.name, 'documents': len(paths)}
+            try:
+                pages = {path: list(backend.iter_pages(path)) for path in paths}
+                seconds = min(_time_extraction(backend, paths) for _ in range(repeats))
+            except Exception as e:
+                entry.update(passed=False, error=str(e))
+                results.append(entry)
+                continue
+
+            text = ''.join(page_text for document in pages.values() for _, page_text in document)
+            found = set()
+            for document in pages.values():
+                found |= _requirement_texts(parser, document)
+            if reference is None:
+                # The default backend sets the requirements to find
+                reference = found
+            recall = len(found & reference) / len(reference) if reference else 1.0
+            quality = text_quality(text)
+            entry.update(seconds=round(seconds, 4), characters=len(text), requirements=len(found),
+                         recall=round(recall, 4), quality=round(quality, 4),
+                         passed=bool(text) and quality >= 1 - MAX_BAD_CHARACTERS and recall >= min_recall)
+            results.append(entry)
+            if entry['passed'] and (best is None or seconds < best[1]):
+                best = (backend.name, seconds)
+        if best:
+            routes[extension] = best[0]
+
+    return {'calibrated': datetime.now().isoformat(), 'routes': routes, 'results': results}
+
+def _time_extraction(backend, paths):
+    start = time.perf_counter()
+    for path in paths:
+        for _ in backend.iter_pages(path):
+            pass
+    return time.perf_counter() - start
+
+def main():
+    arg_parser = argparse.ArgumentParser(
+        description='Benchmark the installed text backends and route each format to the fastest')
+    arg_parser.add_argument('samples', nargs='*', help='Sample documents (PDF, DOCX, text)')
+    arg_parser.add_argument('--output', default='text_backends.json',
+                            help='Calibration file to write, for --backends of the parser')
+    arg_parser.add_argument('--repeats', type=int, default=3, help='Timed extractions per backend')
+    arg_parser.add_argument('--min-recall', type=float, default=DEFAULT_MIN_RECALL,
+                            help="Share of the default backend's requirements a backend must find")
+    arg_parser.add_argument('--list', action='store_true', help='List backends and exit')
+    args = arg_parser.parse_args()
+
+    if args.list or not args.samples:
+        for backend in BACKENDS:
+            state = 'available' if backend.available() else 'not installed'
+            print(f"{backend.name:<10} {' '.join(backend.extensions):<8} {state}")
+        return
+
+    calibration = calibrate(args.samples, repeats=args.repeats, min_recall=args.min_recall)
+    for entry in calibration['results']:
+        if 'error' in entry:
+            print(f"{entry['format']:<6} {entry['backend']:<10} failed: {entry['error']}")
+            continue
+        print(f"{entry['format']:<6} {entry['backend']:<10} {entry['seconds']:>8.3f}s "
+              f"recall {entry['recall']:.3f} quality {entry['quality']:.3f} "
+              f"{'ok' if entry['passed'] else 'rejected'}")
+    if not calibration['routes']:
+        print("No backend passed the quality check")
+        sys.exit(1)
+    with open(args.output, 'w') as f:
+        json.dump(calibration, f, indent=2)
+    for extension, name in sorted(calibration['routes'].items()):
+        print(f"{extension} -> {name}")
+    print(f"Routes saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
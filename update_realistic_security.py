@@ -7,7 +7,14 @@ Update ventilator security data with realistic assessments based on:
 - Known vulnerabilities and security features
 """
 
+import os
+import sys
+import glob
 import json
+import time
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 
 # Realistic security profiles based on industry assessments
 SECURITY_PROFILES = {
@@ -87,17 +94,29 @@ LEVEL_TO_Z = {
     'Very High': 2
 }
 
-def update_ventilator_security(filename, vendor):
-    """Update security values in ventilator data file"""
-    
-    # Read existing data
-    with open(filename, 'r') as f:
-        data = json.load(f)
+SECURITY_SUBSYSTEM = 'Security and Human Trust'
+
+# Every coordinate of the security subsystem, so resets touch only these keys
+SECURITY_INDEX = [f"{base_coord},{z}" for base_coord in SECURITY_COORDS.values()
+                  for z in sorted(LEVEL_TO_Z.values())]
+
+def check_device_data(data):
+    """Raise ValueError unless data is a device file: cube coordinates mapped to cell dicts"""
+    if not isinstance(data, dict):
+        raise ValueError(f'expected an object of device cells, got {type(data).__name__}')
+    for key, cell in data.items():
+        if not isinstance(cell, dict):
+            raise ValueError(f'cell {key!r} is {type(cell).__name__}, not an object')
+
+def apply_security_profile(data, vendor, verbose=True):
+    """Reset the security subsystem and apply a vendor profile; returns warnings"""
+    warnings = []
     
     # First, reset all security values to 0
-    for key in data:
-        if data[key].get('subsystem') == 'Security and Human Trust':
-            data[key]['value'] = 0
+    for key in SECURITY_INDEX:
+        cell = data.get(key)
+        if cell is not None and cell.get('subsystem', SECURITY_SUBSYSTEM) == SECURITY_SUBSYSTEM:
+            cell['value'] = 0
     
     # Now set the appropriate security values based on realistic profile
     profile = SECURITY_PROFILES[vendor]
@@ -109,19 +128,127 @@ def update_ventilator_security(filename, vendor):
         
         if full_coord in data:
             data[full_coord]['value'] = settings['value']
-            print(f"Set {vendor} {property_name} to {settings['level']} at {full_coord}")
+            if verbose:
+                print(f"Set {vendor} {property_name} to {settings['level']} at {full_coord}")
         else:
-            print(f"Warning: Coordinate {full_coord} not found for {property_name}")
+            warnings.append(f"Coordinate {full_coord} not found for {property_name}")
+            if verbose:
+                print(f"Warning: Coordinate {full_coord} not found for {property_name}")
+    
+    return warnings
+
+def write_json_atomic(filename, data):
+    """Write JSON to a temp file in the same directory, then rename it into place"""
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.json')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file owner-only; keep the permissions of the file it replaces
+        mode = os.stat(filename).st_mode & 0o777 if os.path.exists(filename) else 0o644
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, filename)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def update_ventilator_security(filename, vendor):
+    """Update security values in ventilator data file"""
+    
+    # Read existing data
+    with open(filename, 'r') as f:
+        data = json.load(f)
+    check_device_data(data)
+    
+    apply_security_profile(data, vendor)
     
-    # Write updated data back
-    with open(filename, 'w') as f:
-        json.dump(data, f, indent=2)
+    # Write updated data back without ever leaving a half-written file
+    write_json_atomic(filename, data)
     
     print(f"Updated {filename} with realistic security values\n")
 
+def infer_vendor(filename):
+    """Vendor profile whose name prefixes the file name, e.g. dragerVentilatorData.json"""
+    name = os.path.basename(filename).lower()
+    for vendor in SECURITY_PROFILES:
+        if name.startswith(vendor):
+            return vendor
+    return None
+
+def _update_device_file(job):
+    """Apply a profile to one device file inside a pool worker"""
+    filename, vendor = job
+    try:
+        with open(filename, 'r') as f:
+            data = json.load(f)
+        check_device_data(data)
+        warnings = apply_security_profile(data, vendor, verbose=False)
+        write_json_atomic(filename, data)
+    except (OSError, ValueError) as e:
+        return {'file': filename, 'status': 'failed', 'error': str(e)}
+    return {'file': filename, 'status': 'updated', 'vendor': vendor, 'warnings': warnings}
+
+def bulk_update(patterns, vendor=None, workers=None):
+    """Apply security profiles to every device file matched by directories or globs"""
+    filenames = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, '*.json')
+        filenames.update(path for path in glob.glob(pattern) if os.path.isfile(path))
+    
+    jobs = []
+    skipped = []
+    for filename in sorted(filenames):
+        file_vendor = vendor or infer_vendor(filename)
+        if file_vendor in SECURITY_PROFILES:
+            jobs.append((filename, file_vendor))
+        else:
+            skipped.append(filename)
+    
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_update_device_file, jobs,
+                                chunksize=max(1, len(jobs) // (workers * 4))))
+    elapsed = time.perf_counter() - start
+    
+    updated = [result for result in results if result['status'] == 'updated']
+    failed = [result for result in results if result['status'] == 'failed']
+    warned = [result for result in updated if result['warnings']]
+    
+    print(f"Updated {len(updated)} device files with {workers} workers")
+    for result in failed:
+        print(f"  Failed: {result['file']} ({result['error']})")
+    for filename in skipped:
+        print(f"  Skipped (no matching vendor profile): {filename}")
+    if warned:
+        print(f"  {len(warned)} files are missing one or more security coordinates")
+    rate = len(jobs) / elapsed if elapsed else 0
+    print(f"Throughput: {rate:.1f} files/second ({elapsed:.2f}s elapsed)")
+    
+    return {'updated': updated, 'failed': failed, 'skipped': skipped, 'elapsed_seconds': elapsed}
+
 def main():
     """Update both ventilator files with realistic security assessments"""
     
+    arg_parser = argparse.ArgumentParser(description='Apply realistic security profiles to ventilator data')
+    arg_parser.add_argument('--bulk', nargs='+', metavar='DIR_OR_GLOB',
+                            help='Update every device file in these directories or glob patterns')
+    arg_parser.add_argument('--vendor', choices=sorted(SECURITY_PROFILES),
+                            help='Profile for every bulk file (inferred from file names if omitted)')
+    arg_parser.add_argument('--workers', type=int, default=None,
+                            help='Worker processes for bulk mode (defaults to CPU count)')
+    args = arg_parser.parse_args()
+    
+    if args.bulk:
+        result = bulk_update(args.bulk, args.vendor, args.workers)
+        if result['failed']:
+            sys.exit(1)
+        return
+    
     print("Updating ventilator security data with realistic assessments...\n")
     
     # Update Philips ventilator